@@ -1,5 +1,11 @@
 
 echo " BUILD START"
 python3.9  -m pip install -r requirements.txt
+python3.9 manage.py build_lexicon
+python3.9 manage.py build_docstore
+python3.9 manage.py build_positions
+python3.9 manage.py build_skips
+python3.9 manage.py build_impacts --prune-recall 0.95
+python3.9 manage.py build_snapshot
 python3.9 manage.py collectstatic  --noinput --clear
 echo " BUILD END"
@@ -0,0 +1,129 @@
+"""
+Pipeline analisis teks (hapus angka, tokenisasi, buang stopwords, stemming)
+yang dipakai bersama oleh indexer dan query, sehingga term di index dan di
+query selalu dihasilkan dengan cara yang sama persis.
+"""
+from functools import lru_cache
+import os
+import pickle
+import re
+
+DIGITS_RE = re.compile(r'[0-9]+')
+# sama dengan RegexpTokenizer(r'\w+') dari NLTK
+WORD_RE = re.compile(r'\w+')
+PHRASE_RE = re.compile(r'"([^"]*)"')
+
+
+class Analyzer:
+    """
+    Mengubah teks menjadi list of terms.
+
+    Porter stemmer NLTK ditulis dalam python murni dan relatif lambat, jadi
+    hasil stemming di-memo dengan LRU (key-nya token dalam huruf kecil, karena
+    PorterStemmer.stem juga mengubah token ke huruf kecil terlebih dahulu).
+    Sebelum memo, token dicek ke stem table opsional: kumpulan term vocabulary
+    index yang stem-nya adalah dirinya sendiri (lihat build_stem_table), atau
+    token -> stem dari startup snapshot (lihat meedle.snapshot). NLTK baru
+    di-import saat ada token yang tidak ada di stem table, karena import-nya
+    sendiri memakan waktu ~0.2 detik saat cold start.
+
+    Parameters
+    ----------
+    stop_words: iterable of str
+        Daftar stopwords (huruf kecil)
+    memo_size(int): banyaknya token -> stem maksimum di memo LRU
+    stem_table(dict): token (huruf kecil) -> stem yang sudah dihitung sebelumnya
+    """
+    def __init__(self, stop_words, memo_size=65536, stem_table=None):
+        self.stop_words = frozenset(stop_words)
+        self.memo_size = memo_size
+        self.stem_table = stem_table or {}
+        self.stemmer = None
+        self._stem = None
+
+    @classmethod
+    def from_files(cls, stop_words_path, stem_table_path=None, **kwargs):
+        """Membuat Analyzer dari file stopwords dan (jika ada) file stem table."""
+        with open(stop_words_path) as f:
+            stop_words = f.read().split()
+        stem_table = None
+        if stem_table_path is not None and os.path.exists(stem_table_path):
+            with open(stem_table_path, 'rb') as f:
+                stem_table = pickle.load(f)
+        return cls(stop_words, stem_table=stem_table, **kwargs)
+
+    def __getstate__(self):
+        # memo lru_cache tidak bisa di-pickle (misal saat dikirim ke worker process)
+        return {'stop_words': self.stop_words, 'memo_size': self.memo_size,
+                'stem_table': self.stem_table}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def tokenize(self, text):
+        """Hapus angka lalu tokenisasi (tanpa stopword removal dan stemming)."""
+        return WORD_RE.findall(DIGITS_RE.sub('', text))
+
+    def _load_stemmer(self):
+        from nltk.stem import PorterStemmer
+        self.stemmer = PorterStemmer()
+        self._stem = lru_cache(maxsize=self.memo_size)(self.stemmer.stem)
+
+    def stem(self, token):
+        token = token.lower()
+        stem = self.stem_table.get(token)
+        if stem is None:
+            if self._stem is None:
+                self._load_stemmer()
+            stem = self._stem(token)
+        return stem
+
+    def analyze(self, text):
+        """
+        Hapus angka, tokenisasi, buang stopwords, lalu stemming.
+
+        Returns
+        -------
+        List[str]
+            List of terms sesuai urutan kemunculan di teks
+        """
+        stop_words = self.stop_words
+        stem = self.stem
+        return [stem(t) for t in self.tokenize(text) if not t.lower() in stop_words]
+
+    def phrases(self, text):
+        """
+        Phrase di dalam tanda kutip ("...") pada teks query, masing-masing
+        sebagai tuple of terms hasil analyze. Phrase dengan kurang dari dua
+        term tidak dikembalikan (cukup diperlakukan sebagai term biasa).
+        """
+        phrases = []
+        for match in PHRASE_RE.finditer(text):
+            terms = self.analyze(match.group(1))
+            if len(terms) > 1:
+                phrases.append(tuple(terms))
+        return phrases
+
+    def memo_info(self):
+        """Statistik memo stemmer (hits, misses, maxsize, currsize)."""
+        if self._stem is None:
+            return {"hits": 0, "misses": 0, "maxsize": self.memo_size, "currsize": 0}
+        return self._stem.cache_info()._asdict()
+
+
+def build_stem_table(terms, stemmer=None):
+    """
+    Membuat stem table dari vocabulary index: setiap term yang stem-nya
+    adalah dirinya sendiri dipetakan ke dirinya sendiri, sehingga token query
+    yang sudah berbentuk stem cukup di-lookup ke dict. Table ini hanya
+    berisi fakta tentang stemmer, jadi tetap benar walaupun index berubah.
+    """
+    if stemmer is None:
+        from nltk.stem import PorterStemmer
+        stemmer = PorterStemmer()
+    return {term: term for term in terms if term and stemmer.stem(term) == term}
+
+
+def write_stem_table(path, terms):
+    with open(path, 'wb') as f:
+        pickle.dump(build_stem_table(terms), f)
@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class MeedleConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'meedle'
+
+    def ready(self):
+        from . import metrics
+        metrics.enabled = getattr(settings, 'MEEDLE_METRICS', False)
+        if getattr(settings, 'MEEDLE_PRELOAD_INDEX', False):
+            from .searcher import get_searcher
+            get_searcher()
@@ -0,0 +1,19 @@
+"""
+Benchmark retrieval Meedle yang reproducible.
+
+    workload  : query sintetis dari vocabulary index (pendek/panjang, term
+                langka/umum, pengulangan Zipfian)
+    stages    : latency per stage TaaT (analysis, lookup, decode, scoring,
+                top-k, JSON)
+    runner    : latency, throughput dan peak RSS setiap konfigurasi
+                engine/codec/cache, masing-masing di proses tersendiri
+    endpoints : latency end-to-end endpoint Django lewat test client
+    stats     : ringkasan latency (p50/p95/p99) dan perbandingan hasil
+    cold_start: import poll.wsgi dan time-to-first-result di interpreter baru
+
+Dijalankan lewat `python manage.py benchmark`, yang menulis hasilnya sebagai
+JSON agar bisa dibandingkan antar commit (--baseline), dan
+`python manage.py benchmark_cold_start`.
+"""
+from .stats import compare, percentile, summarize
+from .workload import PROFILES, generate_workload
@@ -0,0 +1,107 @@
+"""
+Cold start seperti lambda di Vercel: setiap run adalah interpreter baru yang
+meng-import poll.wsgi lalu menjawab request /search_query pertama lewat
+aplikasi WSGI (tanpa test client, sehingga middleware dan URLconf dimuat
+seperti di production).
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+from .stats import percentile
+
+# dijalankan dengan `python -c`; argumen pertama adalah JSON dari run_cold_start
+CHILD = r'''
+import io, json, os, sys, time
+start = time.perf_counter()
+options = json.loads(sys.argv[1])
+sys.path.insert(0, os.getcwd())
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'poll.settings')
+from django.conf import settings
+settings.MEEDLE_STARTUP_SNAPSHOT = options['snapshot']
+imported = time.perf_counter()
+from poll.wsgi import application
+ready = time.perf_counter()
+
+def request(query):
+    body = json.dumps({"query": query, "k": options['k']}).encode()
+    environ = {'REQUEST_METHOD': 'POST', 'PATH_INFO': '/search_query', 'SERVER_NAME': options['host'],
+               'SERVER_PORT': '443', 'HTTP_HOST': options['host'], 'wsgi.url_scheme': 'https',
+               'CONTENT_TYPE': 'application/json', 'CONTENT_LENGTH': str(len(body)),
+               'wsgi.input': io.BytesIO(body), 'wsgi.errors': sys.stderr,
+               'SERVER_PROTOCOL': 'HTTP/1.1', 'wsgi.version': (1, 0), 'wsgi.multithread': False,
+               'wsgi.multiprocess': True, 'wsgi.run_once': False}
+    status = []
+    content = b''.join(application(environ, lambda s, headers, exc_info=None: status.append(s)))
+    if not status[0].startswith('200'):
+        raise RuntimeError(f"/search_query mengembalikan {status[0]}: {content[:200]!r}")
+
+request(options['queries'][0])
+first = time.perf_counter()
+for query in options['queries'][1:]:
+    request(query)
+done = time.perf_counter()
+
+from meedle.benchmark.stats import peak_rss_bytes
+print(json.dumps({
+    "settings_ms": (imported - start) * 1e3,
+    "import_ms": (ready - imported) * 1e3,
+    "first_request_ms": (first - ready) * 1e3,
+    "time_to_first_result_ms": (first - start) * 1e3,
+    "next_requests_ms": (done - first) * 1e3 / max(1, len(options['queries']) - 1),
+    "nltk_imported": 'nltk' in sys.modules,
+    "numpy_imported": 'numpy' in sys.modules,
+    "peak_rss_bytes": peak_rss_bytes(),
+}))
+'''
+
+# metric yang diringkas dengan median dan p95 antar run
+TIMINGS = ('process_ms', 'settings_ms', 'import_ms', 'first_request_ms',
+           'time_to_first_result_ms', 'next_requests_ms', 'peak_rss_bytes')
+
+
+def cold_start_once(base_dir, queries, k=10, snapshot=True, host='localhost'):
+    """
+    Satu cold start di interpreter baru. process_ms adalah waktu dari
+    menjalankan interpreter sampai hasil query pertama dikembalikan,
+    ditambah request berikutnya (sisa queries) dan pencetakan hasil.
+    """
+    options = json.dumps({"queries": queries, "k": k, "snapshot": snapshot, "host": host})
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-c', CHILD, options], cwd=base_dir,
+                               capture_output=True, text=True, env=dict(os.environ))
+    elapsed = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"cold start gagal:\n{completed.stderr}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["process_ms"] = elapsed * 1e3
+    return result
+
+
+def run_cold_start(base_dir, queries, runs=5, k=10, modes=(True, False), host='localhost'):
+    """
+    runs cold start untuk setiap mode (startup snapshot aktif/mati),
+    bergantian antar mode agar gangguan dari mesin terbagi rata.
+
+    Returns
+    -------
+    dict
+        "snapshot_on"/"snapshot_off" -> {"runs": [...], "median": {...}, "p95": {...}}
+    """
+    raw = {mode: [] for mode in modes}
+    for _ in range(runs):
+        for mode in modes:
+            raw[mode].append(cold_start_once(base_dir, queries, k, mode, host))
+    report = {}
+    for mode, results in raw.items():
+        summary = {"runs": results, "median": {}, "p95": {}}
+        for name in TIMINGS:
+            values = [result[name] for result in results if result.get(name) is not None]
+            if values:
+                summary["median"][name] = percentile(values, 0.5)
+                summary["p95"][name] = percentile(values, 0.95)
+        summary["nltk_imported"] = any(result["nltk_imported"] for result in results)
+        report[f"snapshot_{'on' if mode else 'off'}"] = summary
+    return report
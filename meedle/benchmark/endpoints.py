@@ -0,0 +1,65 @@
+"""
+Latency end-to-end endpoint Django (routing, middleware, view, JSON)
+lewat django.test.Client, memakai searcher dan settings proses ini.
+"""
+import json
+import time
+
+from .stats import summarize
+
+
+def _post(client, path, body):
+    response = client.post(path, json.dumps(body), content_type='application/json')
+    if response.status_code != 200:
+        raise RuntimeError(f"{path} mengembalikan status {response.status_code}")
+    if response.streaming:
+        return json.loads(b''.join(response.streaming_content))
+    return response.json()
+
+
+def bench_endpoints(queries, k=10, repeat=1):
+    """
+    Latency /search_query, /search_query dengan snippets dan /get_docs
+    (dokumen hasil query yang sama) untuk setiap query di workload.
+
+    Returns
+    -------
+    dict
+        nama endpoint -> {"latency": ringkasan, "throughput_qps": float}
+    """
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    from ..searcher import get_searcher
+
+    endpoints = [
+        ('search_query', '/search_query', lambda query, docs: {"query": query, "k": k}),
+        ('search_query_snippets', '/search_query',
+         lambda query, docs: {"query": query, "k": k, "snippets": True}),
+        ('get_docs', '/get_docs', lambda query, docs: {"docs_id": docs, "truncate": True}),
+    ]
+    results = {}
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        client = Client()
+        # pemanasan: memuat searcher, document store dan hasil untuk /get_docs
+        docs = {query: _post(client, '/search_query', {"query": query, "k": k})["docs_id"]
+                for query in queries}
+        for name, path, make_body in endpoints:
+            for query in queries:
+                _post(client, path, make_body(query, docs[query]))
+            searcher = get_searcher()
+            if searcher.result_cache is not None:
+                searcher.result_cache.clear()
+
+            latencies = []
+            wall = time.perf_counter()
+            for _ in range(repeat):
+                for query in queries:
+                    body = make_body(query, docs[query])
+                    start = time.perf_counter()
+                    _post(client, path, body)
+                    latencies.append(time.perf_counter() - start)
+            wall = time.perf_counter() - wall
+            results[name] = {"latency": summarize(latencies),
+                             "throughput_qps": len(latencies) / wall if wall > 0 else None}
+    return results
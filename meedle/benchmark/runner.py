@@ -0,0 +1,145 @@
+"""
+Menjalankan konfigurasi benchmark (engine, codec, PostingsCache, result
+cache). Setiap konfigurasi dijalankan di proses baru (spawn), sehingga
+peak RSS dan waktu open() tidak dipengaruhi konfigurasi sebelumnya.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+import shutil
+import time
+
+from .stages import STAGES, staged_taat
+from .stats import peak_rss_bytes, summarize
+
+ENGINES = ('taat', 'wand', 'bmw', 'saat', 'boolean')
+START_METHOD = 'spawn'
+
+
+def config_name(config):
+    return (f"{config['engine']} codec={config['codec']} "
+            f"postings_cache={config['postings_cache_mb']}MB "
+            f"result_cache={'on' if config['result_cache'] else 'off'}")
+
+
+def make_configs(engines, codecs, postings_cache_mb, result_cache, output_dirs, index_name):
+    """Semua kombinasi engine x codec x PostingsCache x result cache."""
+    return [{"engine": engine, "codec": codec, "postings_cache_mb": cache_mb,
+             "result_cache": cached, "output_dir": output_dirs[codec], "index_name": index_name}
+            for codec in codecs for engine in engines for cache_mb in postings_cache_mb
+            for cached in result_cache]
+
+
+def transcode_index(index, codec, output_dir):
+    """
+    Menulis ulang index utama BSBIIndex dengan codec lain ke output_dir
+    (lexicon, skip table, lalu posisi, impact dan stem table disalin apa
+    adanya karena tidak bergantung pada codec).
+    """
+    from ..helpers import InvertedIndexWriter
+    from ..lexicon import write_lexicon
+    from ..skips import write_skips
+
+    state = index._load_segment_state(index.index_name, None)
+    try:
+        with InvertedIndexWriter(index.index_name, codec, directory=output_dir) as writer:
+            for term_id in state.reader.postings_dict:
+                writer.append(term_id, *state.reader.get_postings_list(term_id))
+        # write_lexicon hanya membaca ID yang ada di postings_dict dan doc_length
+        term_strs = {term_id: state.term_id_map[term_id] for term_id in writer.postings_dict}
+        doc_names = {doc_id: state.doc_id_map[doc_id] for doc_id in writer.doc_length}
+    finally:
+        state.close()
+    target = index.__class__(index.data_dir, output_dir, codec, index_name=index.index_name)
+    write_lexicon(target._output_path(f'{index.index_name}.lex'), writer.postings_dict, writer.terms,
+                  writer.doc_length, term_strs, doc_names, codec.name)
+    write_skips(target._output_path(f'{index.index_name}.skip'), writer.index_file_path,
+                writer.postings_dict, writer.doc_length, codec.name)
+    for name in (f'{index.index_name}.pos', f'{index.index_name}.imp', 'stem_table.dict'):
+        if os.path.exists(index._output_path(name)):
+            shutil.copyfile(index._output_path(name), target._output_path(name))
+
+
+def _engine(index, engine, k):
+    if engine in index.RETRIEVAL_METHODS:
+        return lambda query: index.retrieve_bm25(query, k = k, method = engine)
+    if engine == 'saat':
+        return lambda query: index.retrieve_impact(query, k = k)
+    if engine == 'boolean':
+        return lambda query: index.retrieve_boolean(query, k = k, mode = 'and')
+    raise ValueError(f"engine benchmark tidak dikenal: {engine}")
+
+
+def run_config(config, queries, k, repeat):
+    """
+    Menjalankan workload untuk satu konfigurasi (di proses pemanggil).
+    Satu putaran pemanasan, lalu repeat putaran yang diukur; result cache
+    dikosongkan setelah pemanasan sehingga hit hanya berasal dari query yang
+    berulang di workload. Untuk TaaT tanpa result cache, latency per stage
+    juga diukur (lihat meedle.benchmark.stages).
+    """
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    from ..cache import LRUCache
+    from ..compression import get_codec
+    from ..helpers import BSBIIndex
+
+    start = time.perf_counter()
+    index = BSBIIndex(data_dir = 'collection', output_dir = config['output_dir'],
+                      postings_encoding = get_codec(config['codec']),
+                      index_name = config['index_name'],
+                      result_cache = LRUCache(max_entries = len(queries)) if config['result_cache'] else None,
+                      postings_cache_bytes = config['postings_cache_mb'] * 1024 * 1024).open()
+    open_seconds = time.perf_counter() - start
+    try:
+        run = _engine(index, config['engine'], k)
+        for query in queries:
+            run(query)
+        if index.result_cache is not None:
+            index.result_cache.clear()
+
+        latencies = []
+        wall = time.perf_counter()
+        for _ in range(repeat):
+            for query in queries:
+                start = time.perf_counter()
+                run(query)
+                latencies.append(time.perf_counter() - start)
+        wall = time.perf_counter() - wall
+
+        result = {"name": config_name(config),
+                  "config": {key: value for key, value in config.items() if key != 'output_dir'},
+                  "open_ms": open_seconds * 1e3,
+                  "latency": summarize(latencies),
+                  "throughput_qps": len(latencies) / wall if wall > 0 else None}
+
+        if config['engine'] == 'taat' and not config['result_cache']:
+            state = index.state
+            stages = {stage: [] for stage in STAGES}
+            for query in queries:
+                staged, timings = staged_taat(index, state, query, k)
+                expected = index._score(state, index.preprocess_query(query), k, 2, 0.75, 'taat')
+                if staged != expected:
+                    raise RuntimeError(f"staged_taat berbeda dengan BSBIIndex._score untuk query {query!r}")
+                for stage, seconds in timings.items():
+                    stages[stage].append(seconds)
+            result["stages"] = {stage: summarize(seconds) for stage, seconds in stages.items()}
+    finally:
+        index.close()
+    result["peak_rss_bytes"] = peak_rss_bytes()
+    return result
+
+
+def run_configs(configs, queries, k, repeat, progress=None):
+    """run_config untuk setiap konfigurasi, masing-masing di proses baru."""
+    context = multiprocessing.get_context(START_METHOD)
+    results = []
+    for config in configs:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            result = executor.submit(run_config, config, queries, k, repeat).result()
+        if progress is not None:
+            progress(result)
+        results.append(result)
+    return results
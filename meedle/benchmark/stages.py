@@ -0,0 +1,107 @@
+"""
+Latency per stage untuk TaaT.
+
+staged_taat menjalankan algoritma yang sama dengan
+BSBIIndex._retrieve_taat (atau _retrieve_taat_numpy jika use_numpy) di atas
+IndexState yang sama, tetapi mencatat waktu setiap stage:
+
+    analysis : preprocessing query (tokenisasi, stopwords, stemming)
+    lookup   : term -> termID dan cek postings_dict (lexicon)
+    decode   : membaca dan men-decode postings (lewat PostingsCache jika ada)
+    scoring  : akumulasi skor BM25
+    topk     : memilih top-K dan me-resolve nama dokumen
+    json     : serialisasi response seperti /search_query
+
+Runner membandingkan hasilnya dengan BSBIIndex._score, sehingga pengukuran
+ini tidak diam-diam berbeda dari engine yang sebenarnya.
+"""
+from array import array
+import heapq
+import json
+import time
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+STAGES = ('analysis', 'lookup', 'decode', 'scoring', 'topk', 'json')
+
+
+def staged_taat(index, state, query, k, k1=2, b=0.75):
+    """
+    Returns
+    -------
+    (List[(float, str)], dict)
+        Top-K (sama seperti retrieve_bm25 method 'taat') dan stage -> detik.
+    """
+    clock = time.perf_counter
+    timings = {}
+    start = clock()
+
+    filtered = index.preprocess_query(query)
+    now = clock()
+    timings['analysis'], start = now - start, now
+
+    postings_dict = state.reader.postings_dict
+    terms = []
+    for term in filtered:
+        term_id = state.term_id_map.get(term)
+        if term_id in postings_dict:
+            terms.append((term, term_id))
+    now = clock()
+    timings['lookup'], start = now - start, now
+
+    use_numpy = index.use_numpy
+    if use_numpy:
+        lists = [state.reader.get_postings_arrays(term_id) for _, term_id in terms]
+    else:
+        lists = [state.reader.get_postings_list(term_id) for _, term_id in terms]
+    now = clock()
+    timings['decode'], start = now - start, now
+
+    if use_numpy:
+        norms = state.length_norm(k1, b, use_numpy=True)
+        accumulator = np.zeros(state.doc_id_bound)
+        seen = np.zeros(state.doc_id_bound, dtype=bool)
+        for (term, term_id), (postings, tfs) in zip(terms, lists):
+            wtq = state.idf(term, term_id)
+            accumulator[postings] += wtq * (((k1 + 1) * tfs) / (norms[postings] + tfs))
+            seen[postings] = True
+    else:
+        norms = state.length_norm(k1, b)
+        accumulator = array('d', bytes(8 * state.doc_id_bound))
+        seen = bytearray(state.doc_id_bound)
+        candidates = []
+        for (term, term_id), (postings_list, tf_list) in zip(terms, lists):
+            wtq = state.idf(term, term_id)
+            for doc_id, tf in zip(postings_list, tf_list):
+                accumulator[doc_id] += wtq * (((k1 + 1) * tf) / (norms[doc_id] + tf))
+                if not seen[doc_id]:
+                    seen[doc_id] = 1
+                    candidates.append(doc_id)
+    now = clock()
+    timings['scoring'], start = now - start, now
+
+    if use_numpy:
+        candidates = np.flatnonzero(seen)
+        scores = accumulator[candidates]
+        if k < len(candidates):
+            kth_score = np.partition(scores, len(scores) - k)[len(scores) - k]
+            keep = scores >= kth_score
+            candidates = candidates[keep]
+            scores = scores[keep]
+        order = np.lexsort((candidates, -scores))[:k]
+        result = [(float(scores[i]), state.doc_id_map[int(candidates[i])]) for i in order]
+    else:
+        top_k = heapq.nlargest(k, candidates, key=lambda d: (accumulator[d], -d))
+        result = [(accumulator[doc_id], state.doc_id_map[doc_id]) for doc_id in top_k]
+    now = clock()
+    timings['topk'], start = now - start, now
+
+    docs = [doc for _, doc in result]
+    json.dumps({"query": query, "k": k, "retrieved": len(docs), "docs_id": docs}, cls=DjangoJSONEncoder)
+    timings['json'] = clock() - start
+    return result, timings
@@ -0,0 +1,66 @@
+"""Ringkasan latency dan perbandingan hasil benchmark."""
+import sys
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+PERCENTILES = (0.5, 0.95, 0.99)
+
+
+def percentile(values, q):
+    """Nilai ke-q (0..1) dari values dengan metode nearest-rank."""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def summarize(seconds):
+    """Ringkasan latency (dalam detik) sebagai mikrodetik: n, mean, p50, p95, p99, max."""
+    if not seconds:
+        return {"n": 0}
+    micros = [s * 1e6 for s in seconds]
+    summary = {"n": len(micros), "mean": sum(micros) / len(micros)}
+    for q in PERCENTILES:
+        summary[f"p{round(q * 100)}"] = percentile(micros, q)
+    summary["max"] = max(micros)
+    return summary
+
+
+def peak_rss_bytes():
+    """Peak resident set size proses ini, atau None jika tidak tersedia (misal Windows)."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss dalam kilobytes di Linux, tetapi bytes di macOS
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def _latency_rows(report):
+    """(nama, ringkasan latency) untuk setiap konfigurasi dan endpoint di sebuah hasil."""
+    for result in report.get("configs", []):
+        yield result["name"], result["latency"]
+    for name, result in report.get("endpoints", {}).items():
+        yield f"endpoint {name}", result["latency"]
+
+
+def compare(report, baseline, metrics=("p50", "p95", "p99")):
+    """
+    Perubahan relatif latency report terhadap baseline untuk setiap
+    konfigurasi/endpoint yang ada di keduanya.
+
+    Returns
+    -------
+    List[(str, str, float, float, float)]
+        (nama, metric, baseline, sekarang, rasio sekarang / baseline)
+    """
+    before = dict(_latency_rows(baseline))
+    rows = []
+    for name, latency in _latency_rows(report):
+        if name not in before:
+            continue
+        for metric in metrics:
+            old, new = before[name].get(metric), latency.get(metric)
+            if old and new is not None:
+                rows.append((name, metric, old, new, new / old))
+    return rows
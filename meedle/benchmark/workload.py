@@ -0,0 +1,76 @@
+"""
+Workload query sintetis dari vocabulary index.
+
+Setiap query adalah string berisi term vocabulary yang hasil analyze-nya
+adalah dirinya sendiri, sehingga query benar-benar mencari term yang
+dipilih. Profil menentukan banyaknya term per query dan kelas DF-nya:
+
+    'rare'   : DF di setengah bawah vocabulary (tetapi DF >= 2)
+    'common' : 5% term dengan DF terbesar
+    'any'    : semua term, dipilih dengan peluang sebanding DF (seperti
+               query log, term yang umum lebih sering muncul)
+
+Dengan zipf=s, workload berisi n query yang diambil dari kumpulan n / 4
+query unik dengan frekuensi Zipf (peluang query ke-r sebanding 1 / r^s),
+sehingga ada pengulangan seperti pada trafik sebenarnya (untuk mengukur
+cache).
+"""
+import random
+
+# nama -> (banyaknya term minimum, maksimum, kelas DF)
+PROFILES = {
+    'short-rare': (1, 2, 'rare'),
+    'short-common': (1, 2, 'common'),
+    'long-rare': (5, 8, 'rare'),
+    'long-common': (5, 8, 'common'),
+    'mixed': (1, 8, 'any'),
+}
+
+
+def vocabulary(state, analyzer):
+    """List of (term, DF) terurut menurut DF lalu term, hanya term yang analyze(term) == [term]."""
+    postings_dict = state.reader.postings_dict
+    term_id_map = state.term_id_map
+    terms = []
+    for term_id in postings_dict:
+        term = term_id_map[term_id]
+        if analyzer.analyze(term) == [term]:
+            terms.append((postings_dict[term_id][1], term))
+    return [(term, df) for df, term in sorted(terms)]
+
+
+def _term_pool(terms, df_class):
+    """(list term, bobot atau None) untuk kelas DF."""
+    if df_class == 'rare':
+        pool = [term for term, df in terms[:len(terms) // 2] if df >= 2]
+        return pool or [term for term, _ in terms], None
+    if df_class == 'common':
+        return [term for term, _ in terms[-max(1, len(terms) // 20):]], None
+    return [term for term, _ in terms], [df for _, df in terms]
+
+
+def generate_workload(state, analyzer, profile='mixed', n=200, seed=0, zipf=None):
+    """
+    n query string untuk profil tertentu (lihat PROFILES), deterministik
+    untuk seed yang sama dan index yang sama.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"profil workload tidak dikenal: {profile}")
+    min_terms, max_terms, df_class = PROFILES[profile]
+    rng = random.Random(seed)
+    pool, weights = _term_pool(vocabulary(state, analyzer), df_class)
+
+    def make_query():
+        size = min(rng.randint(min_terms, max_terms), len(pool))
+        query = []
+        while len(query) < size:
+            term = rng.choices(pool, weights)[0] if weights else rng.choice(pool)
+            if term not in query:
+                query.append(term)
+        return ' '.join(query)
+
+    if zipf is None:
+        return [make_query() for _ in range(n)]
+    unique = [make_query() for _ in range(max(1, n // 4))]
+    frequencies = [1 / (rank ** zipf) for rank in range(1, len(unique) + 1)]
+    return rng.choices(unique, frequencies, k=n)
@@ -0,0 +1,241 @@
+"""
+Boolean query (AND, OR, NOT) di atas cursor postings.
+
+Sintaks query:
+
+    cancer AND (lung OR breast) NOT smoking
+    cancer -smoking "radioactive iodoacetate"
+
+Operator AND, OR dan NOT ditulis dengan huruf besar; -term sama dengan
+NOT term, tanda kurung mengelompokkan, dan teks di dalam tanda kutip adalah
+phrase. Term yang ditulis berurutan tanpa operator digabung dengan operator
+default (AND atau OR, lihat parse_boolean). Prioritas operator dari yang
+paling kuat: NOT, AND, OR.
+
+Hasil parse berupa tuple bersarang (hashable, sehingga bisa menjadi key
+cache):
+
+    ('term', term)
+    ('phrase', (term, ...))
+    ('not', node)
+    ('and', (node, ...))
+    ('or', (node, ...))
+"""
+import bisect
+import heapq
+import math
+import re
+
+TOKEN_RE = re.compile(r'"[^"]*"|[()]|[^\s()"]+')
+
+
+def parse_boolean(text, analyzer, default_operator='and'):
+    """
+    Parse query boolean. Setiap kata di-analyze seperti query biasa; kata
+    yang hilang (misal stopwords) diabaikan beserta operatornya.
+
+    Returns
+    -------
+    tuple atau None
+        Node query, atau None jika tidak ada term yang tersisa.
+    """
+    if default_operator not in ('and', 'or'):
+        raise ValueError(f"operator default tidak dikenal: {default_operator}")
+    tokens = TOKEN_RE.findall(text)
+    pos = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else None
+
+    def starts_operand(token):
+        return token is not None and token not in ('AND', 'OR', ')')
+
+    def combine(op, nodes):
+        nodes = [node for node in nodes if node is not None]
+        if len(nodes) <= 1:
+            return nodes[0] if nodes else None
+        return (op, tuple(nodes))
+
+    def parse_or():
+        nonlocal pos
+        nodes = [parse_and()]
+        while peek() == 'OR' or (default_operator == 'or' and starts_operand(peek())):
+            if peek() == 'OR':
+                pos += 1
+            nodes.append(parse_and())
+        return combine('or', nodes)
+
+    def parse_and():
+        nonlocal pos
+        nodes = [parse_unary()]
+        while peek() == 'AND' or (default_operator == 'and' and starts_operand(peek())):
+            if peek() == 'AND':
+                pos += 1
+            nodes.append(parse_unary())
+        return combine('and', nodes)
+
+    def parse_unary():
+        nonlocal pos
+        token = peek()
+        if token is None or token in ('AND', 'OR', ')'):
+            # operand kosong, misal "cancer AND" atau "()"
+            return None
+        pos += 1
+        if token == 'NOT' or token.startswith('-'):
+            if token not in ('NOT', '-'):
+                # -term: sisa token diproses sebagai operand biasa
+                pos -= 1
+                tokens[pos] = token[1:]
+            node = parse_unary()
+            return ('not', node) if node is not None else None
+        if token == '(':
+            node = parse_or()
+            if peek() == ')':
+                pos += 1
+            return node
+        if token.startswith('"'):
+            terms = tuple(analyzer.analyze(token.strip('"')))
+            if len(terms) > 1:
+                return ('phrase', terms)
+            return ('term', terms[0]) if terms else None
+        return combine('and', [('term', term) for term in analyzer.analyze(token)])
+
+    node = parse_or()
+    # ")" yang tidak berpasangan diabaikan; sisa query setelahnya digabung
+    # dengan operator default agar tidak ada term yang hilang diam-diam
+    while pos < len(tokens):
+        pos += 1
+        node = combine(default_operator, [node, parse_or()])
+    return node
+
+
+def positive_terms(node):
+    """Term-term (sesuai urutan di query) yang tidak berada di bawah NOT."""
+    if node is None:
+        return []
+    kind = node[0]
+    if kind == 'term':
+        return [node[1]]
+    if kind == 'phrase':
+        return list(node[1])
+    if kind == 'not':
+        return []
+    return [term for child in node[1] for term in positive_terms(child)]
+
+
+class ListCursor:
+    """Cursor dengan interface BlockPostingsCursor di atas list docID terurut."""
+    def __init__(self, docs):
+        self.docs = docs
+        self.df = len(docs)
+        self.pos = 0
+
+    def doc(self):
+        if self.pos < len(self.docs):
+            return self.docs[self.pos]
+        return math.inf
+
+    def next(self):
+        self.pos += 1
+
+    def advance(self, target):
+        self.pos = bisect.bisect_left(self.docs, target, self.pos)
+
+
+class BooleanEvaluator:
+    """
+    Menghitung docID (terurut) yang memenuhi sebuah node query.
+
+    Irisan (AND) dihitung dengan leapfrog: cursor ber-df terkecil memimpin,
+    dan cursor lainnya di-advance ke docID kandidat, sehingga dengan skip
+    table blok-blok yang tidak memuat kandidat tidak di-decode. NOT di dalam
+    AND dicek dengan advance cursor term yang di-negasi ke setiap kandidat.
+
+    Parameters
+    ----------
+    cursor_for: callable term -> cursor (BlockPostingsCursor) atau None
+                jika term tidak ada di index. Dipanggil sekali per operand.
+    universe: callable yang mengembalikan list semua docID terurut; hanya
+                dipanggil untuk NOT yang tidak berada di dalam AND.
+    phrase_filter: callable (phrase, docID) -> bool, atau None jika phrase
+                diperlakukan sebagai AND dari term-term-nya.
+    """
+    def __init__(self, cursor_for, universe, phrase_filter=None):
+        self.cursor_for = cursor_for
+        self.universe = universe
+        self.phrase_filter = phrase_filter
+
+    def evaluate(self, node):
+        if node is None:
+            return []
+        kind = node[0]
+        if kind == 'term':
+            return self._drain(self._cursor(node))
+        if kind == 'phrase':
+            docs = self._conjunction([('term', term) for term in node[1]])
+            if self.phrase_filter is not None:
+                docs = [doc for doc in docs if self.phrase_filter(node[1], doc)]
+            return docs
+        if kind == 'not':
+            return self._complement(self.evaluate(node[1]))
+        if kind == 'and':
+            return self._conjunction(node[1])
+        union = []
+        for doc in heapq.merge(*(self.evaluate(child) for child in node[1])):
+            if not union or union[-1] != doc:
+                union.append(doc)
+        return union
+
+    def _cursor(self, node):
+        """Cursor untuk sebuah operand (None berarti tidak ada dokumen)."""
+        if node[0] == 'term':
+            return self.cursor_for(node[1])
+        return ListCursor(self.evaluate(node))
+
+    @staticmethod
+    def _drain(cursor):
+        docs = []
+        if cursor is None:
+            return docs
+        doc = cursor.doc()
+        while doc != math.inf:
+            docs.append(doc)
+            cursor.next()
+            doc = cursor.doc()
+        return docs
+
+    def _complement(self, docs):
+        excluded = set(docs)
+        return [doc for doc in self.universe() if doc not in excluded]
+
+    def _conjunction(self, children):
+        positives = [child for child in children if child[0] != 'not']
+        negatives = [child[1] for child in children if child[0] == 'not']
+        if positives:
+            cursors = [self._cursor(child) for child in positives]
+            if any(cursor is None for cursor in cursors):
+                return []
+        else:
+            cursors = [ListCursor(self.universe())]
+        cursors.sort(key=lambda cursor: cursor.df)
+        excluded = [cursor for cursor in map(self._cursor, negatives) if cursor is not None]
+
+        lead, others = cursors[0], cursors[1:]
+        result = []
+        doc = lead.doc()
+        while doc != math.inf:
+            for cursor in others:
+                cursor.advance(doc)
+                if cursor.doc() != doc:
+                    lead.advance(cursor.doc())
+                    break
+            else:
+                for cursor in excluded:
+                    cursor.advance(doc)
+                    if cursor.doc() == doc:
+                        break
+                else:
+                    result.append(doc)
+                lead.next()
+            doc = lead.doc()
+        return result
@@ -0,0 +1,268 @@
+"""
+Cache untuk hasil query dan komponen-komponen search engine lainnya.
+
+Semua cache di sini thread-safe dan mencatat hits/misses lewat stats()
+supaya ukurannya bisa di-tuning.
+"""
+from collections import OrderedDict
+import hashlib
+import sys
+import threading
+import time
+
+from django.core.cache import caches
+
+
+class LRUCache:
+    """
+    Cache in-process dengan eviction LRU dan TTL opsional.
+
+    Parameters
+    ----------
+    max_entries(int): jumlah entry maksimum sebelum entry yang paling lama
+                    tidak dipakai dibuang.
+    ttl(float): umur maksimum entry dalam detik; None berarti tidak pernah
+                    kedaluwarsa.
+    """
+    def __init__(self, max_entries=1024, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Mengembalikan value untuk key, atau None jika tidak ada/kedaluwarsa."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        with self.lock:
+            self.entries[key] = (expires_at, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def stats(self):
+        return {
+            "backend": "local",
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class DjangoCache:
+    """
+    Cache di atas Django's cache framework (locmem, file-based, memcached,
+    redis, dsb. sesuai settings.CACHES[alias]), sehingga hasil query bisa
+    dibagi antar worker. Key di-hash menjadi string agar valid untuk semua
+    backend; eviction dan batas memori diatur oleh backend-nya.
+    """
+    def __init__(self, alias='default', ttl=None, prefix='meedle'):
+        self.alias = alias
+        self.ttl = ttl
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key):
+        return f"{self.prefix}:{hashlib.sha1(repr(key).encode('utf-8')).hexdigest()}"
+
+    def get(self, key):
+        value = caches[self.alias].get(self._key(key))
+        with self.lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value):
+        caches[self.alias].set(self._key(key), value, timeout=self.ttl)
+
+    def clear(self):
+        caches[self.alias].clear()
+
+    def stats(self):
+        return {
+            "backend": "django",
+            "alias": self.alias,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def create_cache(config):
+    """
+    Membuat cache dari dictionary konfigurasi (lihat MEEDLE_RESULT_CACHE di
+    settings). Mengembalikan None jika config kosong atau BACKEND None.
+    """
+    if not config or config.get('BACKEND') is None:
+        return None
+    backend = config['BACKEND']
+    if backend == 'local':
+        return LRUCache(max_entries=config.get('MAX_ENTRIES', 1024), ttl=config.get('TTL'))
+    if backend == 'django':
+        return DjangoCache(alias=config.get('ALIAS', 'default'), ttl=config.get('TTL'))
+    raise ValueError(f"backend cache tidak dikenal: {backend}")
+
+
+class FrequencySketch:
+    """
+    Count-Min Sketch (counter maksimum 15) untuk memperkirakan frekuensi
+    akses sebuah key (dipakai oleh admission policy TinyLFU). Setelah
+    sample_size kali
+    increment, semua counter dibagi dua agar key yang dulu populer tetapi
+    sekarang jarang dipakai perlahan "dilupakan".
+    """
+    DEPTH = 4
+    MAX_COUNT = 15
+
+    def __init__(self, width=4096, sample_size=None):
+        # width dibulatkan ke pangkat dua agar indeks cukup di-mask
+        self.width = 1 << max(4, (width - 1).bit_length())
+        self.mask = self.width - 1
+        self.table = bytearray(self.width * self.DEPTH)
+        self.sample_size = sample_size or 10 * self.width
+        self.additions = 0
+
+    def _indexes(self, key):
+        h = hash(key)
+        for row in range(self.DEPTH):
+            h = hash((h, row))
+            yield row * self.width + (h & self.mask)
+
+    def increment(self, key):
+        table = self.table
+        for i in self._indexes(key):
+            if table[i] < self.MAX_COUNT:
+                table[i] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self.table = bytearray(count >> 1 for count in table)
+            self.additions //= 2
+
+    def estimate(self, key):
+        table = self.table
+        return min(table[i] for i in self._indexes(key))
+
+
+class PostingsCache:
+    """
+    Cache postings list hasil decoding yang dibatasi total ukuran (bytes).
+
+    Eviction memakai LRU, tetapi dengan admission policy TinyLFU: saat cache
+    penuh, entry baru hanya masuk jika perkiraan frekuensi aksesnya lebih
+    besar dari semua entry LRU yang harus dibuang untuk memberinya tempat.
+    Dengan begitu term yang sering muncul di query ("patient", "cell", ...)
+    tidak tergeser oleh term langka yang hanya muncul sekali.
+
+    Value yang disimpan dipakai bersama oleh banyak query dan thread, jadi
+    pemanggil TIDAK BOLEH memodifikasinya.
+    """
+    def __init__(self, max_bytes, sketch_width=4096):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.entries = OrderedDict()    # key -> (value, size)
+        self.sketch = FrequencySketch(sketch_width)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejections = 0
+
+    def get(self, key):
+        with self.lock:
+            self.sketch.increment(key)
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def __contains__(self, key):
+        """True jika key ada di cache, tanpa mengubah statistik dan urutan LRU."""
+        return key in self.entries
+
+    def put(self, key, value, size, force=False):
+        """
+        Menyimpan value berukuran size bytes. Mengembalikan False jika value
+        ditolak oleh admission policy (force=True melewati policy, misalnya
+        untuk pre-warming).
+        """
+        if size > self.max_bytes:
+            return False
+        with self.lock:
+            if key in self.entries:
+                return True
+            victims = []
+            free = self.max_bytes - self.current_bytes
+            for victim in self.entries:
+                if free >= size:
+                    break
+                victims.append(victim)
+                free += self.entries[victim][1]
+            if victims and not force:
+                frequency = self.sketch.estimate(key)
+                if any(self.sketch.estimate(victim) >= frequency for victim in victims):
+                    self.rejections += 1
+                    return False
+            for victim in victims:
+                self.current_bytes -= self.entries.pop(victim)[1]
+                self.evictions += 1
+            self.entries[key] = (value, size)
+            self.current_bytes += size
+            return True
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "rejections": self.rejections,
+        }
+
+
+def postings_size(postings, tfs):
+    """Perkiraan ukuran memori (bytes) pasangan postings list dan list of TF."""
+    if hasattr(postings, 'nbytes'):
+        return postings.nbytes + tfs.nbytes + 200
+    # getsizeof(list) sudah termasuk pointer; setiap int python ~28 bytes
+    return sys.getsizeof(postings) + sys.getsizeof(tfs) + 28 * (len(postings) + len(tfs))
@@ -0,0 +1,487 @@
+"""
+Codec untuk meng-encode postings list (docIDs) dan list of TF ke bytes.
+
+Setiap codec adalah class dengan static method encode, decode, encode_tf,
+decode_tf, serta decode_array dan decode_tf_array (hasil numpy array int64),
+dan atribut name yang unik. Codec didaftarkan ke registry dengan
+register_codec; nama codec yang dipakai saat build ditulis ke metadata index
+(file .dict dan lexicon .lex), sehingga reader selalu memakai codec yang sama
+dengan writer-nya (lihat get_codec).
+
+Codec yang tersedia:
+
+    vbe       : VBEPostings, gap + variable-byte encoding
+    bitpack   : BitPackingPostings, gap + bit packing per blok ala PForDelta
+    eliasfano : EliasFanoPostings, Elias-Fano untuk docIDs (TF dengan bitpack)
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .lexicon import _decode_varint, _encode_varint
+
+CODECS = {}
+
+
+def register_codec(codec):
+    """Mendaftarkan codec (bisa dipakai sebagai decorator class)."""
+    CODECS[codec.name] = codec
+    return codec
+
+
+def get_codec(name):
+    """Codec yang terdaftar dengan nama name."""
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(f"codec postings tidak dikenal: {name}") from None
+
+
+def _gaps(postings_list):
+    return [doc_id - previous for previous, doc_id in zip([0] + postings_list[:-1], postings_list)]
+
+
+def _prefix_sum(numbers):
+    total = 0
+    result = []
+    for number in numbers:
+        total += number
+        result.append(total)
+    return result
+
+
+def _pack_bits(values, width):
+    """
+    Menyimpan setiap nilai dengan width bit, berurutan mulai dari bit
+    terendah byte pertama (little-endian).
+    """
+    packed = 0
+    for i, value in enumerate(values):
+        packed |= value << (i * width)
+    return packed.to_bytes((len(values) * width + 7) // 8, 'little')
+
+
+def _unpack_bits(data, count, width):
+    if width == 0:
+        return [0] * count
+    packed = int.from_bytes(data, 'little')
+    mask = (1 << width) - 1
+    return [(packed >> (i * width)) & mask for i in range(count)]
+
+
+def _unpack_bits_array(data, count, width):
+    """Seperti _unpack_bits, tetapi tervektorisasi dengan NumPy."""
+    if width == 0:
+        return np.zeros(count, dtype=np.int64)
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), bitorder='little')
+    bits = bits[:count * width].reshape(count, width).astype(np.int64)
+    return bits @ (np.int64(1) << np.arange(width, dtype=np.int64))
+
+
+@register_codec
+class VBEPostings:
+    """ 
+    Berbeda dengan StandardPostings, dimana untuk suatu postings list,
+    yang disimpan di disk adalah sequence of integers asli dari postings
+    list tersebut apa adanya.
+
+    Pada VBEPostings, kali ini, yang disimpan adalah gap-nya, kecuali
+    posting yang pertama. Barulah setelah itu di-encode dengan Variable-Byte
+    Enconding algorithm ke bytestream.
+
+    Contoh:
+    postings list [34, 67, 89, 454] akan diubah dulu menjadi gap-based,
+    yaitu [34, 33, 22, 365]. Barulah setelah itu di-encode dengan algoritma
+    compression Variable-Byte Encoding, dan kemudian diubah ke bytesream.
+
+    ASUMSI: postings_list untuk sebuah term MUAT di memori!
+
+    """
+    name = 'vbe'
+
+    @staticmethod
+    def vb_encode_number(number):
+        """
+        Encodes a number using Variable-Byte Encoding
+        Lihat buku teks kita!
+        """
+        bytes_ = []
+        while True:
+            bytes_.insert(0, number % 128)
+            if number < 128:
+                break
+            number = number // 128
+        bytes_[-1] += 128
+        return bytes(bytes_)
+
+    @staticmethod
+    def vb_encode(list_of_numbers):
+        """
+        Melakukan encoding (tentunya dengan compression) terhadap
+        list of numbers, dengan Variable-Byte Encoding
+        """
+        return b''.join(VBEPostings.vb_encode_number(number) for number in list_of_numbers)
+
+    @staticmethod
+    def encode(postings_list):
+        """
+        Encode postings_list menjadi stream of bytes (dengan Variable-Byte
+        Encoding). JANGAN LUPA diubah dulu ke gap-based list, sebelum
+        di-encode dan diubah ke bytearray.
+
+        Parameters
+        ----------
+        postings_list: List[int]
+            List of docIDs (postings)
+
+        Returns
+        -------
+        bytes
+            bytearray yang merepresentasikan urutan integer di postings_list
+        """
+        gap_postings_list = [postings_list[0]] if postings_list else []
+        for i in range(1, len(postings_list)):
+            gap_postings_list.append(postings_list[i] - postings_list[i-1])
+        return VBEPostings.vb_encode(gap_postings_list)
+
+    @staticmethod
+    def encode_tf(tf_list):
+        """
+        Encode list of term frequencies menjadi stream of bytes
+
+        Parameters
+        ----------
+        tf_list: List[int]
+            List of term frequencies
+
+        Returns
+        -------
+        bytes
+            bytearray yang merepresentasikan nilai raw TF kemunculan term di setiap
+            dokumen pada list of postings
+        """
+        return VBEPostings.vb_encode(tf_list)
+
+    @staticmethod
+    def vb_decode(encoded_bytestream):
+        """
+        Decoding sebuah bytestream yang sebelumnya di-encode dengan
+        variable-byte encoding.
+        """
+        # TODO
+        # slide 5 - page 36
+        numbers = []
+        n = 0
+        for i in range(len(encoded_bytestream)):
+            byte = encoded_bytestream[i]
+            if byte < 128:
+                n = 128*n + byte
+            else:
+                n = 128*n + byte-128
+                numbers.append(n)
+                n = 0
+        return numbers
+
+    # Di bawah ukuran ini (dalam bytes) loop python masih lebih cepat daripada
+    # overhead tetap pemanggilan NumPy (lihat: manage.py benchmark_decode)
+    NUMPY_DECODE_THRESHOLD = 192
+
+    @staticmethod
+    def vb_decode_array(encoded_bytestream):
+        """
+        Versi tervektorisasi dari vb_decode yang mengembalikan numpy array
+        int64. encoded_bytestream boleh berupa bytes, bytearray, atau
+        memoryview; datanya dibaca langsung tanpa di-copy.
+
+        Byte terakhir setiap angka ditandai bit tertinggi (>= 128), sehingga
+        posisi akhir setiap angka didapat dengan np.flatnonzero. Setiap byte
+        kemudian digeser 7 * (jarak ke byte terakhir angkanya), lalu byte-byte
+        milik angka yang sama dijumlahkan dengan np.add.reduceat.
+        """
+        data = np.frombuffer(encoded_bytestream, dtype=np.uint8)
+        ends = np.flatnonzero(data >= 128)
+        if len(ends) == 0:
+            return np.zeros(0, dtype=np.int64)
+        if len(ends) == len(data):
+            # semua angka muat dalam satu byte
+            return (data & 127).astype(np.int64)
+        # byte sisa tanpa terminator diabaikan, sama seperti vb_decode
+        data = data[:ends[-1] + 1]
+        starts = np.empty_like(ends)
+        starts[0] = 0
+        starts[1:] = ends[:-1] + 1
+        last_byte = np.repeat(ends, ends - starts + 1)
+        shifts = 7 * (last_byte - np.arange(len(data)))
+        values = (data & 127).astype(np.int64) << shifts
+        return np.add.reduceat(values, starts)
+
+    @staticmethod
+    def decode_array(encoded_postings_list):
+        """Seperti decode, tetapi mengembalikan numpy array int64 docIDs."""
+        if len(encoded_postings_list) <= VBEPostings.NUMPY_DECODE_THRESHOLD:
+            return np.array(VBEPostings.decode(encoded_postings_list), dtype=np.int64)
+        return np.cumsum(VBEPostings.vb_decode_array(encoded_postings_list))
+
+    @staticmethod
+    def decode_tf_array(encoded_tf_list):
+        """Seperti decode_tf, tetapi mengembalikan numpy array int64."""
+        if len(encoded_tf_list) <= VBEPostings.NUMPY_DECODE_THRESHOLD:
+            return np.array(VBEPostings.vb_decode(encoded_tf_list), dtype=np.int64)
+        return VBEPostings.vb_decode_array(encoded_tf_list)
+
+    @staticmethod
+    def decode(encoded_postings_list):
+        """
+        Decodes postings_list dari sebuah stream of bytes. JANGAN LUPA
+        bytestream yang di-decode dari encoded_postings_list masih berupa
+        gap-based list.
+
+        Parameters
+        ----------
+        encoded_postings_list: bytes
+            bytearray merepresentasikan encoded postings list sebagai keluaran
+            dari static method encode di atas.
+
+        Returns
+        -------
+        List[int]
+            list of docIDs yang merupakan hasil decoding dari encoded_postings_list
+        """
+        # TODO
+        # ref: https://notebooks.githubusercontent.com/view/ipynb?azure_maps_enabled=true&browser=chrome&color_mode=auto&commit=4912ce487c4562da6b73447366a5fd421df7ac07&device=unknown&enc_url=68747470733a2f2f7261772e67697468756275736572636f6e74656e742e636f6d2f5a68656e67787572752f43533237362d7061312d736b656c65746f6e2d323031392f343931326365343837633435363264613662373334343733363661356664343231646637616330372f5041312d736b656c65746f6e2e6970796e62&logged_in=false&nwo=Zhengxuru%2FCS276-pa1-skeleton-2019&path=PA1-skeleton.ipynb&platform=android&repository_id=299051363&repository_type=Repository&version=103
+        if np is not None and len(encoded_postings_list) > VBEPostings.NUMPY_DECODE_THRESHOLD:
+            return VBEPostings.decode_array(encoded_postings_list).tolist()
+        numbers = VBEPostings.vb_decode(encoded_postings_list)
+        prefix_sum = 0
+        result = []
+        for num in numbers:
+            prefix_sum += num
+            result.append(prefix_sum)
+        return result
+
+    @staticmethod
+    def decode_tf(encoded_tf_list):
+        """
+        Decodes list of term frequencies dari sebuah stream of bytes
+
+        Parameters
+        ----------
+        encoded_tf_list: bytes
+            bytearray merepresentasikan encoded term frequencies list sebagai keluaran
+            dari static method encode_tf di atas.
+
+        Returns
+        -------
+        List[int]
+            List of term frequencies yang merupakan hasil decoding dari encoded_tf_list
+        """
+        if np is not None and len(encoded_tf_list) > VBEPostings.NUMPY_DECODE_THRESHOLD:
+            return VBEPostings.decode_tf_array(encoded_tf_list).tolist()
+        return VBEPostings.vb_decode(encoded_tf_list)
+
+
+
+@register_codec
+class BitPackingPostings:
+    """
+    Bit packing per blok BLOCK angka, ala PForDelta: setiap blok penuh memakai
+    satu lebar bit b untuk semua angkanya, dan angka yang tidak muat di b bit
+    (exception) menyimpan b bit terendahnya di slot tersebut, sedangkan sisa
+    bit atasnya disimpan terpisah. b dipilih per blok agar ukuran blok
+    (slot + exception) paling kecil, sehingga beberapa gap besar tidak
+    memperlebar semua slot di blok.
+
+    Layout: byte 0, banyaknya blok penuh (varint), lalu setiap blok berisi b
+    dan banyaknya exception (masing-masing 1 byte), slot b bit, serta untuk
+    setiap exception indeksnya di blok (1 byte) dan bit atasnya (varint).
+    Sisa angka yang tidak memenuhi satu blok (tail, seperti di Lucene)
+    di-encode dengan VBEPostings.vb_encode. List yang lebih pendek dari satu
+    blok, yaitu sebagian besar postings list, seluruhnya berupa tail tanpa
+    header; keduanya bisa dibedakan karena keluaran vb_encode tidak pernah
+    diawali byte 0. Postings di-encode sebagai gap seperti VBEPostings. Slot
+    satu blok di-decode sekaligus (NumPy: np.unpackbits).
+    """
+    name = 'bitpack'
+    BLOCK = 128
+    # di bawah ukuran ini (bytes) decode python lebih cepat daripada NumPy
+    NUMPY_DECODE_THRESHOLD = 256
+
+    @staticmethod
+    def _encode_block(values, out):
+        best = None
+        for width in range(max(values).bit_length() + 1):
+            exceptions = [(i, value >> width) for i, value in enumerate(values) if value >> width]
+            size = (len(values) * width + 7) // 8 + \
+                sum(1 + (high.bit_length() + 6) // 7 for _, high in exceptions)
+            if best is None or size < best[0]:
+                best = (size, width, exceptions)
+        _, width, exceptions = best
+        out += bytes([width, len(exceptions)])
+        mask = (1 << width) - 1
+        out += _pack_bits([value & mask for value in values], width)
+        for i, high in exceptions:
+            out.append(i)
+            _encode_varint(high, out)
+
+    @staticmethod
+    def _parse(encoded):
+        """
+        (blok, tail): blok berupa list of (b, slot, exceptions) untuk setiap
+        blok penuh, tail berupa bytes angka sisa (VBE).
+        """
+        if len(encoded) == 0 or encoded[0] != 0:
+            return [], encoded
+        n_blocks, pos = _decode_varint(encoded, 1)
+        size = BitPackingPostings.BLOCK
+        blocks = []
+        for _ in range(n_blocks):
+            width, n_exceptions = encoded[pos], encoded[pos + 1]
+            pos += 2
+            end = pos + (size * width + 7) // 8
+            slot = encoded[pos:end]
+            pos = end
+            exceptions = []
+            for _ in range(n_exceptions):
+                i = encoded[pos]
+                high, pos = _decode_varint(encoded, pos + 1)
+                exceptions.append((i, high))
+            blocks.append((width, slot, exceptions))
+        return blocks, encoded[pos:]
+
+    @staticmethod
+    def encode_numbers(numbers):
+        size = BitPackingPostings.BLOCK
+        if len(numbers) < size:
+            return VBEPostings.vb_encode(numbers)
+        out = bytearray([0])
+        _encode_varint(len(numbers) // size, out)
+        full = len(numbers) - len(numbers) % size
+        for start in range(0, full, size):
+            BitPackingPostings._encode_block(numbers[start:start + size], out)
+        out += VBEPostings.vb_encode(numbers[full:])
+        return bytes(out)
+
+    @staticmethod
+    def decode_numbers(encoded):
+        blocks, tail = BitPackingPostings._parse(encoded)
+        numbers = []
+        for width, slot, exceptions in blocks:
+            values = _unpack_bits(slot, BitPackingPostings.BLOCK, width)
+            for i, high in exceptions:
+                values[i] |= high << width
+            numbers += values
+        return numbers + VBEPostings.vb_decode(tail)
+
+    @staticmethod
+    def decode_numbers_array(encoded):
+        if len(encoded) <= BitPackingPostings.NUMPY_DECODE_THRESHOLD:
+            return np.array(BitPackingPostings.decode_numbers(encoded), dtype=np.int64)
+        blocks, tail = BitPackingPostings._parse(encoded)
+        arrays = []
+        for width, slot, exceptions in blocks:
+            values = _unpack_bits_array(slot, BitPackingPostings.BLOCK, width)
+            for i, high in exceptions:
+                values[i] |= high << width
+            arrays.append(values)
+        arrays.append(VBEPostings.vb_decode_array(tail))
+        return np.concatenate(arrays)
+
+    @staticmethod
+    def encode(postings_list):
+        return BitPackingPostings.encode_numbers(_gaps(list(postings_list)))
+
+    @staticmethod
+    def decode(encoded_postings_list):
+        if np is not None and len(encoded_postings_list) > BitPackingPostings.NUMPY_DECODE_THRESHOLD:
+            return BitPackingPostings.decode_array(encoded_postings_list).tolist()
+        return _prefix_sum(BitPackingPostings.decode_numbers(encoded_postings_list))
+
+    @staticmethod
+    def decode_array(encoded_postings_list):
+        return np.cumsum(BitPackingPostings.decode_numbers_array(encoded_postings_list))
+
+    @staticmethod
+    def encode_tf(tf_list):
+        return BitPackingPostings.encode_numbers(list(tf_list))
+
+    @staticmethod
+    def decode_tf(encoded_tf_list):
+        if np is not None and len(encoded_tf_list) > BitPackingPostings.NUMPY_DECODE_THRESHOLD:
+            return BitPackingPostings.decode_tf_array(encoded_tf_list).tolist()
+        return BitPackingPostings.decode_numbers(encoded_tf_list)
+
+    @staticmethod
+    def decode_tf_array(encoded_tf_list):
+        return BitPackingPostings.decode_numbers_array(encoded_tf_list)
+
+
+@register_codec
+class EliasFanoPostings:
+    """
+    Elias-Fano untuk postings list (docIDs terurut naik). Dengan n postings
+    dan docID terbesar u - 1, setiap docID dipecah menjadi l = floor(log2(u/n))
+    bit bawah yang disimpan apa adanya (bit packing) dan bit atas yang disimpan
+    sebagai bit vector unary: docID ke-i menyalakan bit (docID >> l) + i.
+    Ukurannya paling banyak 2 + log2(u/n) bit per posting, tanpa perlu gap.
+
+    Layout: n dan l (varint), bit bawah, lalu bit vector bit atas. List of TF
+    tidak terurut, jadi di-encode dengan BitPackingPostings.
+    """
+    name = 'eliasfano'
+    NUMPY_DECODE_THRESHOLD = 64
+
+    @staticmethod
+    def encode(postings_list):
+        n = len(postings_list)
+        if n == 0:
+            return b''
+        # u // n >= 1 karena docID unik dan tidak negatif
+        low_bits = ((postings_list[-1] + 1) // n).bit_length() - 1
+        out = bytearray()
+        _encode_varint(n, out)
+        _encode_varint(low_bits, out)
+        mask = (1 << low_bits) - 1
+        out += _pack_bits([doc_id & mask for doc_id in postings_list], low_bits)
+        upper = 0
+        for i, doc_id in enumerate(postings_list):
+            upper |= 1 << ((doc_id >> low_bits) + i)
+        out += upper.to_bytes(((postings_list[-1] >> low_bits) + n + 7) // 8, 'little')
+        return bytes(out)
+
+    @staticmethod
+    def _header(encoded):
+        n, pos = _decode_varint(encoded, 0)
+        low_bits, pos = _decode_varint(encoded, pos)
+        end = pos + (n * low_bits + 7) // 8
+        return n, low_bits, encoded[pos:end], encoded[end:]
+
+    @staticmethod
+    def decode(encoded_postings_list):
+        if len(encoded_postings_list) == 0:
+            return []
+        if np is not None and len(encoded_postings_list) > EliasFanoPostings.NUMPY_DECODE_THRESHOLD:
+            return EliasFanoPostings.decode_array(encoded_postings_list).tolist()
+        n, low_bits, lower, upper = EliasFanoPostings._header(encoded_postings_list)
+        lows = _unpack_bits(lower, n, low_bits)
+        postings_list = []
+        for byte_index, byte in enumerate(upper):
+            while byte:
+                lowest = byte & -byte
+                high = byte_index * 8 + lowest.bit_length() - 1 - len(postings_list)
+                postings_list.append((high << low_bits) | lows[len(postings_list)])
+                byte ^= lowest
+        return postings_list
+
+    @staticmethod
+    def decode_array(encoded_postings_list):
+        if len(encoded_postings_list) == 0:
+            return np.zeros(0, dtype=np.int64)
+        n, low_bits, lower, upper = EliasFanoPostings._header(encoded_postings_list)
+        bits = np.unpackbits(np.frombuffer(upper, dtype=np.uint8), bitorder='little')
+        highs = np.flatnonzero(bits)[:n].astype(np.int64) - np.arange(n, dtype=np.int64)
+        return (highs << low_bits) | _unpack_bits_array(lower, n, low_bits)
+
+    encode_tf = staticmethod(BitPackingPostings.encode_tf)
+    decode_tf = staticmethod(BitPackingPostings.decode_tf)
+    decode_tf_array = staticmethod(BitPackingPostings.decode_tf_array)
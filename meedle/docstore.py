@@ -0,0 +1,337 @@
+"""
+Document store: seluruh dokumen collection dalam satu file.
+
+Alih-alih membuka satu file teks per dokumen untuk setiap request get_docs,
+isi semua dokumen (sudah di-preprocess seperti yang dikirim ke client)
+disimpan berurutan di satu file dengan tabel offset, dikompresi per blok
+(beberapa dokumen sekaligus) dengan zlib. Snippet (300 karakter pertama)
+dihitung saat build dan disimpan tanpa kompresi, sehingga request dengan
+truncate tidak perlu decompress apa pun. File cukup di-mmap sekali.
+
+Untuk snippet yang bergantung pada query (lihat meedle.snippets), store
+juga berisi index posisi per dokumen: untuk setiap term (hasil Analyzer,
+tanpa stopwords) di sebuah dokumen, posisi karakter awal setiap
+kemunculannya di isi dokumen, disimpan sebagai gap dengan variable-byte
+encoding.
+
+Layout file:
+
+    header  : MAGIC, VERSION, compression, n_docs, n_blocks, snippet_chars,
+              lalu (offset, length) untuk setiap section
+    section : lihat SECTIONS; setiap section di-align ke 8 bytes
+"""
+from array import array
+import bisect
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+from .analysis import WORD_RE, DIGITS_RE
+from .cache import LRUCache
+from .lexicon import _decode_varint, _encode_varint
+
+MAGIC = b'MDLD'
+VERSION = 2
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSIONS = {None: COMPRESSION_NONE, 'zlib': COMPRESSION_ZLIB}
+
+# (nama section, typecode array); typecode None berarti blob bytes
+SECTIONS = [
+    ('name_order', 'I'),        # nomor dokumen terurut menurut nama (binary search)
+    ('name_offsets', 'I'),      # nomor dokumen -> posisi nama di name_blob
+    ('name_blob', None),
+    ('doc_blocks', 'I'),        # nomor dokumen -> blok tempat isinya disimpan
+    ('doc_starts', 'I'),        # posisi awal isi dokumen di blok (setelah decompress)
+    ('doc_sizes', 'I'),         # panjang isi dokumen dalam bytes
+    ('block_offsets', 'Q'),     # posisi setiap blok di block_data
+    ('snippet_offsets', 'I'),   # nomor dokumen -> posisi snippet di snippet_blob
+    ('snippet_blob', None),
+    ('vocab_offsets', 'I'),     # nomor term -> posisi term di vocab_blob (terurut)
+    ('vocab_blob', None),
+    ('doc_term_offsets', 'I'),  # nomor dokumen -> posisi awal term-termnya di doc_terms
+    ('doc_terms', 'I'),         # nomor term yang muncul di dokumen (terurut per dokumen)
+    ('term_pos_offsets', 'I'),  # entry doc_terms -> posisi awal di pos_blob
+    ('pos_blob', None),         # posisi karakter kemunculan term (gap, VBE)
+    ('block_data', None),
+]
+
+HEADER = struct.Struct('<4sIIIII' + 'QQ' * len(SECTIONS))
+
+
+def preprocess_content(content):
+    """Isi dokumen yang dikirim ke client (kata yang terpotong baris disambung)."""
+    return content.replace("-\n", "")
+
+
+def make_snippet(content, snippet_chars=300):
+    if len(content) > snippet_chars:
+        return content[:snippet_chars] + "..."
+    return content
+
+
+def normalize_name(name):
+    # sama seperti staticfiles_storage.url: backslash (path Windows) menjadi '/'
+    return str(name).replace('\\', '/')
+
+
+def term_positions(content, analyzer):
+    """
+    Term (hasil analyzer) -> list posisi karakter awal setiap kemunculannya
+    di content. Tokenisasi sama dengan Analyzer, tetapi dilakukan per kata
+    agar posisinya di content (bukan di teks tanpa angka) diketahui.
+    """
+    positions = {}
+    for match in WORD_RE.finditer(content):
+        token = DIGITS_RE.sub('', match.group())
+        if not token or token.lower() in analyzer.stop_words:
+            continue
+        positions.setdefault(analyzer.stem(token), []).append(match.start())
+    return positions
+
+
+def write_docstore(path, docs, compression='zlib', block_bytes=65536, snippet_chars=300,
+                   analyzer=None):
+    """
+    Menulis document store.
+
+    Parameters
+    ----------
+    path: str
+        Path file yang akan ditulis
+    docs: iterable of (str, str)
+        (nama dokumen, isi dokumen mentah), misal ("1/12.txt", "...")
+    compression: 'zlib' atau None
+    block_bytes(int): target ukuran satu blok sebelum dikompresi
+    snippet_chars(int): panjang snippet untuk request dengan truncate
+    analyzer(Analyzer): jika diberikan, index posisi term per dokumen ikut
+                    dibuat (dibutuhkan snippet berbasis query)
+
+    Returns
+    -------
+    int
+        Banyaknya dokumen yang ditulis.
+    """
+    codec = COMPRESSIONS[compression]
+    names = []
+    name_offsets = array('I', [0])
+    name_blob = bytearray()
+    doc_blocks = array('I')
+    doc_starts = array('I')
+    doc_sizes = array('I')
+    block_offsets = array('Q', [0])
+    snippet_offsets = array('I', [0])
+    snippet_blob = bytearray()
+    block_data = bytearray()
+    block = bytearray()
+    doc_positions = []
+
+    def flush():
+        data = zlib.compress(bytes(block)) if codec == COMPRESSION_ZLIB else bytes(block)
+        block_data.extend(data)
+        block_offsets.append(len(block_data))
+        block.clear()
+
+    for name, content in docs:
+        content = preprocess_content(content)
+        encoded = content.encode('utf-8')
+        if block and len(block) + len(encoded) > block_bytes:
+            flush()
+        names.append(normalize_name(name).encode('utf-8'))
+        name_blob += names[-1]
+        name_offsets.append(len(name_blob))
+        doc_blocks.append(len(block_offsets) - 1)
+        doc_starts.append(len(block))
+        doc_sizes.append(len(encoded))
+        block += encoded
+        snippet_blob += make_snippet(content, snippet_chars).encode('utf-8')
+        snippet_offsets.append(len(snippet_blob))
+        doc_positions.append(term_positions(content, analyzer) if analyzer is not None else {})
+    if block:
+        flush()
+
+    vocab = sorted({term.encode('utf-8') for positions in doc_positions for term in positions})
+    vocab_offsets = array('I', [0])
+    for term in vocab:
+        vocab_offsets.append(vocab_offsets[-1] + len(term))
+    ordinals = {term.decode('utf-8'): ordinal for ordinal, term in enumerate(vocab)}
+    doc_term_offsets = array('I', [0])
+    doc_terms = array('I')
+    term_pos_offsets = array('I', [0])
+    pos_blob = bytearray()
+    for positions in doc_positions:
+        for ordinal, term in sorted((ordinals[term], term) for term in positions):
+            doc_terms.append(ordinal)
+            previous = 0
+            for position in positions[term]:
+                _encode_varint(position - previous, pos_blob)
+                previous = position
+            term_pos_offsets.append(len(pos_blob))
+        doc_term_offsets.append(len(doc_terms))
+
+    name_order = array('I', sorted(range(len(names)), key=names.__getitem__))
+    sections = {
+        'name_order': name_order, 'name_offsets': name_offsets, 'name_blob': name_blob,
+        'doc_blocks': doc_blocks, 'doc_starts': doc_starts, 'doc_sizes': doc_sizes,
+        'block_offsets': block_offsets, 'snippet_offsets': snippet_offsets,
+        'snippet_blob': snippet_blob, 'vocab_offsets': vocab_offsets,
+        'vocab_blob': b''.join(vocab), 'doc_term_offsets': doc_term_offsets,
+        'doc_terms': doc_terms, 'term_pos_offsets': term_pos_offsets, 'pos_blob': pos_blob,
+        'block_data': block_data,
+    }
+
+    body = bytearray()
+    layout = []
+    for section, typecode in SECTIONS:
+        data = sections[section]
+        if typecode is not None and sys.byteorder != 'little':
+            data = array(typecode, data)
+            data.byteswap()
+        data = bytes(data)
+        offset = HEADER.size + len(body)
+        layout += [offset, len(data)]
+        body += data
+        body += b'\0' * (-(HEADER.size + len(body)) % 8)
+
+    header = HEADER.pack(MAGIC, VERSION, codec, len(names), len(block_offsets) - 1,
+                         snippet_chars, *layout)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(body)
+    os.replace(tmp_path, path)
+    return len(names)
+
+
+class DocStore:
+    """
+    Document store yang di-mmap (read-only dan aman dipakai banyak thread).
+    Blok yang sudah di-decompress disimpan di LRUCache kecil.
+    """
+    def __init__(self, path, block_cache_entries=32):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(self.mmap)
+
+        header = HEADER.unpack_from(buffer)
+        magic, version, self.compression, self.n_docs, self.n_blocks, \
+            self.snippet_chars = header[:6]
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} bukan document store Meedle versi {VERSION}")
+        layout = header[6:]
+
+        for i, (name, typecode) in enumerate(SECTIONS):
+            offset, length = layout[2 * i], layout[2 * i + 1]
+            data = buffer[offset:offset + length]
+            if typecode is not None:
+                if sys.byteorder == 'little':
+                    data = data.cast(typecode)
+                else:
+                    data = array(typecode, data)
+                    data.byteswap()
+            setattr(self, name, data)
+        self.blocks = LRUCache(max_entries=block_cache_entries)
+
+    def __len__(self):
+        return self.n_docs
+
+    def _name(self, doc):
+        return self.name_blob[self.name_offsets[doc]:self.name_offsets[doc + 1]]
+
+    def lookup(self, name):
+        """Nomor dokumen untuk sebuah nama dokumen, atau None jika tidak ada."""
+        key = normalize_name(name).encode('utf-8')
+        order = self.name_order
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if bytes(self._name(order[mid])) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(order) and self._name(order[lo]) == key:
+            return order[lo]
+        return None
+
+    def _block(self, block):
+        data = self.blocks.get(block)
+        if data is None:
+            data = self.block_data[self.block_offsets[block]:self.block_offsets[block + 1]]
+            if self.compression == COMPRESSION_ZLIB:
+                data = zlib.decompress(data)
+            else:
+                data = bytes(data)
+            self.blocks.set(block, data)
+        return data
+
+    def content(self, doc):
+        start = self.doc_starts[doc]
+        data = self._block(self.doc_blocks[doc])
+        return data[start:start + self.doc_sizes[doc]].decode('utf-8')
+
+    def snippet(self, doc):
+        data = self.snippet_blob[self.snippet_offsets[doc]:self.snippet_offsets[doc + 1]]
+        return bytes(data).decode('utf-8')
+
+    def term_ordinal(self, term):
+        """Nomor term di vocabulary index posisi, atau None jika tidak ada."""
+        key = term.encode('utf-8')
+        offsets = self.vocab_offsets
+        lo, hi = 0, len(offsets) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if bytes(self.vocab_blob[offsets[mid]:offsets[mid + 1]]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(offsets) - 1 and self.vocab_blob[offsets[lo]:offsets[lo + 1]] == key:
+            return lo
+        return None
+
+    def positions(self, doc, ordinal):
+        """Posisi karakter kemunculan term (nomor term) di dokumen, terurut."""
+        lo = self.doc_term_offsets[doc]
+        hi = self.doc_term_offsets[doc + 1]
+        i = bisect.bisect_left(self.doc_terms, ordinal, lo, hi)
+        if i == hi or self.doc_terms[i] != ordinal:
+            return []
+        pos = self.term_pos_offsets[i]
+        end = self.term_pos_offsets[i + 1]
+        blob = self.pos_blob
+        positions = []
+        position = 0
+        while pos < end:
+            gap, pos = _decode_varint(blob, pos)
+            position += gap
+            positions.append(position)
+        return positions
+
+    def get(self, name, truncate=False):
+        """Isi (atau snippet jika truncate) dokumen, None jika tidak ada."""
+        doc = self.lookup(name)
+        if doc is None:
+            return None
+        return self.snippet(doc) if truncate else self.content(doc)
+
+    def get_many(self, names, truncate=False):
+        """
+        Generator (nama, isi) untuk setiap nama yang ada di store, sesuai
+        urutan names (nama yang tidak ada dilewati). Blok yang sudah
+        di-decompress di-cache, jadi dokumen-dokumen dari blok yang sama cukup
+        di-decompress satu kali.
+        """
+        for name in names:
+            content = self.get(name, truncate)
+            if content is not None:
+                yield name, content
+
+    def close(self):
+        self.blocks.clear()
+        try:
+            self.mmap.close()
+        except BufferError:
+            # masih ada memoryview yang dipakai; dilepas oleh garbage collector
+            pass
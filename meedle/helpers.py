@@ -2,20 +2,40 @@ from django.core.files import File
 from django.contrib.staticfiles.storage import staticfiles_storage
 import pickle
 
+from array import array
+import bisect
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import contextlib
+import copy
 import heapq
 import time
 import math
-import re
+import mmap
+import os
+import threading
 
-from tqdm import tqdm
-import nltk
-from nltk.stem import PorterStemmer
-from nltk.tokenize import RegexpTokenizer
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 from django.contrib.staticfiles.storage import staticfiles_storage
 from django.core.files import File
 
+from .analysis import Analyzer, write_stem_table
+from .boolean import BooleanEvaluator, parse_boolean, positive_terms
+from .cache import PostingsCache, postings_size
+from .compression import VBEPostings, get_codec
+from .impacts import ImpactsReader, compute_impacts, score_at_a_time, write_impacts
+from . import metrics, segments, shards
+from .lexicon import Lexicon, write_lexicon
+from .positions import PositionsReader, PositionsWriter
+from .skips import BLOCK as SKIPS_BLOCK, CODEC as SKIPS_CODEC, BlockPostingsCursor, SkipsReader, \
+    block_max_weights, write_skips
+from .snapshot import StartupSnapshot, checksum as snapshot_checksum, collection_stem_table, \
+    write_snapshot
+
 class IdMap:
     """
     Ingat kembali di kuliah, bahwa secara praktis, sebuah dokumen dan
@@ -25,7 +45,7 @@ class IdMap:
     akan melakukan hal tersebut.
     """
 
-    def __init__(self, str_to_id = {}, id_to_str = []):
+    def __init__(self, str_to_id = None, id_to_str = None):
         """
         Mapping dari string (term atau nama dokumen) ke id disimpan dalam
         python's dictionary; cukup efisien. Mapping sebaliknya disimpan dalam
@@ -37,9 +57,12 @@ class IdMap:
 
             id_to_str[8] ---> "halo"
             id_to_str[54] ---> "/collection/dir0/gamma.txt"
+
+        Default-nya container baru untuk setiap instance (bukan {} dan []
+        sebagai default argument yang akan dipakai bersama semua instance).
         """
-        self.str_to_id = str_to_id
-        self.id_to_str = id_to_str
+        self.str_to_id = {} if str_to_id is None else str_to_id
+        self.id_to_str = [] if id_to_str is None else id_to_str
 
     def __len__(self):
         """Mengembalikan banyaknya term (atau dokumen) yang disimpan di IdMap."""
@@ -62,6 +85,13 @@ class IdMap:
             self.id_to_str.append(s)
         return self.str_to_id[s]
 
+    def get(self, s):
+        """
+        Seperti self[s] untuk string, tetapi mengembalikan None jika s tidak
+        ada (tanpa assign id baru). Dipakai saat query.
+        """
+        return self.str_to_id.get(s)
+
     def __getitem__(self, key):
         """
         __getitem__(...) adalah special method di Python, yang mengizinkan sebuah
@@ -83,6 +113,60 @@ class IdMap:
         else:
             raise TypeError
 
+
+class FrozenIdMap:
+    """
+    IdMap read-only yang ringkas untuk query: semua string disimpan dalam
+    satu bytes blob (UTF-8) beserta array offset-nya, dan lookup string -> id
+    dilakukan dengan binary search atas array id yang terurut menurut
+    string-nya. Jauh lebih hemat memori dibanding python's dict dan list of
+    str, tidak pernah dimodifikasi, dan aman dipakai bersama oleh banyak thread.
+
+    map[int] -> str; map[str] dan get(str) -> int, atau None jika tidak ada.
+    """
+    def __init__(self, id_to_str):
+        encoded = [s.encode('utf-8') for s in id_to_str]
+        self.offsets = array('Q', [0])
+        for s in encoded:
+            self.offsets.append(self.offsets[-1] + len(s))
+        self.blob = b''.join(encoded)
+        self.sorted_ids = array('I', sorted(range(len(encoded)), key=encoded.__getitem__))
+
+    @classmethod
+    def from_id_map(cls, id_map):
+        return cls(id_map.id_to_str)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def _bytes(self, i):
+        return self.blob[self.offsets[i]:self.offsets[i + 1]]
+
+    def get(self, s):
+        target = s.encode('utf-8')
+        sorted_ids = self.sorted_ids
+        lo, hi = 0, len(sorted_ids)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._bytes(sorted_ids[mid]) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(sorted_ids) and self._bytes(sorted_ids[lo]) == target:
+            return sorted_ids[lo]
+        return None
+
+    def __getitem__(self, key):
+        if type(key) is int:
+            if not 0 <= key < len(self):
+                raise IndexError(key)
+            return self._bytes(key).decode('utf-8')
+        elif type(key) is str:
+            return self.get(key)
+        else:
+            raise TypeError
+
+
 def sorted_merge_posts_and_tfs(posts_tfs1, posts_tfs2):
     """
     Menggabung (merge) dua lists of tuples (doc id, tf) dan mengembalikan
@@ -130,91 +214,6 @@ def sorted_merge_posts_and_tfs(posts_tfs1, posts_tfs2):
         j += 1
     return result
 
-class VBEPostings:
-    """ 
-    Berbeda dengan StandardPostings, dimana untuk suatu postings list,
-    yang disimpan di disk adalah sequence of integers asli dari postings
-    list tersebut apa adanya.
-
-    Pada VBEPostings, kali ini, yang disimpan adalah gap-nya, kecuali
-    posting yang pertama. Barulah setelah itu di-encode dengan Variable-Byte
-    Enconding algorithm ke bytestream.
-
-    Contoh:
-    postings list [34, 67, 89, 454] akan diubah dulu menjadi gap-based,
-    yaitu [34, 33, 22, 365]. Barulah setelah itu di-encode dengan algoritma
-    compression Variable-Byte Encoding, dan kemudian diubah ke bytesream.
-
-    ASUMSI: postings_list untuk sebuah term MUAT di memori!
-
-    """
-
-    @staticmethod
-    def vb_decode(encoded_bytestream):
-        """
-        Decoding sebuah bytestream yang sebelumnya di-encode dengan
-        variable-byte encoding.
-        """
-        # TODO
-        # slide 5 - page 36
-        numbers = []
-        n = 0
-        for i in range(len(encoded_bytestream)):
-            byte = encoded_bytestream[i]
-            if byte < 128:
-                n = 128*n + byte
-            else:
-                n = 128*n + byte-128
-                numbers.append(n)
-                n = 0
-        return numbers
-
-    @staticmethod
-    def decode(encoded_postings_list):
-        """
-        Decodes postings_list dari sebuah stream of bytes. JANGAN LUPA
-        bytestream yang di-decode dari encoded_postings_list masih berupa
-        gap-based list.
-
-        Parameters
-        ----------
-        encoded_postings_list: bytes
-            bytearray merepresentasikan encoded postings list sebagai keluaran
-            dari static method encode di atas.
-
-        Returns
-        -------
-        List[int]
-            list of docIDs yang merupakan hasil decoding dari encoded_postings_list
-        """
-        # TODO
-        # ref: https://notebooks.githubusercontent.com/view/ipynb?azure_maps_enabled=true&browser=chrome&color_mode=auto&commit=4912ce487c4562da6b73447366a5fd421df7ac07&device=unknown&enc_url=68747470733a2f2f7261772e67697468756275736572636f6e74656e742e636f6d2f5a68656e67787572752f43533237362d7061312d736b656c65746f6e2d323031392f343931326365343837633435363264613662373334343733363661356664343231646637616330372f5041312d736b656c65746f6e2e6970796e62&logged_in=false&nwo=Zhengxuru%2FCS276-pa1-skeleton-2019&path=PA1-skeleton.ipynb&platform=android&repository_id=299051363&repository_type=Repository&version=103
-        numbers = VBEPostings.vb_decode(encoded_postings_list)
-        prefix_sum = 0
-        result = []
-        for num in numbers:
-            prefix_sum += num
-            result.append(prefix_sum)
-        return result
-
-    @staticmethod
-    def decode_tf(encoded_tf_list):
-        """
-        Decodes list of term frequencies dari sebuah stream of bytes
-
-        Parameters
-        ----------
-        encoded_tf_list: bytes
-            bytearray merepresentasikan encoded term frequencies list sebagai keluaran
-            dari static method encode_tf di atas.
-
-        Returns
-        -------
-        List[int]
-            List of term frequencies yang merupakan hasil decoding dari encoded_tf_list
-        """
-        return VBEPostings.vb_decode(encoded_tf_list)
-
 
 class InvertedIndex:
     """
@@ -252,14 +251,22 @@ class InvertedIndex:
         dalam Inverted Index.
 
     """
-    def __init__(self, index_name, postings_encoding, directory=''):
+    def __init__(self, index_name, postings_encoding, directory='', use_mmap=False, lexicon=None):
         """
         Parameters
         ----------
         index_name (str): Nama yang digunakan untuk menyimpan files yang berisi index
-        postings_encoding : Lihat di compression.py, kandidatnya adalah StandardPostings,
-                        GapBasedPostings, dsb.
+        postings_encoding : Codec postings (lihat meedle.compression) untuk menulis
+                        index. Saat membaca, codec yang tercatat di metadata index
+                        yang dipakai.
         directory (str): directory dimana file index berada
+        use_mmap (bool): Jika True, file index di-mmap sekali saat __enter__ dan
+                        postings dibaca sebagai memoryview slice (tanpa seek/read
+                        dan tanpa copy), sehingga aman dipakai banyak thread tanpa
+                        lock dan mapping-nya berbagi page cache antar proses.
+        lexicon (Lexicon): Jika diberikan, postings_dict, terms dan doc_length
+                        dibaca dari lexicon biner (lihat meedle.lexicon)
+                        alih-alih di-unpickle dari file .dict.
         """
 
         self.index_file_path = staticfiles_storage.url(f'{directory}/{index_name}.index')[1:]
@@ -267,6 +274,15 @@ class InvertedIndex:
 
         self.postings_encoding = postings_encoding
         self.directory = directory
+        self.use_mmap = use_mmap
+        self.lexicon = lexicon
+        # PostingsCache opsional untuk postings yang sudah di-decode
+        self.postings_cache = None
+        self.index_mmap = None
+        self.index_buffer = None
+        # Satu file handle bisa dipakai bersama oleh banyak thread (searcher
+        # yang long-lived), jadi pasangan seek + read harus atomik.
+        self.lock = threading.Lock()
 
         self.postings_dict = {}
         self.terms = []         # Untuk keep track urutan term yang dimasukkan ke index
@@ -297,18 +313,47 @@ class InvertedIndex:
         # Membuka index file
         idx_file = open(self.index_file_path, 'rb')
         self.index_file = File(idx_file)
+        if self.use_mmap and os.fstat(idx_file.fileno()).st_size > 0:
+            self.index_mmap = mmap.mmap(idx_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.index_buffer = memoryview(self.index_mmap)
 
         # Kita muat postings dict dan terms iterator dari file metadata
+        if self.lexicon is not None:
+            self.postings_dict = self.lexicon.postings_dict
+            self.terms = self.lexicon.terms
+            self.doc_length = self.lexicon.doc_length
+            self.term_iter = self.terms.__iter__()
+            self._use_codec(self.lexicon.codec)
+            return self
+
         with open(self.metadata_file_path, 'rb') as f:
-            self.postings_dict, self.terms, self.doc_length = pickle.load(File(f))
+            metadata = pickle.load(File(f))
+            self.postings_dict, self.terms, self.doc_length = metadata[:3]
             self.term_iter = self.terms.__iter__()
+        # metadata lama (tanpa nama codec) selalu ditulis dengan VBEPostings
+        self._use_codec(metadata[3] if len(metadata) > 3 else VBEPostings.name)
 
         return self
 
+    def _use_codec(self, name):
+        """Memakai codec yang tercatat di metadata index untuk decoding."""
+        if getattr(self.postings_encoding, 'name', None) != name:
+            self.postings_encoding = get_codec(name)
+
     def __exit__(self, exception_type, exception_value, traceback):
         """Menutup index_file dan menyimpan postings_dict dan terms ketika keluar context"""
         # Menutup index file
         self.index_file.close()
+        if self.index_mmap is not None:
+            try:
+                self.index_buffer.release()
+                self.index_mmap.close()
+            except BufferError:
+                # masih ada memoryview slice yang dipakai; mapping akan
+                # dilepas oleh garbage collector
+                pass
+            self.index_mmap = None
+            self.index_buffer = None
 
         # Menyimpan metadata (postings dict dan terms) ke file metadata dengan bantuan pickle
         # with open(self.metadata_file_path, 'wb') as f:
@@ -350,18 +395,519 @@ class InvertedIndexReader(InvertedIndex):
         of term frequencies terkait untuk sebuah term (disimpan dalam
         bentuk tuple (postings_list, tf_list)).
 
+        Jika postings_cache aktif, hasilnya bisa dipakai bersama dengan query
+        lain sehingga TIDAK BOLEH dimodifikasi.
+
         PERHATIAN! method tidak boleh iterasi di keseluruhan index
         dari awal hingga akhir. Method ini harus langsung loncat ke posisi
         byte tertentu pada file (index file) dimana postings list (dan juga
         list of TF) dari term disimpan.
         """
         # TODO
-        start, num, length_post, length_tf = self.postings_dict[term]
-        self.index_file.seek(start)
-        postings_list = self.postings_encoding.decode(self.index_file.read(length_post))
-        tf_list = self.postings_encoding.decode_tf(self.index_file.read(length_tf))
+        trace = metrics.current()
+        cache = self.postings_cache
+        if cache is not None:
+            cached = cache.get(('list', term))
+            if cached is not None:
+                if trace is not None:
+                    _trace_cache_hit(trace, cached[0])
+                return cached
+        encoded_postings, encoded_tf = self.read_encoded(term)
+        if trace is not None:
+            start = time.perf_counter()
+        postings_list = self.postings_encoding.decode(encoded_postings)
+        tf_list = self.postings_encoding.decode_tf(encoded_tf)
+        if trace is not None:
+            _trace_decode(trace, start, postings_list, cache is not None)
+        if cache is not None:
+            cache.put(('list', term), (postings_list, tf_list), postings_size(postings_list, tf_list))
         return (postings_list, tf_list)
 
+    def get_postings_arrays(self, term):
+        """
+        Seperti get_postings_list, tetapi postings list dan list of TF
+        di-decode langsung menjadi numpy array int64 (butuh numpy).
+        """
+        trace = metrics.current()
+        cache = self.postings_cache
+        if cache is not None:
+            cached = cache.get(('array', term))
+            if cached is not None:
+                if trace is not None:
+                    _trace_cache_hit(trace, cached[0])
+                return cached
+        encoded_postings, encoded_tf = self.read_encoded(term)
+        if trace is not None:
+            start = time.perf_counter()
+        postings = self.postings_encoding.decode_array(encoded_postings)
+        tfs = self.postings_encoding.decode_tf_array(encoded_tf)
+        if trace is not None:
+            _trace_decode(trace, start, postings, cache is not None)
+        if cache is not None:
+            cache.put(('array', term), (postings, tfs), postings_size(postings, tfs))
+        return (postings, tfs)
+
+    def get_postings_cursor(self, term, skips=None):
+        """
+        BlockPostingsCursor untuk sebuah term: berbeda dengan get_postings_list,
+        hanya blok postings yang dibutuhkan yang di-decode (lihat
+        meedle.skips). Tanpa skip table untuk term ini (skips None, df kecil,
+        atau codec selain VBEPostings), cursor dibuat dari get_postings_list.
+        """
+        table = None
+        if skips is not None and self.postings_encoding.name == SKIPS_CODEC:
+            table = skips.table(term)
+        cache = self.postings_cache
+        if table is None or (cache is not None and ('list', term) in cache):
+            return BlockPostingsCursor.from_lists(*self.get_postings_list(term))
+        encoded_postings, encoded_tf = self.read_encoded(term)
+        trace = metrics.current()
+        if trace is not None:
+            trace.count('postings', self.postings_dict[term][1])
+        return BlockPostingsCursor(encoded_postings, encoded_tf, self.postings_dict[term][1], table)
+
+    def prewarm_postings_cache(self, n_terms, arrays=False):
+        """
+        Mengisi postings_cache dengan n_terms term ber-DF terbesar, yaitu term
+        yang paling mungkin muncul di banyak query.
+        """
+        cache = self.postings_cache
+        if cache is None or n_terms <= 0:
+            return
+        by_df = sorted(self.postings_dict, key=lambda term: self.postings_dict[term][1], reverse=True)
+        for term in by_df[:n_terms]:
+            encoded_postings, encoded_tf = self.read_encoded(term)
+            if arrays:
+                key = ('array', term)
+                postings = self.postings_encoding.decode_array(encoded_postings)
+                tfs = self.postings_encoding.decode_tf_array(encoded_tf)
+            else:
+                key = ('list', term)
+                postings = self.postings_encoding.decode(encoded_postings)
+                tfs = self.postings_encoding.decode_tf(encoded_tf)
+            if not cache.put(key, (postings, tfs), postings_size(postings, tfs), force=True):
+                break
+
+    def read_encoded(self, term):
+        """
+        Membaca bytes postings list dan list of TF sebuah term, tanpa decoding.
+        Pada mode mmap hasilnya berupa memoryview ke mapping file index.
+        """
+        trace = metrics.current()
+        if trace is not None:
+            clock = time.perf_counter()
+        start, num, length_post, length_tf = self.postings_dict[term]
+        buffer = self.index_buffer
+        if buffer is not None:
+            middle = start + length_post
+            encoded = (buffer[start:middle], buffer[middle:middle + length_tf])
+        else:
+            with self.lock:
+                self.index_file.seek(start)
+                encoded_postings = self.index_file.read(length_post)
+                encoded_tf = self.index_file.read(length_tf)
+            encoded = (encoded_postings, encoded_tf)
+        if trace is not None:
+            trace.add_time('fetch', time.perf_counter() - clock)
+            trace.count('bytes_read', length_post + length_tf)
+        return encoded
+
+
+def _trace_cache_hit(trace, postings):
+    trace.count('postings_cache_hits')
+    trace.count('postings', len(postings))
+
+
+def _trace_decode(trace, start, postings, cached):
+    """Mencatat decoding postings (dan miss PostingsCache jika cache aktif) ke trace."""
+    trace.add_time('decode', time.perf_counter() - start)
+    trace.count('postings', len(postings))
+    if cached:
+        trace.count('postings_cache_misses')
+
+
+class PostingsCursor:
+    """
+    Cursor Document-at-a-Time di atas postings list sebuah query term, dipakai
+    oleh WAND dan Block-Max WAND.
+
+    Postings dibaca lewat BlockPostingsCursor, jadi dengan skip table blok
+    yang dilompati tidak pernah di-decode. Selain itu cursor menyimpan upper
+    bound skor BM25 term tersebut (max_score) dan, untuk setiap blok
+    BLOCK_SIZE postings, docID terakhir di blok (block_last) beserta skor
+    maksimum di blok (block_max).
+
+    doc(), tf(), next() dan advance(target) adalah method BlockPostingsCursor
+    tersebut, di-bind langsung karena doc() dipanggil untuk hampir setiap
+    posting.
+
+    Attributes
+    ----------
+    order(int): posisi term di query; skor dijumlahkan sesuai urutan ini
+                agar hasilnya sama persis dengan TaaT.
+    """
+    # sama dengan blok skip table, agar skor maksimum blok bisa dibaca dari file .skip
+    BLOCK_SIZE = SKIPS_BLOCK
+
+    def __init__(self, order, postings, wtq, max_score, block_last, block_max):
+        self.order = order
+        self.postings = postings
+        self.doc = postings.doc
+        self.tf = postings.tf
+        self.next = postings.next
+        self.advance = postings.advance
+        self.wtq = wtq
+        self.max_score = max_score
+        self.block_last = block_last
+        self.block_max = block_max
+        self.block = 0
+
+    def shallow_advance(self, target):
+        """
+        Maju ke blok yang mungkin memuat target tanpa menggeser posting
+        saat ini. Mengembalikan False jika target melewati blok terakhir.
+        """
+        if self.block > 0 and self.block_last[self.block - 1] >= target:
+            self.block = 0
+        self.block = bisect.bisect_left(self.block_last, target, self.block)
+        return self.block < len(self.block_last)
+
+    def block_upper_bound(self):
+        """Skor maksimum di blok saat ini (0 jika sudah melewati blok terakhir)."""
+        if self.block < len(self.block_max):
+            return self.block_max[self.block]
+        return 0
+
+    def block_end(self):
+        """docID terakhir di blok saat ini (math.inf jika sudah habis)."""
+        if self.block < len(self.block_last):
+            return self.block_last[self.block]
+        return math.inf
+
+
+class InvertedIndexWriter(InvertedIndex):
+    """
+    Class yang mengimplementasikan bagaimana caranya menulis secara
+    efisien Inverted Index yang disimpan di sebuah file.
+    """
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.index_file_path) or '.', exist_ok=True)
+        self.index_file = open(self.index_file_path, 'wb+')
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        """
+        Menutup index_file dan menyimpan postings_dict, terms, doc_length dan
+        nama codec postings ke file metadata
+        """
+        self.index_file.close()
+        with open(self.metadata_file_path, 'wb') as f:
+            pickle.dump([self.postings_dict, self.terms, self.doc_length, self.postings_encoding.name], f)
+
+    def append(self, term, postings_list, tf_list):
+        """
+        Menambahkan (append) sebuah term, postings_list, dan juga TF list
+        yang terasosiasi ke posisi akhir index file.
+
+        Method ini melakukan 4 hal:
+        1. Encode postings_list menggunakan self.postings_encoding (method encode),
+        2. Encode tf_list menggunakan self.postings_encoding (method encode_tf),
+        3. Menyimpan metadata dalam bentuk self.terms, self.postings_dict, dan self.doc_length.
+           Ingat kembali bahwa self.postings_dict memetakan sebuah termID ke
+           sebuah 4-tuple: - start_position_in_index_file
+                           - number_of_postings_in_list
+                           - length_in_bytes_of_postings_list
+                           - length_in_bytes_of_tf_list
+        4. Menambahkan (append) bystream dari postings_list yang sudah di-encode dan
+           tf_list yang sudah di-encode ke posisi akhir index file di harddisk.
+
+        Parameters
+        ----------
+        term:
+            term atau termID yang merupakan unique identifier dari sebuah term
+        postings_list: List[Int]
+            List of docIDs dimana term muncul
+        tf_list: List[Int]
+            List of term frequencies
+        """
+        self.terms.append(term)
+        for doc_id, tf in zip(postings_list, tf_list):
+            self.doc_length[doc_id] = self.doc_length.get(doc_id, 0) + tf
+
+        encoded_postings = self.postings_encoding.encode(postings_list)
+        encoded_tf = self.postings_encoding.encode_tf(tf_list)
+        self.index_file.seek(0, os.SEEK_END)
+        start = self.index_file.tell()
+        self.postings_dict[term] = (start, len(postings_list), len(encoded_postings), len(encoded_tf))
+        self.index_file.write(encoded_postings)
+        self.index_file.write(encoded_tf)
+
+
+# pemisah block dan file di nama dokumen, sama dengan index yang dikirim
+# bersama repo (di-build di Windows), agar docs_id di response API tidak
+# berubah setelah index di-build ulang
+DOC_NAME_SEPARATOR = '\\'
+
+
+def doc_name(block_name, file_name):
+    """Nama dokumen di index, misal "6\\507.txt"."""
+    return f'{block_name}{DOC_NAME_SEPARATOR}{file_name}'
+
+
+def _natural_key(name):
+    """Urutan 1, 2, ..., 10, 11 (bukan 1, 10, 11, 2) untuk nama block/dokumen."""
+    stem = name.split('.')[0]
+    return (0, int(stem), name) if stem.isdigit() else (1, 0, name)
+
+
+def term_positions(terms):
+    """Term -> list posisi kemunculannya di list of terms hasil Analyzer."""
+    positions = {}
+    for position, term in enumerate(terms):
+        positions.setdefault(term, []).append(position)
+    return positions
+
+
+def parse_block(block_path, block_name, analyzer, positional = False):
+    """
+    Membaca semua dokumen di satu block collection dan menghitung TF setiap
+    term di setiap dokumen. Dijalankan di worker process saat indexing,
+    sehingga hanya memakai string (termID dan docID di-assign oleh proses
+    utama agar konsisten di semua block).
+
+    Returns
+    -------
+    List[(str, Counter, dict)]
+        List of (nama dokumen, Counter term -> TF, term -> list posisi atau
+        None jika tidak positional), terurut menurut nama dokumen.
+    """
+    docs = []
+    for file_name in sorted(os.listdir(block_path), key=_natural_key):
+        with open(os.path.join(block_path, file_name), 'r') as f:
+            terms = analyzer.analyze(f.read())
+        docs.append((doc_name(block_name, file_name), Counter(terms),
+                     term_positions(terms) if positional else None))
+    return docs
+
+
+class BatchPostingsReader:
+    """
+    Pembungkus InvertedIndexReader untuk satu batch query: postings semua
+    term di batch dibaca dan di-decode sekali di awal, lalu disajikan dari
+    memori ke setiap query di batch tersebut. Bentuk lain (list saat batch
+    di-decode sebagai numpy array, atau sebaliknya) dibaca dari reader.
+    """
+    def __init__(self, reader, term_ids, arrays):
+        self.reader = reader
+        self.postings_dict = reader.postings_dict
+        self.doc_length = reader.doc_length
+        self.arrays = arrays
+        self.postings = {}
+        for term_id in term_ids:
+            if term_id in reader.postings_dict:
+                if arrays:
+                    self.postings[term_id] = reader.get_postings_arrays(term_id)
+                else:
+                    self.postings[term_id] = reader.get_postings_list(term_id)
+
+    def get_postings_list(self, term):
+        if self.arrays or term not in self.postings:
+            return self.reader.get_postings_list(term)
+        return self.postings[term]
+
+    def get_postings_arrays(self, term):
+        if not self.arrays or term not in self.postings:
+            return self.reader.get_postings_arrays(term)
+        return self.postings[term]
+
+    def get_postings_cursor(self, term, skips=None):
+        """Seperti InvertedIndexReader.get_postings_cursor (phrase dan proximity)."""
+        if self.arrays or term not in self.postings:
+            return self.reader.get_postings_cursor(term, skips)
+        return BlockPostingsCursor.from_lists(*self.postings[term])
+
+
+class IndexState:
+    """
+    Kumpulan state hasil memuat index yang dibutuhkan saat query: IdMap
+    untuk term dan dokumen, InvertedIndexReader yang sudah terbuka (beserta
+    postings_dict dan doc_length-nya), serta statistik koleksi N dan avdl
+    yang cukup dihitung sekali.
+
+    Selain cache-cache turunan di bawah, instance ini tidak pernah dimodifikasi
+    setelah dibuat; reload index
+    dilakukan dengan membuat IndexState baru dan menukarnya, sehingga query
+    yang sedang berjalan tetap memakai state lama sampai selesai.
+    """
+    def __init__(self, term_id_map, doc_id_map, reader, version, positions = None, skips = None,
+                 impacts = None, pruned_impacts = None, snapshot = None):
+        self.term_id_map = term_id_map
+        self.doc_id_map = doc_id_map
+        self.reader = reader
+        self.version = version
+        # PositionsReader jika index memiliki positional index (.pos)
+        self.positions = positions
+        # SkipsReader jika index memiliki skip table (.skip)
+        self.skips = skips
+        # ImpactsReader jika index memiliki impact-ordered index (.imp dan .pruned.imp)
+        self.impacts = impacts
+        self.pruned_impacts = pruned_impacts
+
+        if snapshot is not None:
+            # statistik yang sudah dihitung saat build (lihat meedle.snapshot)
+            self.N, self.total_length = snapshot.N, snapshot.total_length
+            self.doc_id_bound = snapshot.doc_id_bound
+        else:
+            self.N = len(reader.doc_length)
+            self.total_length = sum(reader.doc_length.values())
+            # docID tidak selalu rapat (0..N-1), jadi accumulator berukuran docID terbesar + 1
+            self.doc_id_bound = max(reader.doc_length) + 1
+        self.avdl = self.total_length / self.N
+
+        # cache upper bound skor per (termID, k1, b) untuk WAND/Block-Max WAND
+        self.score_bounds = {}
+        # cache normalisasi panjang dokumen per (k1, b, numpy?)
+        self.length_norms = {}
+        # DF global jika state ini bagian dari index bersegmen (atau sebuah shard)
+        self.global_df = None
+        self.segments = None
+        self.shards = None
+
+        # semua docID terurut (untuk NOT pada boolean query), dibuat saat dibutuhkan
+        self.doc_ids = None
+
+        self.doc_length_array = None
+        if snapshot is not None:
+            self.doc_length_array = snapshot.doc_length_array()
+        elif np is not None:
+            self.doc_length_array = np.zeros(self.doc_id_bound, dtype=np.int64)
+            for doc_id, dl in reader.doc_length.items():
+                self.doc_length_array[doc_id] = dl
+
+    def set_collection_stats(self, N, avdl, df):
+        """
+        Mengganti statistik koleksi dengan statistik global saat state ini
+        hanya salah satu segmen dari index (lihat meedle.segments).
+
+        Parameters
+        ----------
+        N(int), avdl(float): banyaknya dokumen dan rata-rata panjang dokumen
+                    di seluruh segmen
+        df: function term (str) -> DF term di seluruh segmen
+        """
+        self.N = N
+        self.avdl = avdl
+        self.global_df = df
+        self.length_norms = {}
+
+    def idf(self, term, term_id):
+        """w(t, Q) = log (N / df(t))"""
+        if self.global_df is not None:
+            df = self.global_df(term)
+        else:
+            df = self.reader.postings_dict[term_id][1]
+        return math.log(self.N / df, 10)
+
+    def term_weight(self, term):
+        """IDF sebuah term, atau None jika term tidak ada di collection."""
+        term_id = self.term_id_map.get(term)
+        if term_id not in self.reader.postings_dict:
+            return None
+        return self.idf(term, term_id)
+
+    def length_norm(self, k1, b, use_numpy=False):
+        """
+        Penyebut BM25 yang hanya bergantung pada dokumen, yaitu
+        k1 * ((1 - b) + b * dl/avdl), untuk setiap docID. Dihitung sekali per
+        (k1, b) lalu di-cache; hasilnya numpy array jika use_numpy, selain itu
+        python's list (elemen bukan dokumen bernilai 0).
+        """
+        key = (k1, b, use_numpy)
+        norms = self.length_norms.get(key)
+        if norms is None:
+            avdl = self.avdl
+            if use_numpy:
+                norms = k1 * ((1 - b) + b * self.doc_length_array / avdl)
+            else:
+                norms = [0.0] * self.doc_id_bound
+                for doc_id, dl in self.reader.doc_length.items():
+                    norms[doc_id] = k1 * ((1 - b) + b * dl/avdl)
+            self.length_norms[key] = norms
+        return norms
+
+    def all_doc_ids(self):
+        """List semua docID di index (terurut)."""
+        if self.doc_ids is None:
+            self.doc_ids = sorted(self.reader.doc_length)
+        return self.doc_ids
+
+    def with_reader(self, reader):
+        """
+        Salinan dangkal state ini dengan reader lain (misalnya
+        BatchPostingsReader). Cache-cache turunan tetap dipakai bersama.
+        """
+        state = copy.copy(self)
+        state.reader = reader
+        return state
+
+    def close(self):
+        self.reader.__exit__(None, None, None)
+        if self.reader.lexicon is not None:
+            self.reader.lexicon.close()
+        if self.positions is not None:
+            self.positions.close()
+        if self.skips is not None:
+            self.skips.close()
+        for impacts in (self.impacts, self.pruned_impacts):
+            if impacts is not None:
+                impacts.close()
+
+
+class SegmentedState:
+    """
+    State index yang terdiri dari beberapa segmen (index utama + segmen
+    delta, lihat meedle.segments). Setiap segmen adalah IndexState biasa
+    yang statistik koleksinya (N, avdl, DF) diganti dengan statistik global.
+    """
+    def __init__(self, segments, version):
+        self.segments = segments
+        self.shards = None
+        self.version = version
+        # kompatibilitas dengan kode yang mengharapkan IndexState tunggal
+        self.term_id_map = segments[0].term_id_map
+        self.doc_id_map = segments[0].doc_id_map
+        self.reader = segments[0].reader
+
+        self.N = sum(segment.N for segment in segments)
+        self.avdl = sum(segment.total_length for segment in segments) / self.N
+        self.df_cache = {}
+        for segment in segments:
+            segment.set_collection_stats(self.N, self.avdl, self.df)
+
+    def df(self, term):
+        """DF sebuah term di seluruh segmen."""
+        df = self.df_cache.get(term)
+        if df is None:
+            df = 0
+            for segment in self.segments:
+                term_id = segment.term_id_map.get(term)
+                if term_id in segment.reader.postings_dict:
+                    df += segment.reader.postings_dict[term_id][1]
+            self.df_cache[term] = df
+        return df
+
+    def term_weight(self, term):
+        """IDF sebuah term di seluruh segmen, atau None jika tidak ada."""
+        df = self.df(term)
+        if df == 0:
+            return None
+        return math.log(self.N / df, 10)
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+
+
 class BSBIIndex:
     """
     Attributes
@@ -371,11 +917,50 @@ class BSBIIndex:
                     /collection/0/gamma.txt) to docIDs
     data_dir(str): Path ke data
     output_dir(str): Path ke output index files
-    postings_encoding: Lihat di compression.py, kandidatnya adalah StandardPostings,
-                    VBEPostings, dsb.
+    postings_encoding: Codec postings untuk index yang dibangun, lihat
+                    meedle.compression (VBEPostings, BitPackingPostings,
+                    EliasFanoPostings). Namanya dicatat di metadata index.
     index_name(str): Nama dari file yang berisi inverted index
+    use_numpy(bool): Hitung skor TaaT secara tervektorisasi dengan NumPy.
+                    Default-nya aktif jika numpy tersedia.
+    use_mmap(bool): Baca postings dari file index yang di-mmap (lihat
+                    InvertedIndex).
+    use_lexicon(bool): Muat metadata index dari lexicon biner {index_name}.lex
+                    jika ada, alih-alih unpickle file-file .dict.
+    result_cache: Cache hasil retrieve_bm25 (lihat meedle.cache) dengan
+                    method get(key) dan set(key, value); None berarti tanpa cache.
+    postings_cache_bytes(int): Budget memori (bytes) PostingsCache untuk postings
+                    yang sudah di-decode; 0 berarti tanpa cache. Cache ini
+                    dibuat ulang setiap kali index di-reload.
+    postings_cache_prewarm(int): Banyaknya term ber-DF terbesar yang langsung
+                    dimuat ke PostingsCache saat index dibuka.
+    merge_factor(int): Banyaknya segmen per tier sebelum di-merge oleh
+                    TieredMergePolicy (lihat add_documents).
+    positional(bool): Tulis positional index {index_name}.pos saat indexing
+                    (lihat meedle.positions) untuk phrase query dan proximity.
+    sharded(bool): Jika index memiliki shard (lihat meedle.shards dan
+                    build_shards), query di-scoring paralel oleh satu worker
+                    process per shard. Hanya berguna bersama open().
+    use_snapshot(bool): Muat analyzer, statistik koleksi dan pre-warming
+                    PostingsCache dari startup snapshot {index_name}.snap
+                    (lihat meedle.snapshot dan build_snapshot) jika ada dan
+                    masih sesuai dengan index satu segmen yang dibuka.
+    state(IndexState): State index yang sudah dimuat (warm) lewat open();
+                    None jika index dibuka ulang setiap kali retrieve_bm25
+                    dipanggil.
     """
-    def __init__(self, data_dir, output_dir, postings_encoding, index_name = "main_index"):
+    RETRIEVAL_METHODS = ('taat', 'wand', 'bmw')
+    # operator default untuk term tanpa operator pada retrieve_boolean
+    BOOLEAN_MODES = ('and', 'or')
+    # banyaknya dokumen teratas BM25 yang skornya dihitung ulang dengan proximity
+    PROXIMITY_DEPTH = 100
+    # jarak maksimum (dalam term) dua term query yang dihitung proximity-nya
+    PROXIMITY_WINDOW = 5
+
+    def __init__(self, data_dir, output_dir, postings_encoding, index_name = "main_index",
+                 use_numpy = None, use_mmap = True, use_lexicon = True, result_cache = None,
+                 postings_cache_bytes = 0, postings_cache_prewarm = 0, merge_factor = 4,
+                 positional = True, sharded = False, use_snapshot = True):
         self.term_id_map = IdMap()
         self.doc_id_map = IdMap()
         self.data_dir = data_dir
@@ -386,29 +971,690 @@ class BSBIIndex:
         # Untuk menyimpan nama-nama file dari semua intermediate inverted index
         self.intermediate_indices = []
 
+        # scoring TaaT dengan NumPy (default jika numpy ter-install)
+        self.use_numpy = (np is not None) if use_numpy is None else use_numpy
+        if self.use_numpy and np is None:
+            raise ImportError("use_numpy=True membutuhkan numpy")
+
+        self.use_mmap = use_mmap
+        self.use_lexicon = use_lexicon
+        self.result_cache = result_cache
+        self.postings_cache_bytes = postings_cache_bytes
+        self.postings_cache_prewarm = postings_cache_prewarm
+
+        self.state = None
+        self.analyzer = None
+        self._state_lock = threading.Lock()
+
+        # update inkremental (lihat add_documents dan maybe_merge)
+        self.merge_policy = segments.TieredMergePolicy(merge_factor)
+        self.positional = positional
+        self._segments_lock = threading.Lock()
+        self._merge_lock = threading.Lock()
+        self.sharded = sharded
+        self.use_snapshot = use_snapshot
+
+    def _load_id_map(self, name):
+        """Memuat IdMap baru dari file {name}_str_to_id.dict dan {name}_id_to_str.dict"""
+        id_map = IdMap()
+        str_to_id_path = staticfiles_storage.url(f'{self.output_dir}/{name}_str_to_id.dict')[1:]
+        with open(str_to_id_path, 'rb') as f:
+            id_map.str_to_id = pickle.load(File(f))
+        id_to_str_path = staticfiles_storage.url(f'{self.output_dir}/{name}_id_to_str.dict')[1:]
+        with open(id_to_str_path, 'rb') as f:
+            id_map.id_to_str = pickle.load(File(f))
+        return id_map
+
     def load(self):
         """Memuat doc_id_map and term_id_map dari output directory"""
+        self.term_id_map = self._load_id_map('terms')
+        self.doc_id_map = self._load_id_map('docs')
+
+    def segment_names(self):
+        """
+        Nama segmen-segmen index yang aktif sesuai manifest (lihat
+        meedle.segments); tanpa manifest, index hanya berisi {index_name}.
+        """
+        manifest = segments.read_manifest(self.output_dir)
+        if manifest is None:
+            return [self.index_name]
+        return [segment['name'] for segment in manifest['segments']]
+
+    def shard_names(self):
+        """
+        Nama shard-shard index sesuai manifest shard (lihat meedle.shards),
+        atau None jika sharded tidak aktif, index belum di-shard, atau shard
+        dibuat dari segmen yang sudah tidak aktif lagi.
+        """
+        if not self.sharded:
+            return None
+        manifest = shards.read_manifest(self.output_dir)
+        if manifest is None or manifest["sources"] != self.segment_names():
+            return None
+        return [shard["name"] for shard in manifest["shards"]]
+
+    def index_files(self):
+        """Daftar path file yang menjadi sumber state index saat query."""
+        names = []
+        index_names = self.shard_names()
+        if index_names is not None:
+            names.append(shards.MANIFEST_NAME)
+        else:
+            index_names = self.segment_names()
+        if os.path.exists(segments.manifest_path(self.output_dir)):
+            names.append(segments.MANIFEST_NAME)
+        for index_name in index_names:
+            if self.lexicon_path(index_name) is not None:
+                names += [f'{index_name}.index', f'{index_name}.lex']
+            else:
+                names += ['terms_str_to_id.dict', 'terms_id_to_str.dict',
+                          'docs_str_to_id.dict', 'docs_id_to_str.dict',
+                          f'{index_name}.index', f'{index_name}.dict']
+            if self.positions_path(index_name) is not None:
+                names.append(f'{index_name}.pos')
+            if self.skips_path(index_name) is not None:
+                names.append(f'{index_name}.skip')
+            for pruned in (False, True):
+                if self.impacts_path(index_name, pruned) is not None:
+                    names.append(f'{index_name}{".pruned" if pruned else ""}.imp')
+        return [staticfiles_storage.url(f'{self.output_dir}/{name}')[1:] for name in names]
+
+    def lexicon_path(self, index_name = None):
+        """
+        Path lexicon biner {index_name}.lex (lihat meedle.lexicon) jika
+        use_lexicon aktif dan file-nya ada; None berarti pakai file pickle.
+        """
+        if not self.use_lexicon:
+            return None
+        index_name = index_name or self.index_name
+        path = staticfiles_storage.url(f'{self.output_dir}/{index_name}.lex')[1:]
+        return path if os.path.exists(path) else None
+
+    def positions_path(self, index_name = None):
+        """Path positional index {index_name}.pos, atau None jika tidak ada."""
+        index_name = index_name or self.index_name
+        path = staticfiles_storage.url(f'{self.output_dir}/{index_name}.pos')[1:]
+        return path if os.path.exists(path) else None
+
+    def skips_path(self, index_name = None):
+        """Path skip table {index_name}.skip, atau None jika tidak ada."""
+        index_name = index_name or self.index_name
+        path = staticfiles_storage.url(f'{self.output_dir}/{index_name}.skip')[1:]
+        return path if os.path.exists(path) else None
+
+    def impacts_file(self, index_name = None, pruned = False):
+        """Path {index_name}.imp (atau {index_name}.pruned.imp), ada atau tidak."""
+        index_name = index_name or self.index_name
+        return self._output_path(f'{index_name}{".pruned" if pruned else ""}.imp')
+
+    def impacts_path(self, index_name = None, pruned = False):
+        """Path impact-ordered index (lihat meedle.impacts), atau None jika tidak ada."""
+        path = self.impacts_file(index_name, pruned)
+        return path if os.path.exists(path) else None
+
+    def index_version(self):
+        """
+        Tanda versi index berupa tuple (mtime, size) dari setiap file index.
+        Jika salah satu file diganti (misal index di-build ulang), nilainya
+        akan berubah.
+        """
+        version = []
+        for path in self.index_files():
+            stat = os.stat(path)
+            version.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(version)
+
+    def _output_path(self, name):
+        return staticfiles_storage.url(f'{self.output_dir}/{name}')[1:]
+
+    def stem_table_path(self):
+        return staticfiles_storage.url(f'{self.output_dir}/stem_table.dict')[1:]
 
-        term_str_to_id_path = staticfiles_storage.url(f'{self.output_dir}/terms_str_to_id.dict')[1:]
-        with open(term_str_to_id_path, 'rb') as f:
-            self.term_id_map.str_to_id = pickle.load(File(f))
-        term_id_to_str_path = staticfiles_storage.url(f'{self.output_dir}/terms_id_to_str.dict')[1:]
-        with open(term_id_to_str_path, 'rb') as f:
-            self.term_id_map.id_to_str = pickle.load(File(f))
+    def stop_words_path(self):
+        return staticfiles_storage.url('stopwords/english')[1:]
 
-        doc_str_to_id_path = staticfiles_storage.url(f'{self.output_dir}/docs_str_to_id.dict')[1:]
-        with open(doc_str_to_id_path, 'rb') as f:
-            self.doc_id_map.str_to_id = pickle.load(File(f))
-        doc_id_to_str_path = staticfiles_storage.url(f'{self.output_dir}/docs_id_to_str.dict')[1:]
-        with open(doc_id_to_str_path, 'rb') as f:
-            self.doc_id_map.id_to_str = pickle.load(File(f))
+    def snapshot_file(self, index_name = None):
+        """Path startup snapshot {index_name}.snap, ada atau tidak."""
+        index_name = index_name or self.index_name
+        return self._output_path(f'{index_name}.snap')
 
-    
-    def retrieve_bm25(self, query, k = 10, k1 = 2, b = 0.75):
+    def _snapshot_sources(self, index_name):
+        """File-file yang isinya dicocokkan dengan checksum startup snapshot."""
+        return [self._output_path(f'{index_name}.index'), self.lexicon_path(index_name),
+                self.stop_words_path()]
+
+    def _load_snapshot(self):
+        """
+        StartupSnapshot untuk index yang akan dibuka, atau None jika
+        use_snapshot mati, index bersegmen atau ber-shard, tidak memiliki
+        lexicon, atau snapshot-nya tidak ada atau sudah tidak sesuai.
+        """
+        if not self.use_snapshot or self.shard_names() is not None:
+            return None
+        names = self.segment_names()
+        if len(names) != 1 or self.lexicon_path(names[0]) is None:
+            return None
+        path = self.snapshot_file(names[0])
+        if not os.path.exists(path):
+            return None
+        snapshot = StartupSnapshot(path)
+        if not snapshot.matches(snapshot_checksum(self._snapshot_sources(names[0]))):
+            return None
+        return snapshot
+
+    def write_snapshot(self, prewarm_terms = 0):
+        """
+        Menulis startup snapshot untuk index utama (lihat meedle.snapshot):
+        stem table mencakup semua token collection, sehingga query yang
+        hanya berisi kata-kata dari collection tidak perlu meng-import NLTK.
+        """
+        if self.lexicon_path() is None:
+            raise FileNotFoundError(f"index {self.index_name} tidak memiliki lexicon .lex")
+        self._load_analyzer()
+        stem_table = collection_stem_table(staticfiles_storage.url(self.data_dir)[1:],
+                                           self.analyzer, self.analyzer.stem_table)
+        state = self._load_segment_state(self.index_name, None, cache_bytes = 0)
+        try:
+            write_snapshot(self.snapshot_file(), snapshot_checksum(self._snapshot_sources(self.index_name)),
+                           state, self.analyzer.stop_words, stem_table, prewarm_terms)
+        finally:
+            state.close()
+        return len(stem_table)
+
+    def _load_analyzer(self, snapshot = None):
+        """Membuat Analyzer (stopwords dan stem table jika ada) cukup sekali."""
+        if snapshot is not None:
+            self.analyzer = Analyzer(snapshot.stop_words, stem_table=snapshot.stem_table)
+        if self.analyzer is not None:
+            return
+        self.analyzer = Analyzer.from_files(self.stop_words_path(), self.stem_table_path())
+
+    def _load_state(self, snapshot = None):
+        """
+        Memuat seluruh state index dari disk menjadi IndexState baru, atau
+        SegmentedState jika index terdiri dari beberapa segmen. snapshot
+        (lihat _load_snapshot) hanya dipakai untuk index satu segmen.
+        """
+        version = self.index_version()
+        names = self.shard_names()
+        if names is not None:
+            return shards.ShardedState(self._shard_kwargs(len(names)), names, version)
+        names = self.segment_names()
+        if len(names) == 1:
+            return self._load_segment_state(names[0], version, snapshot = snapshot)
+        for index_name in names:
+            if self.lexicon_path(index_name) is None:
+                raise FileNotFoundError(f"segmen {index_name} tidak memiliki lexicon .lex")
+        # budget PostingsCache dibagi ke setiap segmen sebanding ukuran file index-nya
+        sizes = [os.path.getsize(staticfiles_storage.url(f'{self.output_dir}/{index_name}.index')[1:])
+                 for index_name in names]
+        total_size = sum(sizes) or 1
+        states = []
+        try:
+            for index_name, size in zip(names, sizes):
+                cache_bytes = self.postings_cache_bytes * size // total_size
+                states.append(self._load_segment_state(index_name, version, cache_bytes))
+        except Exception:
+            for state in states:
+                state.close()
+            raise
+        return SegmentedState(states, version)
+
+    def _shard_kwargs(self, n_shards):
+        """Argumen BSBIIndex untuk worker process setiap shard."""
+        return dict(data_dir = self.data_dir, output_dir = self.output_dir,
+                    postings_encoding = self.postings_encoding, index_name = self.index_name,
+                    use_numpy = self.use_numpy, use_mmap = self.use_mmap,
+                    use_lexicon = self.use_lexicon,
+                    postings_cache_bytes = self.postings_cache_bytes // n_shards,
+                    postings_cache_prewarm = self.postings_cache_prewarm,
+                    positional = self.positional, use_snapshot = self.use_snapshot)
+
+    def _load_segment_state(self, index_name, version, cache_bytes = None, snapshot = None):
+        """
+        Memuat satu index (segmen) menjadi IndexState; dengan snapshot,
+        statistik koleksi dan pre-warming diambil dari startup snapshot.
+        """
+        if cache_bytes is None:
+            cache_bytes = self.postings_cache_bytes
+        lexicon_path = self.lexicon_path(index_name)
+        if lexicon_path is not None:
+            lexicon = Lexicon(lexicon_path)
+            term_id_map = lexicon.term_id_map
+            doc_id_map = lexicon.doc_id_map
+        else:
+            lexicon = None
+            term_id_map = FrozenIdMap.from_id_map(self._load_id_map('terms'))
+            doc_id_map = FrozenIdMap.from_id_map(self._load_id_map('docs'))
+        reader = InvertedIndexReader(index_name, directory=self.output_dir,
+                                     postings_encoding=self.postings_encoding,
+                                     use_mmap=self.use_mmap, lexicon=lexicon)
+        reader.__enter__()
+        if cache_bytes > 0:
+            reader.postings_cache = PostingsCache(cache_bytes)
+            if snapshot is not None:
+                snapshot.prewarm(reader.postings_cache, self.postings_cache_prewarm, arrays=self.use_numpy)
+            else:
+                reader.prewarm_postings_cache(self.postings_cache_prewarm, arrays=self.use_numpy)
+        positions_path = self.positions_path(index_name)
+        positions = PositionsReader(positions_path) if positions_path is not None else None
+        skips_path = self.skips_path(index_name)
+        skips = SkipsReader(skips_path) if skips_path is not None else None
+        impacts = [ImpactsReader(path) if path is not None else None
+                   for path in (self.impacts_path(index_name), self.impacts_path(index_name, True))]
+        return IndexState(term_id_map, doc_id_map, reader, version, positions, skips, *impacts,
+                          snapshot = snapshot)
+
+    def open(self):
+        """
+        Memuat index sekali dan menyimpannya sebagai state yang long-lived,
+        sehingga retrieve_bm25 berikutnya tidak perlu unpickle IdMap, membaca
+        stopwords, maupun membuka ulang file index. Aman dipanggil berulang kali.
+        """
+        with self._state_lock:
+            if self.state is None:
+                snapshot = self._load_snapshot()
+                self._load_analyzer(snapshot)
+                self._set_state(self._load_state(snapshot))
+        return self
+
+    def reload(self):
+        """
+        Memuat ulang index dari disk (misal setelah file index di-build ulang).
+        State lama tidak ditutup secara eksplisit karena mungkin masih dipakai
+        oleh query yang sedang berjalan; file handle-nya ditutup oleh garbage
+        collector setelah tidak ada lagi yang mereferensikannya.
+        """
+        with self._state_lock:
+            snapshot = self._load_snapshot()
+            self._load_analyzer(snapshot)
+            self._set_state(self._load_state(snapshot))
+        return self
+
+    def reload_if_changed(self):
+        """Reload index jika versi file index di disk berbeda dengan state saat ini."""
+        state = self.state
+        if state is not None and state.version != self.index_version():
+            self.reload()
+            return True
+        return False
+
+    def close(self):
+        """Menutup state index yang dibuka dengan open()."""
+        with self._state_lock:
+            if self.state is not None:
+                self.state.close()
+                self.state = None
+
+    def _set_state(self, state):
+        self.state = state
+        self.term_id_map = state.term_id_map
+        self.doc_id_map = state.doc_id_map
+
+    def preprocess_query(self, query):
+        """
+        Mengubah query string menjadi list of terms: hapus angka, tokenisasi,
+        buang stopwords, lalu stemming (sama seperti saat indexing).
+        """
+        self._load_analyzer()
+        return self.analyzer.analyze(query)
+
+    def parse_query(self, query):
+        """
+        Seperti preprocess_query, tetapi juga mengembalikan phrase di dalam
+        tanda kutip: (list of terms, list of tuple of terms).
+        """
+        self._load_analyzer()
+        return self.analyzer.analyze(query), self.analyzer.phrases(query)
+
+    def parse_boolean_query(self, query, mode = 'and'):
+        """Parse query boolean (lihat meedle.boolean) dengan operator default mode."""
+        self._load_analyzer()
+        return parse_boolean(query, self.analyzer, mode)
+
+    def term_weights(self, query, mode = 'ranked'):
+        """
+        {term: IDF} untuk setiap term query (setelah preprocessing) yang ada
+        di collection, misalnya untuk memilih passage snippet. Untuk boolean
+        query (mode 'and' atau 'or'), term yang di-negasi tidak ikut.
+        """
+        if mode == 'ranked':
+            filtered = self.preprocess_query(query)
+        else:
+            filtered = positive_terms(self.parse_boolean_query(query, mode))
+        state = self.state
+        if state is None:
+            state = self._load_state()
+            try:
+                weights = {term: state.term_weight(term) for term in filtered}
+            finally:
+                state.close()
+        else:
+            weights = {term: state.term_weight(term) for term in filtered}
+        return {term: weight for term, weight in weights.items() if weight is not None}
+
+    def save(self):
+        """Menyimpan doc_id_map and term_id_map ke output directory via pickle"""
+        for name, id_map in (('terms', self.term_id_map), ('docs', self.doc_id_map)):
+            str_to_id_path = staticfiles_storage.url(f'{self.output_dir}/{name}_str_to_id.dict')[1:]
+            with open(str_to_id_path, 'wb') as f:
+                pickle.dump(id_map.str_to_id, f)
+            id_to_str_path = staticfiles_storage.url(f'{self.output_dir}/{name}_id_to_str.dict')[1:]
+            with open(id_to_str_path, 'wb') as f:
+                pickle.dump(id_map.id_to_str, f)
+
+    def _parse_blocks(self, blocks, max_workers):
+        """
+        Generator (nama block, hasil parse_block) sesuai urutan blocks.
+        Block di-parse paralel oleh process pool, tetapi paling banyak
+        2 * max_workers block yang hasilnya ditahan di memori sekaligus.
+        """
+        data_path = staticfiles_storage.url(self.data_dir)[1:]
+        window = 2 * (max_workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            pending = deque()
+            for block in blocks:
+                pending.append((block, executor.submit(parse_block, os.path.join(data_path, block),
+                                                       block, self.analyzer, self.positional)))
+                if len(pending) >= window:
+                    block_name, future = pending.popleft()
+                    yield block_name, future.result()
+            while pending:
+                block_name, future = pending.popleft()
+                yield block_name, future.result()
+
+    def invert_write(self, docs, index, positions = None):
+        """
+        Melakukan inversion hasil parse satu block dan menuliskannya ke
+        intermediate index dengan urutan termID menaik, sehingga bisa
+        di-merge secara streaming.
+
+        Parameters
+        ----------
+        docs: List[(str, Counter, dict)]
+            Keluaran parse_block
+        index: InvertedIndexWriter
+            Inverted index pada disk (file) yang terkait dengan suatu "block"
+        positions: PositionsWriter
+            Positional index block tersebut; None jika tidak positional
+        """
+        term_dict = {}
+        for doc_name, term_tfs, doc_positions in docs:
+            doc_id = self.doc_id_map[doc_name]
+            for term, tf in term_tfs.items():
+                term_positions = doc_positions[term] if positions is not None else None
+                term_dict.setdefault(self.term_id_map[term], []).append((doc_id, tf, term_positions))
+        for term_id in sorted(term_dict):
+            postings = sorted(term_dict[term_id], key=lambda posting: posting[0])
+            index.append(term_id, [doc_id for doc_id, _, _ in postings], [tf for _, tf, _ in postings])
+            if positions is not None:
+                positions.append(term_id, [term_positions for _, _, term_positions in postings])
+
+    def merge(self, indices, merged_index, positions = None):
+        """
+        Lakukan merging ke semua intermediate inverted indices menjadi
+        sebuah single index.
+
+        Ini adalah bagian yang melakukan EXTERNAL MERGE SORT: setiap
+        intermediate index sudah terurut menurut termID, jadi cukup satu
+        heapq.merge k-way yang membaca semua index secara streaming.
+
+        Parameters
+        ----------
+        indices: List[InvertedIndexReader]
+            A list of intermediate InvertedIndexReader objects, masing-masing
+            merepresentasikan sebuah intermediate inveted index yang iterable
+            di sebuah block.
+
+        merged_index: InvertedIndexWriter
+            Instance InvertedIndexWriter object yang merupakan hasil merging dari
+            semua intermediate InvertedIndexWriter objects.
+
+        positions: (List[PositionsReader], PositionsWriter)
+            Positional index setiap intermediate index (urutan sama dengan
+            indices) dan positional index hasil merge; None jika tidak
+            positional. Block di-index berurutan sehingga docID block
+            berikutnya selalu lebih besar, jadi data posisi sebuah term cukup
+            disambung sesuai urutan block.
+        """
+        def tagged(i, index):
+            for t, postings_, tf_list_ in index:
+                yield t, postings_, tf_list_, i
+
+        # heapq.merge stabil: termID yang sama keluar sesuai urutan block, dan
+        # docID block berikutnya selalu lebih besar, jadi postings cukup disambung
+        merged_iter = heapq.merge(*(tagged(i, index) for i, index in enumerate(indices)),
+                                  key = lambda x: x[0])
+        curr = None
+        for t, postings_, tf_list_, i in merged_iter:
+            if t == curr:
+                postings.extend(postings_)
+                tf_list.extend(tf_list_)
+                chunks.append((tf_list_, i))
+            else:
+                if curr is not None:
+                    self._append_merged(merged_index, positions, curr, postings, tf_list, chunks)
+                curr, postings, tf_list = t, list(postings_), list(tf_list_)
+                chunks = [(tf_list_, i)]
+        if curr is not None:
+            self._append_merged(merged_index, positions, curr, postings, tf_list, chunks)
+
+    @staticmethod
+    def _append_merged(merged_index, positions, term, postings, tf_list, chunks):
+        merged_index.append(term, postings, tf_list)
+        if positions is not None:
+            readers, writer = positions
+            writer.append_encoded(term, [(tfs, readers[i].encoded(term, len(tfs)))
+                                         for tfs, i in chunks])
+
+    def index(self, max_workers = None):
+        """
+        Base indexing code
+        BAGIAN UTAMA untuk melakukan Indexing dengan skema BSBI (blocked-sort
+        based indexing)
+
+        Method ini scan terhadap semua data di collection, parse setiap block
+        secara paralel dengan process pool (lihat parse_block), lalu invert dan
+        tulis setiap block ke intermediate index, kemudian merge semua
+        intermediate index menjadi {index_name} beserta lexicon binernya.
+        """
+        self._load_analyzer()
+        self.term_id_map = IdMap()
+        self.doc_id_map = IdMap()
+        self.intermediate_indices = []
+
+        # tqdm hanya dibutuhkan saat indexing, tidak di jalur search (cold start)
+        from tqdm import tqdm
+
+        data_path = staticfiles_storage.url(self.data_dir)[1:]
+        blocks = sorted(next(os.walk(data_path))[1], key=_natural_key)
+        for block, docs in tqdm(self._parse_blocks(blocks, max_workers), total=len(blocks)):
+            index_id = 'intermediate_index_' + block
+            self.intermediate_indices.append(index_id)
+            with contextlib.ExitStack() as stack:
+                index = stack.enter_context(InvertedIndexWriter(index_id, self.postings_encoding, directory = self.output_dir))
+                positions = None
+                if self.positional:
+                    positions = stack.enter_context(PositionsWriter(self._output_path(f'{index_id}.pos')))
+                self.invert_write(docs, index, positions)
+
+        self.save()
+
+        with InvertedIndexWriter(self.index_name, self.postings_encoding, directory = self.output_dir) as merged_index:
+            with contextlib.ExitStack() as stack:
+                indices = [stack.enter_context(InvertedIndexReader(index_id, self.postings_encoding, directory=self.output_dir))
+                               for index_id in self.intermediate_indices]
+                positions = None
+                if self.positional:
+                    readers = [PositionsReader(self._output_path(f'{index_id}.pos'))
+                               for index_id in self.intermediate_indices]
+                    for reader in readers:
+                        stack.callback(reader.close)
+                    writer = stack.enter_context(PositionsWriter(self._output_path(f'{self.index_name}.pos')))
+                    positions = (readers, writer)
+                self.merge(indices, merged_index, positions)
+        if not self.positional and self.positions_path() is not None:
+            # positional index lama sudah tidak sesuai dengan index baru
+            os.remove(self.positions_path())
+
+        write_lexicon(staticfiles_storage.url(f'{self.output_dir}/{self.index_name}.lex')[1:],
+                      merged_index.postings_dict, merged_index.terms, merged_index.doc_length,
+                      self.term_id_map.id_to_str, self.doc_id_map.id_to_str,
+                      self.postings_encoding.name)
+        write_skips(self._output_path(f'{self.index_name}.skip'), merged_index.index_file_path,
+                    merged_index.postings_dict, merged_index.doc_length, self.postings_encoding.name)
+        write_stem_table(self.stem_table_path(), self.term_id_map.id_to_str)
+        state = self._load_segment_state(self.index_name, None)
+        try:
+            scale, impacts = compute_impacts(state)
+            write_impacts(self.impacts_file(), impacts, scale)
+        finally:
+            state.close()
+        if self.impacts_path(pruned = True) is not None:
+            # index yang di-prune dikalibrasi ulang lewat build_impacts
+            os.remove(self.impacts_path(pruned = True))
+        if os.path.exists(self.snapshot_file()):
+            # startup snapshot lama tidak sesuai lagi; dibuat ulang lewat build_snapshot
+            os.remove(self.snapshot_file())
+
+        # index baru sudah memuat seluruh collection; segmen delta dan shard lama tidak berlaku
+        shards.remove_shards(self.output_dir)
+        manifest = segments.read_manifest(self.output_dir)
+        if manifest is not None:
+            os.remove(segments.manifest_path(self.output_dir))
+            for segment in manifest["segments"]:
+                if segment["name"] != self.index_name:
+                    for path in segments.segment_files(self.output_dir, segment["name"]):
+                        if os.path.exists(path):
+                            os.remove(path)
+
+    def _segments_manifest(self):
+        """
+        Manifest segmen saat ini; jika belum ada, dibuat dari index utama
+        (yang harus sudah memiliki lexicon .lex).
+        """
+        manifest = segments.read_manifest(self.output_dir)
+        if manifest is not None:
+            return manifest
+        lexicon_path = self.lexicon_path()
+        if lexicon_path is None:
+            raise FileNotFoundError("index bersegmen membutuhkan lexicon "
+                                    f"{self.index_name}.lex (jalankan build_lexicon)")
+        lexicon = Lexicon(lexicon_path)
+        try:
+            docs = len(lexicon.doc_length)
+        finally:
+            lexicon.close()
+        return {"generation": 0, "segments": [{"name": self.index_name, "docs": docs}]}
+
+    def add_documents(self, docs, merge = True):
+        """
+        Menambahkan dokumen baru ke index tanpa rebuild: dokumen di-analyze
+        dan ditulis sebagai segmen delta baru (lihat meedle.segments), lalu
+        manifest diganti secara atomik. Query yang sedang berjalan tetap
+        memakai state lama; state baru dimuat jika index sudah di-open().
+
+        Parameters
+        ----------
+        docs: List[(str, str)]
+            List of (nama dokumen, isi dokumen). Nama dokumen harus unik.
+        merge(bool): jalankan maybe_merge() di background setelahnya.
+
+        Returns
+        -------
+        str
+            Nama segmen baru, atau None jika tidak ada dokumen yang memiliki term.
+        """
+        self._load_analyzer()
+        analyzed = []
+        for name, text in docs:
+            terms = self.analyzer.analyze(text)
+            if terms:
+                analyzed.append((name, Counter(terms),
+                                 term_positions(terms) if self.positional else None))
+        if not analyzed:
+            return None
+        with self._segments_lock:
+            manifest = self._segments_manifest()
+            manifest["generation"] += 1
+            name = f'delta_{manifest["generation"]}'
+            doc_count = segments.write_segment(self.output_dir, name, analyzed, self.postings_encoding)
+            manifest["segments"].append({"name": name, "docs": doc_count})
+            segments.write_manifest(self.output_dir, manifest)
+        if self.state is not None:
+            self.reload()
+        if merge:
+            self.maybe_merge(background = True)
+        return name
+
+    def maybe_merge(self, background = False):
+        """
+        Menggabungkan segmen-segmen sesuai TieredMergePolicy sampai tidak
+        ada lagi yang perlu di-merge. Segmen baru ditulis dengan nama baru,
+        manifest diganti secara atomik (segmen hasil merge menempati posisi
+        segmen pertama yang di-merge), baru kemudian file segmen lama dihapus;
+        reader tidak pernah di-block.
+
+        Jika background=True, merge dijalankan di thread terpisah dan method
+        ini langsung mengembalikan thread tersebut.
+        """
+        if background:
+            thread = threading.Thread(target=self.maybe_merge, daemon=True)
+            thread.start()
+            return thread
+        with self._merge_lock:
+            while True:
+                manifest = segments.read_manifest(self.output_dir)
+                if manifest is None:
+                    return None
+                to_merge = self.merge_policy.find_merge(manifest["segments"])
+                if to_merge is None:
+                    return None
+                with self._segments_lock:
+                    manifest = segments.read_manifest(self.output_dir)
+                    manifest["generation"] += 1
+                    new_name = f'merged_{manifest["generation"]}'
+                    segments.write_manifest(self.output_dir, manifest)
+                doc_count = segments.merge_segments(self.output_dir, to_merge, new_name,
+                                                    self.postings_encoding)
+                with self._segments_lock:
+                    # add_documents mungkin menambah segmen selama merge berjalan
+                    manifest = segments.read_manifest(self.output_dir)
+                    merged = {"name": new_name, "docs": doc_count}
+                    remaining = []
+                    for segment in manifest["segments"]:
+                        if segment["name"] == to_merge[0]:
+                            remaining.append(merged)
+                        elif segment["name"] not in to_merge:
+                            remaining.append(segment)
+                    manifest["segments"] = remaining
+                    segments.write_manifest(self.output_dir, manifest)
+                if self.state is not None:
+                    self.reload()
+                for name in to_merge:
+                    if name == self.index_name:
+                        # file index utama tidak dihapus agar bisa dipakai ulang
+                        continue
+                    for path in segments.segment_files(self.output_dir, name):
+                        if os.path.exists(path):
+                            os.remove(path)
+
+    def retrieve_bm25(self, query, k = 10, k1 = 2, b = 0.75, method = 'taat', proximity = False):
         """
         Melakukan Ranked Retrieval dengan skema BM25 dan TaaT (Term-at-a-Time).
         Method akan mengembalikan top-K retrieval results.
 
+        Selain TaaT, tersedia juga Document-at-a-Time dengan early termination
+        WAND (method='wand') dan Block-Max WAND (method='bmw'). Keduanya hanya
+        menghitung skor dokumen yang upper bound-nya bisa masuk top-K, dan
+        menghasilkan ranking yang sama dengan TaaT.
+
+        Jika index memiliki positional index, bagian query di dalam tanda
+        kutip ("radioactive iodoacetate") adalah phrase: hanya dokumen yang
+        memuat phrase tersebut yang dikembalikan. proximity=True menambahkan
+        skor untuk dokumen yang term-term query-nya berdekatan (lihat
+        _retrieve_positional).
+
         w(t, D) = ((k + 1) * tf(t, D)) / (k * ((1 - b) + b * dl/avdl) + tf(t, D))
 
         w(t, Q) = IDF = log (N / df(t))
@@ -429,6 +1675,8 @@ class BSBIIndex:
 
             contoh: Query "universitas indonesia depok" artinya ada
             tiga terms: universitas, indonesia, dan depok
+        method: str
+            'taat', 'wand', atau 'bmw'
 
         Result
         ------
@@ -441,57 +1689,663 @@ class BSBIIndex:
 
         """
         # TODO
-        if len(self.term_id_map) == 0 or len(self.doc_id_map) == 0:
-            self.load()
-        
-        # create stemmer
-        stemmer = PorterStemmer()
-
-        # list of stopwords
-        # stop_words = set(stopwords.words('english'))
-        with open(staticfiles_storage.url('stopwords/english')[1:]) as f:
-            stop_words = f.read().split()
-        stop_words = set(stop_words)
-
-        # tokenize
-        tokenizer = RegexpTokenizer(r'\w+')
-        rem_num = re.sub('[0-9]+', '', query)
-        query_term = tokenizer.tokenize(rem_num)
-        filtered = [stemmer.stem(t) for t in query_term if not t.lower() in stop_words]
-        heap = []
-
-        with InvertedIndexReader(self.index_name, directory=self.output_dir, postings_encoding=
-                                 self.postings_encoding) as mapper:
-            
-            N = len(mapper.doc_length)
-            avdl = sum(mapper.doc_length.values()) / N
+        if method not in self.RETRIEVAL_METHODS:
+            raise ValueError(f"method retrieval tidak dikenal: {method}")
+
+        with metrics.query_trace('ranked'):
+            state = self.state
+            if state is None:
+                # tanpa open(): muat index khusus untuk query ini saja
+                state = self._load_state()
+                self.term_id_map = state.term_id_map
+                self.doc_id_map = state.doc_id_map
+                try:
+                    return self._retrieve_bm25(state, query, k, k1, b, method, proximity)
+                finally:
+                    state.close()
+            return self._retrieve_bm25(state, query, k, k1, b, method, proximity)
+
+    def _retrieve_bm25(self, state, query, k, k1, b, method, proximity = False):
+        """Implementasi retrieve_bm25 di atas sebuah IndexState."""
+        trace = metrics.current()
+        if trace is not None:
+            start = time.perf_counter()
+        filtered, phrases = self.parse_query(query)
+        if trace is not None:
+            trace.add_time('analysis', time.perf_counter() - start)
+
+        cache = self.result_cache
+        if cache is not None:
+            key = self._result_cache_key(state, filtered, k, k1, b, phrases, proximity)
+            result = cache.get(key)
+            if result is not None:
+                if trace is not None:
+                    trace.count('result_cache_hits')
+                return list(result)
+
+        if trace is not None:
+            mark = trace.mark()
+        result = self._score(state, filtered, k, k1, b, method, phrases, proximity)
+        if trace is not None:
+            trace.add_remainder('scoring', mark)
+        if cache is not None:
+            cache.set(key, result)
+            return list(result)
+        return result
 
-            for term in filtered:
-                # handle term yg tidak ada di collection
-                if self.term_id_map[term] not in mapper.postings_dict:
+    @staticmethod
+    def _result_cache_key(state, filtered, k, k1, b, phrases = (), proximity = False):
+        # Semua method menghasilkan ranking yang sama, jadi method tidak perlu
+        # masuk ke key. Versi index ikut di key agar cache otomatis invalid
+        # setelah index di-reload.
+        return (state.version, tuple(filtered), k, k1, b, tuple(phrases), proximity)
+
+    def _score(self, state, filtered, k, k1, b, method, phrases = (), proximity = False):
+        """Menghitung top-K untuk list of terms yang sudah di-preprocess."""
+        if state.shards is not None:
+            return state.score(filtered, k, k1, b, method, phrases, proximity)
+        if state.segments is not None:
+            # scoring per segmen dengan statistik global, lalu gabungkan top-K
+            # (heapq.merge stabil: skor sama diurutkan sesuai urutan segmen)
+            per_segment = [self._score(segment, filtered, k, k1, b, method, phrases, proximity)
+                           for segment in state.segments]
+            return self._merge_top_k(per_segment, k)
+        if state.positions is not None and (phrases or (proximity and len(set(filtered)) > 1)):
+            return self._retrieve_positional(state, filtered, phrases, k, k1, b, method, proximity)
+        if method == 'wand':
+            result = self._retrieve_daat(state, filtered, k, k1, b, use_block_max=False)
+        elif method == 'bmw':
+            result = self._retrieve_daat(state, filtered, k, k1, b, use_block_max=True)
+        elif self.use_numpy:
+            result = self._retrieve_taat_numpy(state, filtered, k, k1, b)
+        else:
+            result = self._retrieve_taat(state, filtered, k, k1, b)
+        return result
+
+    @staticmethod
+    def _merge_top_k(per_segment, k):
+        """Menggabungkan top-K setiap segmen (heapq.merge stabil: skor sama diurutkan sesuai urutan segmen)."""
+        trace = metrics.current()
+        if trace is not None:
+            start = time.perf_counter()
+        merged = heapq.merge(*per_segment, key=lambda t: -t[0])
+        result = [result for _, result in zip(range(k), merged)]
+        if trace is not None:
+            trace.add_time('merge', time.perf_counter() - start)
+        return result
+
+    def retrieve_boolean(self, query, k = 10, k1 = 2, b = 0.75, mode = 'and'):
+        """
+        Boolean retrieval: hanya dokumen yang memenuhi query boolean (AND, OR,
+        NOT, tanda kurung, -term dan phrase; lihat meedle.boolean) yang
+        dikembalikan, diurutkan dengan skor BM25 term-term yang tidak
+        di-negasi. mode adalah operator untuk term yang ditulis berurutan
+        tanpa operator: 'and' atau 'or'.
+
+        Irisan postings dihitung dengan BlockPostingsCursor, sehingga jika
+        index memiliki skip table (.skip) blok postings yang tidak memuat
+        kandidat tidak di-decode. Phrase dicek dengan positional index jika
+        ada; tanpa positional index, phrase sama dengan AND term-term-nya.
+
+        Result
+        ------
+        List[(int, str)]
+            Sama seperti retrieve_bm25.
+        """
+        if mode not in self.BOOLEAN_MODES:
+            raise ValueError(f"mode boolean tidak dikenal: {mode}")
+
+        with metrics.query_trace('boolean'):
+            state = self.state
+            if state is None:
+                state = self._load_state()
+                self.term_id_map = state.term_id_map
+                self.doc_id_map = state.doc_id_map
+                try:
+                    return self._retrieve_boolean(state, query, k, k1, b, mode)
+                finally:
+                    state.close()
+            return self._retrieve_boolean(state, query, k, k1, b, mode)
+
+    def _retrieve_boolean(self, state, query, k, k1, b, mode):
+        trace = metrics.current()
+        if trace is not None:
+            start = time.perf_counter()
+        node = self.parse_boolean_query(query, mode)
+        if trace is not None:
+            trace.add_time('analysis', time.perf_counter() - start)
+
+        cache = self.result_cache
+        if cache is not None:
+            # node sudah memuat operator default, jadi mode tidak perlu masuk ke key
+            key = ('boolean', state.version, node, k, k1, b)
+            result = cache.get(key)
+            if result is not None:
+                if trace is not None:
+                    trace.count('result_cache_hits')
+                return list(result)
+
+        if trace is not None:
+            mark = trace.mark()
+        result = self._score_boolean(state, node, k, k1, b)
+        if trace is not None:
+            trace.add_remainder('scoring', mark)
+        if cache is not None:
+            cache.set(key, result)
+            return list(result)
+        return result
+
+    def _score_boolean(self, state, node, k, k1, b):
+        if node is None:
+            return []
+        if state.shards is not None:
+            return state.score_boolean(node, positive_terms(node), k, k1, b)
+        if state.segments is not None:
+            per_segment = [self._score_boolean(segment, node, k, k1, b) for segment in state.segments]
+            return self._merge_top_k(per_segment, k)
+
+        mapper = state.reader
+
+        def cursor_for(term):
+            term_id = state.term_id_map.get(term)
+            if term_id not in mapper.postings_dict:
+                return None
+            return mapper.get_postings_cursor(term_id, state.skips)
+
+        phrase_filter = None
+        if state.positions is not None:
+            entries = {}
+
+            def positions_of(term, doc_id):
+                if term not in entries:
+                    term_id = state.term_id_map.get(term)
+                    postings_list, tf_list = mapper.get_postings_list(term_id)
+                    entries[term] = (postings_list, state.positions.term(term_id, postings_list, tf_list))
+                postings_list, positions = entries[term]
+                return positions.get(bisect.bisect_left(postings_list, doc_id))
+
+            def phrase_filter(phrase, doc_id):
+                return self._has_phrase(phrase, doc_id, positions_of)
+
+        evaluator = BooleanEvaluator(cursor_for, state.all_doc_ids, phrase_filter)
+        candidates = evaluator.evaluate(node)
+        scores = self._score_candidates(state, positive_terms(node), candidates, k1, b)
+        trace = metrics.current()
+        if trace is not None:
+            start = time.perf_counter()
+        top_k = heapq.nlargest(k, range(len(candidates)), key=lambda j: (scores[j], -candidates[j]))
+        result = [(scores[j], state.doc_id_map[candidates[j]]) for j in top_k]
+        if trace is not None:
+            trace.add_time('selection', time.perf_counter() - start)
+        return result
+
+    def retrieve_impact(self, query, k = 10, max_postings = None, max_micros = None, pruned = False):
+        """
+        Score-at-a-time di atas impact-ordered index {index_name}.imp (lihat
+        meedle.impacts): postings semua term query diproses dari impact
+        terbesar, dan pemrosesan berhenti setelah max_postings posting atau
+        max_micros mikrodetik (anytime). pruned=True memakai index yang
+        di-prune secara statis, {index_name}.pruned.imp.
+
+        Skor adalah jumlah impact terkuantisasi dibagi skala kuantisasi, yaitu
+        pendekatan skor BM25 dengan k1 dan b saat index impact dibuat (default
+        2 dan 0.75). Tanpa budget dan pruning, hasilnya hanya berbeda dari
+        retrieve_bm25 karena pembulatan impact.
+
+        Result
+        ------
+        List[(float, str)]
+            Sama seperti retrieve_bm25.
+        """
+        state = self.state
+        if state is None:
+            state = self._load_state()
+            self.term_id_map = state.term_id_map
+            self.doc_id_map = state.doc_id_map
+            try:
+                return self._retrieve_impact(state, self.preprocess_query(query), k,
+                                             max_postings, max_micros, pruned)[0]
+            finally:
+                state.close()
+        return self._retrieve_impact(state, self.preprocess_query(query), k,
+                                     max_postings, max_micros, pruned)[0]
+
+    def _retrieve_impact(self, state, filtered, k, max_postings = None, max_micros = None,
+                         pruned = False, min_level = 0):
+        """
+        Implementasi retrieve_impact; mengembalikan (top-K, banyaknya posting
+        yang diproses). min_level melewati impact di bawahnya saat query.
+        """
+        if state.segments is not None or state.shards is not None:
+            raise ValueError("impact-ordered index hanya tersedia untuk index satu segmen")
+        impacts = state.pruned_impacts if pruned else state.impacts
+        if impacts is None:
+            raise ValueError("index tidak memiliki impact-ordered index "
+                             f"{'.pruned' if pruned else ''}.imp (jalankan build_impacts)")
+        term_groups = [impacts.groups(state.term_id_map.get(term)) for term in filtered]
+        top_k, processed = score_at_a_time(term_groups, state.doc_id_bound, k, max_postings,
+                                           max_micros, min_level, self.use_numpy)
+        return [(score / impacts.scale, state.doc_id_map[doc_id]) for score, doc_id in top_k], processed
+
+    def retrieve_bm25_batch(self, queries, k1 = 2, b = 0.75, method = 'taat', max_workers = None):
+        """
+        Menjalankan banyak query BM25 sekaligus.
+
+        Term yang dipakai bersama oleh beberapa query hanya dibaca dan
+        di-decode sekali untuk satu batch, lalu setiap query di-scoring
+        (opsional secara paralel dengan thread pool). Hasil untuk setiap query
+        sama persis dengan retrieve_bm25.
+
+        Parameters
+        ----------
+        queries: List[(str, int)]
+            List of tuple (query, k)
+        max_workers: int
+            Banyaknya thread untuk scoring; None atau 1 berarti berurutan.
+
+        Result
+        ------
+        List[List[(float, str)]]
+            Hasil retrieve_bm25 untuk setiap query, dengan urutan yang sama
+            seperti queries.
+        """
+        if method not in self.RETRIEVAL_METHODS:
+            raise ValueError(f"method retrieval tidak dikenal: {method}")
+
+        state = self.state
+        if state is None:
+            state = self._load_state()
+            self.term_id_map = state.term_id_map
+            self.doc_id_map = state.doc_id_map
+            try:
+                return self._retrieve_bm25_batch(state, queries, k1, b, method, max_workers)
+            finally:
+                state.close()
+        return self._retrieve_bm25_batch(state, queries, k1, b, method, max_workers)
+
+    def _retrieve_bm25_batch(self, state, queries, k1, b, method, max_workers):
+        """Implementasi retrieve_bm25_batch di atas sebuah IndexState."""
+        results = [None] * len(queries)
+        pending = []
+        cache = self.result_cache
+        for i, (query, k) in enumerate(queries):
+            filtered, phrases = self.parse_query(query)
+            if cache is not None:
+                cached = cache.get(self._result_cache_key(state, filtered, k, k1, b, phrases))
+                if cached is not None:
+                    results[i] = list(cached)
                     continue
+            pending.append((i, filtered, phrases, k))
+
+        # baca dan decode setiap term unik sekali untuk seluruh batch
+        if state.segments is None and state.shards is None:
+            term_ids = {state.term_id_map.get(term) for (_, filtered, _, _) in pending for term in filtered}
+            arrays = method == 'taat' and self.use_numpy
+            batch_state = state.with_reader(BatchPostingsReader(state.reader, term_ids, arrays))
+        else:
+            batch_state = state
+
+        def run(item):
+            i, filtered, phrases, k = item
+            result = self._score(batch_state, filtered, k, k1, b, method, phrases)
+            if cache is not None:
+                cache.set(self._result_cache_key(state, filtered, k, k1, b, phrases), result)
+            return i, list(result)
+
+        if max_workers and max_workers > 1 and len(pending) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                scored = list(executor.map(run, pending))
+        else:
+            scored = [run(item) for item in pending]
+        for i, result in scored:
+            results[i] = result
+        return results
+
+    def _retrieve_taat(self, state, filtered, k, k1, b):
+        """
+        Term-at-a-Time dengan score accumulator berupa array('d') yang
+        diindeks langsung dengan docID. Nama dokumen hanya di-resolve untuk
+        top-K akhir, dan top-K dipilih dengan heapq.nlargest tanpa mengurutkan
+        semua dokumen. Dokumen dengan skor sama diurutkan berdasarkan docID.
+        """
+        mapper = state.reader
+        norms = state.length_norm(k1, b)
+
+        accumulator = array('d', bytes(8 * state.doc_id_bound))
+        seen = bytearray(state.doc_id_bound)
+        candidates = []
+
+        for term in filtered:
+            term_id = state.term_id_map.get(term)
+            # handle term yg tidak ada di collection
+            if term_id not in mapper.postings_dict:
+                continue
+
+            wtq = state.idf(term, term_id)
+            postings_list, tf_list = mapper.get_postings_list(term_id)
+            for doc_id, tf in zip(postings_list, tf_list):
+                wtd = ((k1 + 1) * tf) / (norms[doc_id] + tf)
+                accumulator[doc_id] += wtq * wtd
+                if not seen[doc_id]:
+                    seen[doc_id] = 1
+                    candidates.append(doc_id)
+
+        trace = metrics.current()
+        if trace is not None:
+            start = time.perf_counter()
+        top_k = heapq.nlargest(k, candidates, key=lambda d: (accumulator[d], -d))
+        result = [(accumulator[doc_id], state.doc_id_map[doc_id]) for doc_id in top_k]
+        if trace is not None:
+            trace.add_time('selection', time.perf_counter() - start)
+        return result
+
+    def _retrieve_taat_numpy(self, state, filtered, k, k1, b):
+        """
+        Sama seperti _retrieve_taat, tetapi kontribusi satu term dihitung
+        sebagai satu ekspresi NumPy atas seluruh postings-nya lalu di-scatter
+        ke accumulator. Urutan operasi floating point sama persis dengan versi
+        python, sehingga skor dan ranking-nya identik.
+        """
+        if k <= 0:
+            # np.partition tidak menerima kth di luar array
+            return []
+        mapper = state.reader
+        norms = state.length_norm(k1, b, use_numpy=True)
+
+        accumulator = np.zeros(state.doc_id_bound)
+        seen = np.zeros(state.doc_id_bound, dtype=bool)
+
+        for term in filtered:
+            term_id = state.term_id_map.get(term)
+            # handle term yg tidak ada di collection
+            if term_id not in mapper.postings_dict:
+                continue
+
+            wtq = state.idf(term, term_id)
+            postings, tfs = mapper.get_postings_arrays(term_id)
+            # docID di satu postings list unik, jadi fancy-index += aman
+            accumulator[postings] += wtq * (((k1 + 1) * tfs) / (norms[postings] + tfs))
+            seen[postings] = True
+
+        trace = metrics.current()
+        if trace is not None:
+            start = time.perf_counter()
+        candidates = np.flatnonzero(seen)
+        scores = accumulator[candidates]
+        if k < len(candidates):
+            # buang kandidat di bawah skor ke-k sebelum diurutkan
+            kth_score = np.partition(scores, len(scores) - k)[len(scores) - k]
+            keep = scores >= kth_score
+            candidates = candidates[keep]
+            scores = scores[keep]
+        # urutkan skor menurun, lalu docID menaik untuk skor yang sama
+        order = np.lexsort((candidates, -scores))[:k]
+        result = [(float(scores[i]), state.doc_id_map[int(candidates[i])]) for i in order]
+        if trace is not None:
+            trace.add_time('selection', time.perf_counter() - start)
+        return result
+
+    def _open_cursor(self, state, order, term, term_id, k1, b):
+        """
+        Membuat PostingsCursor untuk sebuah term. Upper bound skor (max_score
+        dan block_max) disimpan di state.score_bounds per (termID, k1, b).
+
+        Jika skip table index menyimpan skor maksimum blok untuk k1, b dan
+        avdl ini, upper bound dibaca dari file .skip tanpa men-decode
+        postings. Selain itu (postings list satu blok, k1/b lain, atau
+        segmen dengan statistik koleksi global) upper bound dihitung sekali
+        dari postings yang sudah di-decode.
+        """
+        mapper = state.reader
+        wtq = state.idf(term, term_id)
+
+        key = (term_id, k1, b)
+        bounds = state.score_bounds.get(key)
+        if bounds is None:
+            skips = state.skips
+            weights = None
+            if skips is not None and skips.has_block_max(k1, b, state.avdl):
+                weights = skips.block_max(term_id)
+            if weights is not None:
+                block_last = skips.table(term_id)[:len(weights)].tolist()
+            else:
+                postings_list, tf_list = mapper.get_postings_list(term_id)
+                weights = block_max_weights(postings_list, tf_list, state.length_norm(k1, b),
+                                            k1, PostingsCursor.BLOCK_SIZE)
+                block_last = [postings_list[min(start + PostingsCursor.BLOCK_SIZE, len(postings_list)) - 1]
+                              for start in range(0, len(postings_list), PostingsCursor.BLOCK_SIZE)]
+            # sedikit dilonggarkan agar error pembulatan saat menjumlahkan
+            # upper bound tidak membuang dokumen yang seharusnya masuk
+            block_max = [wtq * weight * (1 + 1e-9) for weight in weights]
+            bounds = (max(block_max), block_last, block_max)
+            state.score_bounds[key] = bounds
+
+        max_score, block_last, block_max = bounds
+        postings = mapper.get_postings_cursor(term_id, state.skips)
+        return PostingsCursor(order, postings, wtq, max_score, block_last, block_max)
+
+    def _retrieve_positional(self, state, filtered, phrases, k, k1, b, method, proximity):
+        """
+        Scoring dengan positional index, dalam dua tahap agar posisi hanya
+        dibaca untuk sedikit dokumen:
+
+        1. Kandidat. Untuk phrase query, irisan postings semua term phrase
+           (leapfrog: setiap postings list dilompati dengan binary search ke
+           docID kandidat berikutnya), lalu hanya kandidat tersebut yang dicek
+           posisinya. Tanpa phrase, kandidatnya adalah PROXIMITY_DEPTH dokumen
+           teratas BM25 biasa.
+        2. Skor BM25 kandidat, ditambah (jika proximity) skor term-pair
+           proximity ala BM25TP: untuk setiap pasangan term query a dan b,
+           acc = sum 1 / jarak^2 untuk setiap pasangan kemunculan dengan jarak
+           paling jauh PROXIMITY_WINDOW, dan skor bertambah
+           min(idf(a), idf(b)) * ((k1 + 1) * acc) / (k1 * ((1 - b) + b * dl/avdl) + acc).
+        """
+        mapper = state.reader
+        norms = state.length_norm(k1, b)
+        entries = {}
+
+        def entry(term):
+            """(termID, postings_list, tf_list, TermPositions) atau None."""
+            if term not in entries:
+                term_id = state.term_id_map.get(term)
+                if term_id not in mapper.postings_dict:
+                    entries[term] = None
+                else:
+                    postings_list, tf_list = mapper.get_postings_list(term_id)
+                    positions = None
+                    if term_id in state.positions:
+                        positions = state.positions.term(term_id, postings_list, tf_list)
+                    entries[term] = (term_id, postings_list, tf_list, positions)
+            return entries[term]
+
+        def positions_of(term, doc_id):
+            _, postings_list, _, positions = entry(term)
+            i = bisect.bisect_left(postings_list, doc_id)
+            return positions.get(i)
+
+        if phrases:
+            phrase_entries = [entry(term) for phrase in phrases for term in phrase]
+            if any(e is None or e[3] is None for e in phrase_entries):
+                return []
+            candidates = []
+            for doc_id in self._intersect([e[1] for e in phrase_entries]):
+                if all(self._has_phrase(phrase, doc_id, positions_of) for phrase in phrases):
+                    candidates.append(doc_id)
+            scores = self._score_candidates(state, filtered, candidates, k1, b)
+        else:
+            top = self._score(state, filtered, max(k, self.PROXIMITY_DEPTH), k1, b, method)
+            candidates = [state.doc_id_map.get(doc) for _, doc in top]
+            scores = [score for score, _ in top]
 
-                scores_per_doc = []
-                df = mapper.postings_dict[self.term_id_map[term]][1]
-                wtq = math.log(N / df, 10)
-                postings_list, tf_list = mapper.get_postings_list(self.term_id_map[term])
-                for i in range(df):
-                    dl = mapper.doc_length[postings_list[i]]
-                    wtd = ((k1 + 1) * tf_list[i]) / (k1 * ((1 - b) + b * dl/avdl) + tf_list[i])
-                    score = wtq * wtd
-                    scores_per_doc.append((self.doc_id_map[postings_list[i]], score))
-                heapq.heappush(heap, scores_per_doc)
-                
-            # calculate cumulative score for each doc
-            while len(heap)>1:
-                list1 = heapq.heappop(heap)
-                list2 = heapq.heappop(heap)
-                merged_scores = sorted_merge_posts_and_tfs(list1, list2)
-                heapq.heappush(heap, merged_scores)
+        if proximity:
+            terms = []
+            for term in filtered:
+                e = entry(term)
+                if term not in terms and e is not None and e[3] is not None:
+                    terms.append(term)
+            idfs = {term: state.idf(term, entry(term)[0]) for term in terms}
+            for j, doc_id in enumerate(candidates):
+                present = []
+                for term in terms:
+                    postings_list = entry(term)[1]
+                    i = bisect.bisect_left(postings_list, doc_id)
+                    if i < len(postings_list) and postings_list[i] == doc_id:
+                        present.append((term, entry(term)[3].get(i)))
+                for a in range(len(present)):
+                    for c in range(a + 1, len(present)):
+                        acc = self._pair_proximity(present[a][1], present[c][1])
+                        if acc > 0:
+                            weight = min(idfs[present[a][0]], idfs[present[c][0]])
+                            scores[j] += weight * ((k1 + 1) * acc) / (norms[doc_id] + acc)
+
+        order = range(len(candidates))
+        top_k = heapq.nlargest(k, order, key=lambda j: (scores[j], -candidates[j]))
+        return [(scores[j], state.doc_id_map[candidates[j]]) for j in top_k]
+
+    def _score_candidates(self, state, filtered, candidates, k1, b):
+        """
+        Skor BM25 untuk list of docID kandidat (terurut). Postings setiap
+        term dibaca dengan BlockPostingsCursor, jadi blok yang tidak memuat
+        kandidat dilompati tanpa di-decode.
+        """
+        mapper = state.reader
+        norms = state.length_norm(k1, b)
+        scores = [0.0] * len(candidates)
+        if not candidates:
+            return scores
+        for term in filtered:
+            term_id = state.term_id_map.get(term)
+            if term_id not in mapper.postings_dict:
+                continue
+            wtq = state.idf(term, term_id)
+            cursor = mapper.get_postings_cursor(term_id, state.skips)
+            for j, doc_id in enumerate(candidates):
+                cursor.advance(doc_id)
+                if cursor.doc() == doc_id:
+                    tf = cursor.tf()
+                    scores[j] += wtq * (((k1 + 1) * tf) / (norms[doc_id] + tf))
+        return scores
 
+    @staticmethod
+    def _intersect(postings_lists):
+        """
+        Irisan beberapa postings list terurut: iterasi postings list terpendek,
+        dan postings list lainnya dilompati dengan binary search.
+        """
+        postings_lists = sorted(postings_lists, key=len)
+        pointers = [0] * len(postings_lists)
         result = []
-        if (len(heap) > 0):
-            heap_res = sorted(heap[0], key=lambda t: t[1])      # sort based on score
-            result = heap_res[-1:-k-1:-1]                       # retrieve k-top
-            result = [r[::-1] for r in result]                  # reverse tuple element to (score, doc)
-        return result
\ No newline at end of file
+        for doc_id in postings_lists[0]:
+            for i in range(1, len(postings_lists)):
+                postings_list = postings_lists[i]
+                pointers[i] = bisect.bisect_left(postings_list, doc_id, pointers[i])
+                if pointers[i] == len(postings_list):
+                    return result
+                if postings_list[pointers[i]] != doc_id:
+                    break
+            else:
+                result.append(doc_id)
+        return result
+
+    @staticmethod
+    def _has_phrase(phrase, doc_id, positions_of):
+        """Apakah term-term phrase muncul berurutan di dokumen."""
+        first = positions_of(phrase[0], doc_id)
+        others = [set(positions_of(term, doc_id)) for term in phrase[1:]]
+        return any(all(p + offset in positions for offset, positions in enumerate(others, 1))
+                   for p in first)
+
+    def _pair_proximity(self, positions_a, positions_b):
+        """sum 1 / jarak^2 untuk pasangan kemunculan dengan jarak <= PROXIMITY_WINDOW."""
+        window = self.PROXIMITY_WINDOW
+        acc = 0.0
+        start = 0
+        for p in positions_a:
+            while start < len(positions_b) and positions_b[start] < p - window:
+                start += 1
+            i = start
+            while i < len(positions_b) and positions_b[i] <= p + window:
+                if positions_b[i] != p:
+                    acc += 1 / (positions_b[i] - p) ** 2
+                i += 1
+        return acc
+
+    def _retrieve_daat(self, state, filtered, k, k1, b, use_block_max):
+        """
+        Document-at-a-Time dengan WAND (Broder et al., 2003) atau Block-Max
+        WAND (Ding & Suel, 2011).
+
+        Top-K disimpan di min-heap berukuran K berisi (score, -docID). Sebuah
+        dokumen baru dihitung skornya hanya jika jumlah upper bound term-term
+        yang memuatnya lebih besar dari threshold (skor terkecil di heap).
+        Dokumen dengan skor sama diurutkan berdasarkan docID (kecil dulu).
+        """
+        mapper = state.reader
+        norms = state.length_norm(k1, b)
+
+        cursors = []
+        for order, term in enumerate(filtered):
+            term_id = state.term_id_map.get(term)
+            # handle term yg tidak ada di collection
+            if term_id not in mapper.postings_dict:
+                continue
+            cursors.append(self._open_cursor(state, order, term, term_id, k1, b))
+
+        top_k = []
+        threshold = -math.inf
+        while k > 0:
+            cursors.sort(key=lambda c: c.doc())
+
+            # cari pivot: term pertama dimana jumlah max_score melewati threshold
+            upper_bound = 0
+            pivot = None
+            for i, cursor in enumerate(cursors):
+                if cursor.doc() == math.inf:
+                    break
+                upper_bound += cursor.max_score
+                if upper_bound > threshold:
+                    pivot = i
+                    break
+            if pivot is None:
+                break
+            pivot_doc = cursors[pivot].doc()
+            while pivot + 1 < len(cursors) and cursors[pivot + 1].doc() == pivot_doc:
+                pivot += 1
+
+            if use_block_max:
+                block_bound = 0
+                for cursor in cursors[:pivot + 1]:
+                    cursor.shallow_advance(pivot_doc)
+                    block_bound += cursor.block_upper_bound()
+                if block_bound <= threshold:
+                    # semua dokumen sebelum batas blok terdekat tidak mungkin
+                    # masuk top-K, lompati sekaligus
+                    next_doc = min(cursor.block_end() for cursor in cursors[:pivot + 1]) + 1
+                    if pivot + 1 < len(cursors):
+                        next_doc = min(next_doc, cursors[pivot + 1].doc())
+                    skipper = max(cursors[:pivot + 1], key=lambda c: c.max_score)
+                    skipper.advance(next_doc)
+                    continue
+
+            if cursors[0].doc() == pivot_doc:
+                # hitung skor penuh, dijumlahkan sesuai urutan term di query
+                score = 0
+                norm = norms[pivot_doc]
+                for cursor in sorted(cursors[:pivot + 1], key=lambda c: c.order):
+                    tf = cursor.tf()
+                    wtd = ((k1 + 1) * tf) / (norm + tf)
+                    score += cursor.wtq * wtd
+                    cursor.next()
+                if len(top_k) < k:
+                    heapq.heappush(top_k, (score, -pivot_doc))
+                elif score > top_k[0][0]:
+                    heapq.heapreplace(top_k, (score, -pivot_doc))
+                if len(top_k) == k:
+                    threshold = top_k[0][0]
+            else:
+                skipper = max((c for c in cursors[:pivot] if c.doc() < pivot_doc),
+                              key=lambda c: c.max_score)
+                skipper.advance(pivot_doc)
+
+        top_k.sort(key=lambda t: (-t[0], -t[1]))
+        return [(score, state.doc_id_map[-doc_id]) for (score, doc_id) in top_k]
@@ -0,0 +1,285 @@
+"""
+Index impact-ordered untuk score-at-a-time (SaaT) dengan anytime budget.
+
+Skor BM25 setiap posting, idf(t) * w(t, D) dengan k1 dan b tertentu
+(default K1 dan B, sama dengan retrieve_bm25), dihitung saat build lalu
+dikuantisasi secara linear ke 1..LEVELS dengan satu skala untuk seluruh
+index. Postings setiap term dikelompokkan per nilai impact, dan kelompok
+dengan impact terbesar disimpan paling awal. Saat query, kelompok dari semua
+term query diproses berurutan dari impact terbesar (lihat score_at_a_time),
+sehingga pemrosesan bisa dihentikan kapan saja setelah sejumlah posting
+atau mikrodetik tertentu dengan top-K yang sudah mendekati hasil lengkap.
+
+Index juga bisa di-prune secara statis: kelompok dengan impact di bawah
+min_level dibuang dan ditulis ke file terpisah {index_name}.pruned.imp
+(lihat build_impacts, yang memilih min_level dari target recall).
+
+Layout file {index_name}.imp (dan .pruned.imp):
+
+    header    : MAGIC, VERSION, k1, b, LEVELS, skala, min_level,
+                term_id_bound, offset directory
+    entry     : satu per term, lihat di bawah
+    directory : array('Q') (start, end) entry untuk setiap termID; (0, 0)
+                jika term tidak memiliki posting
+
+Entry sebuah term adalah array('I'): banyaknya kelompok n, n header
+kelompok (impact << COUNT_BITS | banyaknya docID) terurut menurut impact
+menurun, lalu docID semua kelompok (terurut di dalam setiap kelompok).
+Impact paling banyak LEVELS = 255, jadi cukup 8 bit.
+"""
+from array import array
+import heapq
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MAGIC = b'MDLI'
+VERSION = 1
+LEVELS = 255
+COUNT_BITS = 24
+K1 = 2
+B = 0.75
+# di bawah banyaknya posting ini, overhead NumPy per kelompok lebih mahal dari loop python
+NUMPY_THRESHOLD = 4096
+
+HEADER = struct.Struct('<4sIddIdIIQ')
+
+
+def compute_impacts(state, k1=K1, b=B):
+    """
+    Impact terkuantisasi semua posting di sebuah IndexState.
+
+    Returns
+    -------
+    (float, dict)
+        Skala kuantisasi (impact = round(skor * skala)) dan termID ->
+        list of (impact, list docID terurut), impact menurun.
+    """
+    reader = state.reader
+    norms = state.length_norm(k1, b)
+    scores = {}
+    max_score = 0.0
+    for term, term_id in _terms(state):
+        wtq = state.idf(term, term_id)
+        postings_list, tf_list = reader.get_postings_list(term_id)
+        term_scores = [wtq * (((k1 + 1) * tf) / (norms[doc_id] + tf))
+                       for doc_id, tf in zip(postings_list, tf_list)]
+        scores[term_id] = (postings_list, term_scores)
+        max_score = max(max_score, max(term_scores))
+    scale = LEVELS / max_score if max_score > 0 else 1.0
+
+    impacts = {}
+    for term_id, (postings_list, term_scores) in scores.items():
+        groups = {}
+        for doc_id, score in zip(postings_list, term_scores):
+            # term dengan idf 0 (ada di semua dokumen) tetap mendapat impact 1
+            level = min(LEVELS, max(1, round(score * scale)))
+            groups.setdefault(level, []).append(doc_id)
+        impacts[term_id] = sorted(groups.items(), reverse=True)
+    return scale, impacts
+
+
+def _terms(state):
+    """(term, termID) untuk setiap term yang memiliki postings."""
+    term_id_map = state.term_id_map
+    for term_id in state.reader.postings_dict:
+        yield term_id_map[term_id], term_id
+
+
+def write_impacts(path, impacts, scale, k1=K1, b=B, min_level=0):
+    """
+    Menulis file .imp dari hasil compute_impacts; kelompok dengan impact di
+    bawah min_level tidak ditulis (index yang di-prune).
+    """
+    tmp_path = f'{path}.tmp'
+    directory = {}
+    with open(tmp_path, 'wb') as f:
+        f.write(b'\0' * HEADER.size)
+        for term_id, groups in impacts.items():
+            groups = [(level, docs) for level, docs in groups if level >= min_level]
+            if not groups:
+                continue
+            entry = array('I', [len(groups)])
+            for level, docs in groups:
+                entry.append(level << COUNT_BITS | len(docs))
+            for _, docs in groups:
+                entry.extend(docs)
+            if sys.byteorder != 'little':
+                entry.byteswap()
+            start = f.tell()
+            f.write(entry.tobytes())
+            directory[term_id] = (start, f.tell())
+
+        term_id_bound = max(directory) + 1 if directory else 0
+        offsets = array('Q', [0]) * (2 * term_id_bound)
+        for term_id, (start, end) in directory.items():
+            offsets[2 * term_id] = start
+            offsets[2 * term_id + 1] = end
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+        f.write(b'\0' * (-f.tell() % 8))
+        directory_offset = f.tell()
+        f.write(offsets.tobytes())
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, k1, b, LEVELS, scale, min_level,
+                            term_id_bound, directory_offset))
+    os.replace(tmp_path, path)
+
+
+class ImpactsReader:
+    """File .imp yang di-mmap (read-only dan aman dipakai banyak thread)."""
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = memoryview(self.mmap)
+        (magic, version, self.k1, self.b, self.levels, self.scale, self.min_level,
+         self.term_id_bound, directory_offset) = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} bukan impact-ordered index Meedle versi {VERSION}")
+        self.directory = self._array(directory_offset, directory_offset + 16 * self.term_id_bound, 'Q')
+
+    def _array(self, start, end, typecode):
+        if sys.byteorder == 'little':
+            return self.buffer[start:end].cast(typecode)
+        values = array(typecode, self.buffer[start:end])
+        values.byteswap()
+        return values
+
+    def groups(self, term_id):
+        """List of (impact, docIDs) sebuah term dengan impact menurun; [] jika tidak ada."""
+        if term_id is None or not 0 <= term_id < self.term_id_bound:
+            return []
+        start = self.directory[2 * term_id]
+        end = self.directory[2 * term_id + 1]
+        if end == 0:
+            return []
+        entry = self._array(start, end, 'I')
+        n = entry[0]
+        groups = []
+        pos = 1 + n
+        mask = (1 << COUNT_BITS) - 1
+        for header in entry[1:1 + n]:
+            count = header & mask
+            groups.append((header >> COUNT_BITS, entry[pos:pos + count]))
+            pos += count
+        return groups
+
+    def close(self):
+        self.directory = None
+        self.buffer.release()
+        try:
+            self.mmap.close()
+        except BufferError:
+            # masih ada memoryview yang dipakai; dilepas oleh garbage collector
+            pass
+
+
+def score_at_a_time(term_groups, doc_id_bound, k, max_postings=None, max_micros=None,
+                    min_level=0, use_numpy=False):
+    """
+    Score-at-a-time: kelompok postings semua term diproses dari impact
+    terbesar, dan impact dijumlahkan ke accumulator per docID.
+
+    Parameters
+    ----------
+    term_groups: List[List[(int, docIDs)]]
+        Hasil ImpactsReader.groups untuk setiap term query (term yang muncul
+        dua kali di query ikut dua kali, sama seperti TaaT).
+    max_postings(int): berhenti setelah memproses sebanyak ini posting
+    max_micros(float): berhenti setelah sekian mikrodetik (dicek per kelompok)
+    min_level(int): lewati kelompok dengan impact di bawah ini (pruning saat
+                query, setara dengan index yang di-prune dengan min_level sama)
+
+    Returns
+    -------
+    (List[(int, int)], int)
+        Top-K (jumlah impact, docID), diurutkan menurun (docID menaik untuk
+        jumlah yang sama), dan banyaknya posting yang diproses.
+    """
+    deadline = None
+    if max_micros is not None:
+        deadline = time.perf_counter() + max_micros / 1e6
+    # sorted stabil: impact sama diproses sesuai urutan term di query
+    order = sorted(((level, docs) for groups in term_groups for level, docs in groups
+                    if level >= min_level), key=lambda group: -group[0])
+    use_numpy = use_numpy and sum(len(docs) for _, docs in order) >= NUMPY_THRESHOLD
+
+    processed = 0
+    if use_numpy:
+        accumulator = np.zeros(doc_id_bound, dtype=np.int64)
+    else:
+        accumulator = array('q', bytes(8 * doc_id_bound))
+        candidates = []
+    for level, docs in order:
+        if max_postings is not None and processed + len(docs) > max_postings:
+            docs = docs[:max_postings - processed]
+        if use_numpy:
+            # docID di satu kelompok unik, jadi fancy-index += aman
+            accumulator[np.frombuffer(docs, dtype=np.uint32)] += level
+        else:
+            for doc_id in docs:
+                if not accumulator[doc_id]:
+                    candidates.append(doc_id)
+                accumulator[doc_id] += level
+        processed += len(docs)
+        if max_postings is not None and processed >= max_postings:
+            break
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+
+    if k <= 0:
+        # np.partition tidak menerima kth di luar array
+        return [], processed
+    if use_numpy:
+        candidates = np.flatnonzero(accumulator)
+        scores = accumulator[candidates]
+        if k < len(candidates):
+            kth_score = np.partition(scores, len(scores) - k)[len(scores) - k]
+            keep = scores >= kth_score
+            candidates = candidates[keep]
+            scores = scores[keep]
+        top_k = np.lexsort((candidates, -scores))[:k]
+        return [(int(scores[i]), int(candidates[i])) for i in top_k], processed
+    top_k = heapq.nlargest(k, candidates, key=lambda d: (accumulator[d], -d))
+    return [(accumulator[doc_id], doc_id) for doc_id in top_k], processed
+
+
+def sample_queries(state, n, seed=0, max_terms=4):
+    """
+    Workload query sintetis yang deterministik: n query berisi 1..max_terms
+    term berbeda dengan DF di antara 2 dan N / 2, dipilih acak dengan peluang
+    sebanding DF-nya (seperti query log, term yang umum lebih sering muncul).
+    """
+    rng = random.Random(seed)
+    postings_dict = state.reader.postings_dict
+    terms = sorted((term, postings_dict[term_id][1]) for term, term_id in _terms(state)
+                   if 2 <= postings_dict[term_id][1] <= state.N / 2)
+    vocabulary = [term for term, _ in terms]
+    weights = [df for _, df in terms]
+    queries = []
+    for _ in range(n):
+        size = rng.randint(1, max_terms)
+        query = []
+        while len(query) < size:
+            term = rng.choices(vocabulary, weights)[0]
+            if term not in query:
+                query.append(term)
+        queries.append(query)
+    return queries
+
+
+def recall(result, reference):
+    """Recall top-K hasil terhadap top-K referensi (keduanya list of (skor, dokumen))."""
+    if not reference:
+        return 1.0
+    expected = {doc for _, doc in reference}
+    return len(expected.intersection(doc for _, doc in result)) / len(expected)
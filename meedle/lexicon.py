@@ -0,0 +1,369 @@
+"""
+Format dictionary (lexicon) biner untuk inverted index, pengganti pickle.
+
+File {index_name}.lex berisi semua metadata yang dibutuhkan saat query:
+postings_dict, doc_length, mapping term <-> termID, mapping docID -> nama
+dokumen, dan nama codec postings (lihat meedle.compression). Semua bagian berupa array dengan lebar tetap atau blob bytes
+sehingga file cukup di-mmap; tidak ada objek python yang dibuat saat open,
+dan lookup dilakukan langsung di atas mapping tersebut.
+
+Layout file:
+
+    header  : MAGIC, VERSION, BLOCK_SIZE, n_terms, term_id_bound,
+              doc_id_bound, n_docs, lalu (offset, length) untuk setiap section
+    section : lihat SECTIONS; setiap section di-align ke 8 bytes
+
+Terms disimpan terurut (berdasarkan bytes UTF-8) dengan front coding per
+blok BLOCK_SIZE term: term pertama setiap blok disimpan utuh, term berikutnya
+disimpan sebagai (panjang prefix yang sama dengan term sebelumnya, suffix).
+Lookup term melakukan binary search atas term pertama setiap blok, lalu
+scan linear di dalam satu blok.
+"""
+from array import array
+from collections.abc import Mapping
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = b'MDLX'
+VERSION = 2
+BLOCK_SIZE = 16
+MISSING = 0xFFFFFFFF
+
+# (nama section, typecode array); typecode None berarti blob bytes
+SECTIONS = [
+    ('block_offsets', 'I'),     # posisi awal setiap blok di term_blob
+    ('term_blob', None),        # terms hasil front coding
+    ('term_ids', 'I'),          # termID untuk setiap term (urutan terurut)
+    ('positions', 'Q'),         # start_position_in_index_file
+    ('dfs', 'I'),               # number_of_postings_in_list
+    ('postings_lengths', 'I'),  # length_in_bytes_of_postings_list
+    ('tf_lengths', 'I'),        # length_in_bytes_of_tf_list
+    ('term_ordinals', 'I'),     # termID -> posisi di urutan terurut
+    ('file_order', 'I'),        # termIDs sesuai urutan di file index
+    ('doc_lengths', 'I'),       # docID -> panjang dokumen (MISSING jika bukan dokumen)
+    ('doc_name_offsets', 'I'),  # docID -> posisi nama dokumen di doc_name_blob
+    ('doc_name_blob', None),
+    ('codec', None),            # nama codec postings (UTF-8), sejak versi 2
+]
+
+PREFIX = struct.Struct('<4sI')
+# header setiap versi; lexicon versi 1 tidak memiliki section codec
+HEADERS = {
+    1: struct.Struct('<4sIIIIII' + 'QQ' * (len(SECTIONS) - 1)),
+    2: struct.Struct('<4sIIIIII' + 'QQ' * len(SECTIONS)),
+}
+HEADER = HEADERS[VERSION]
+
+
+def _encode_varint(n, out):
+    while n >= 128:
+        out.append((n & 127) | 128)
+        n >>= 7
+    out.append(n)
+
+
+def _decode_varint(buffer, pos):
+    n = 0
+    shift = 0
+    while True:
+        byte = buffer[pos]
+        pos += 1
+        n |= (byte & 127) << shift
+        if byte < 128:
+            return n, pos
+        shift += 7
+
+
+def write_lexicon(path, postings_dict, terms, doc_length, term_id_to_str, doc_id_to_str,
+                  codec='vbe'):
+    """
+    Menulis lexicon biner dari metadata index versi pickle.
+
+    Parameters
+    ----------
+    path: str
+        Path file .lex yang akan ditulis
+    postings_dict, terms, doc_length:
+        Isi file {index_name}.dict (lihat InvertedIndex)
+    term_id_to_str, doc_id_to_str: List[str]
+        Isi IdMap.id_to_str untuk term dan dokumen
+    codec: str
+        Nama codec postings di file index
+    """
+    entries = sorted((term_id_to_str[term_id].encode('utf-8'), term_id)
+                     for term_id in postings_dict)
+
+    block_offsets = array('I')
+    term_blob = bytearray()
+    term_ids = array('I')
+    positions = array('Q')
+    dfs = array('I')
+    postings_lengths = array('I')
+    tf_lengths = array('I')
+    previous = b''
+    for ordinal, (term, term_id) in enumerate(entries):
+        if ordinal % BLOCK_SIZE == 0:
+            block_offsets.append(len(term_blob))
+            _encode_varint(len(term), term_blob)
+            term_blob += term
+        else:
+            prefix = 0
+            limit = min(len(previous), len(term), 255)
+            while prefix < limit and previous[prefix] == term[prefix]:
+                prefix += 1
+            term_blob.append(prefix)
+            _encode_varint(len(term) - prefix, term_blob)
+            term_blob += term[prefix:]
+        previous = term
+
+        position, df, postings_length, tf_length = postings_dict[term_id]
+        term_ids.append(term_id)
+        positions.append(position)
+        dfs.append(df)
+        postings_lengths.append(postings_length)
+        tf_lengths.append(tf_length)
+
+    term_id_bound = max(postings_dict) + 1 if postings_dict else 0
+    term_ordinals = array('I', [MISSING]) * term_id_bound
+    for ordinal, term_id in enumerate(term_ids):
+        term_ordinals[term_id] = ordinal
+    file_order = array('I', terms)
+
+    doc_id_bound = max(doc_length) + 1 if doc_length else 0
+    doc_lengths = array('I', [MISSING]) * doc_id_bound
+    doc_name_offsets = array('I', [0]) * (doc_id_bound + 1)
+    doc_name_blob = bytearray()
+    for doc_id in range(doc_id_bound):
+        doc_name_offsets[doc_id] = len(doc_name_blob)
+        if doc_id in doc_length:
+            doc_lengths[doc_id] = doc_length[doc_id]
+            doc_name_blob += doc_id_to_str[doc_id].encode('utf-8')
+    doc_name_offsets[doc_id_bound] = len(doc_name_blob)
+
+    sections = {
+        'block_offsets': block_offsets, 'term_blob': term_blob, 'term_ids': term_ids,
+        'positions': positions, 'dfs': dfs, 'postings_lengths': postings_lengths,
+        'tf_lengths': tf_lengths, 'term_ordinals': term_ordinals, 'file_order': file_order,
+        'doc_lengths': doc_lengths, 'doc_name_offsets': doc_name_offsets,
+        'doc_name_blob': doc_name_blob, 'codec': codec.encode('utf-8'),
+    }
+
+    body = bytearray()
+    layout = []
+    for name, typecode in SECTIONS:
+        data = sections[name]
+        if typecode is not None and sys.byteorder != 'little':
+            data = array(typecode, data)
+            data.byteswap()
+        data = bytes(data)
+        offset = HEADER.size + len(body)
+        layout += [offset, len(data)]
+        body += data
+        body += b'\0' * (-(HEADER.size + len(body)) % 8)
+
+    header = HEADER.pack(MAGIC, VERSION, BLOCK_SIZE, len(entries), term_id_bound,
+                         doc_id_bound, len(doc_length), *layout)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(body)
+    os.replace(tmp_path, path)
+
+
+class Lexicon:
+    """
+    Lexicon biner yang di-mmap (read-only dan aman dipakai banyak thread).
+
+    Attributes
+    ----------
+    postings_dict(LexiconPostingsDict): pengganti InvertedIndex.postings_dict
+    doc_length(LexiconDocLength): pengganti InvertedIndex.doc_length
+    terms(List[int]): termIDs sesuai urutan di file index
+    term_id_map(LexiconIdMap), doc_id_map(LexiconIdMap): pengganti IdMap
+        yang read-only; lookup string yang tidak ada mengembalikan None.
+    codec(str): nama codec postings ('vbe' untuk lexicon versi 1)
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(self.mmap)
+
+        magic, version = PREFIX.unpack_from(buffer)
+        if magic != MAGIC or version not in HEADERS:
+            raise ValueError(f"{path} bukan lexicon Meedle versi {VERSION}")
+        header = HEADERS[version].unpack_from(buffer)
+        self.block_size, self.n_terms, self.term_id_bound, self.doc_id_bound, self.n_docs = header[2:7]
+        layout = header[7:]
+
+        self.codec = b'vbe'
+        for i, (name, typecode) in enumerate(SECTIONS[:len(layout) // 2]):
+            offset, length = layout[2 * i], layout[2 * i + 1]
+            data = buffer[offset:offset + length]
+            if typecode is not None:
+                if sys.byteorder == 'little':
+                    data = data.cast(typecode)
+                else:
+                    data = array(typecode, data)
+                    data.byteswap()
+            setattr(self, name, data)
+
+        self.codec = bytes(self.codec).decode('utf-8')
+        self.postings_dict = LexiconPostingsDict(self)
+        self.doc_length = LexiconDocLength(self)
+        self.terms = self.file_order
+        self.term_id_map = LexiconIdMap(self.term_id_bound, self.term_id, self.term_str)
+        self.doc_id_map = LexiconIdMap(self.doc_id_bound, self.doc_id, self.doc_name)
+        self._doc_ids = None
+
+    def _block_first_term(self, block):
+        length, pos = _decode_varint(self.term_blob, self.block_offsets[block])
+        return bytes(self.term_blob[pos:pos + length])
+
+    def _scan_block(self, block):
+        """Generator (ordinal, term bytes) untuk semua term di sebuah blok."""
+        blob = self.term_blob
+        ordinal = block * self.block_size
+        end = min(ordinal + self.block_size, self.n_terms)
+        length, pos = _decode_varint(blob, self.block_offsets[block])
+        term = bytes(blob[pos:pos + length])
+        pos += length
+        yield ordinal, term
+        for ordinal in range(ordinal + 1, end):
+            prefix = blob[pos]
+            length, pos = _decode_varint(blob, pos + 1)
+            term = term[:prefix] + bytes(blob[pos:pos + length])
+            pos += length
+            yield ordinal, term
+
+    def term_ordinal(self, term):
+        """Posisi term (str) di urutan terurut, atau None jika tidak ada."""
+        key = term.encode('utf-8')
+        lo, hi = 0, len(self.block_offsets)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._block_first_term(mid) <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == 0:
+            return None
+        for ordinal, candidate in self._scan_block(lo - 1):
+            if candidate == key:
+                return ordinal
+            if candidate > key:
+                break
+        return None
+
+    def iter_terms(self):
+        """Generator (term, termID) untuk semua term, terurut menurut term."""
+        for block in range(len(self.block_offsets)):
+            for ordinal, term in self._scan_block(block):
+                yield term.decode('utf-8'), self.term_ids[ordinal]
+
+    def term_id(self, term):
+        """termID dari sebuah term, atau None jika term tidak ada di index."""
+        ordinal = self.term_ordinal(term)
+        return None if ordinal is None else self.term_ids[ordinal]
+
+    def term_str(self, term_id):
+        ordinal = self.term_ordinals[term_id]
+        if ordinal == MISSING:
+            raise IndexError(term_id)
+        for candidate_ordinal, term in self._scan_block(ordinal // self.block_size):
+            if candidate_ordinal == ordinal:
+                return term.decode('utf-8')
+
+    def doc_name(self, doc_id):
+        if self.doc_lengths[doc_id] == MISSING:
+            raise IndexError(doc_id)
+        start, end = self.doc_name_offsets[doc_id], self.doc_name_offsets[doc_id + 1]
+        return bytes(self.doc_name_blob[start:end]).decode('utf-8')
+
+    def doc_id(self, name):
+        if self._doc_ids is None:
+            self._doc_ids = {self.doc_name(doc_id): doc_id for doc_id in self.doc_length}
+        return self._doc_ids.get(name)
+
+    def close(self):
+        try:
+            self.mmap.close()
+        except BufferError:
+            # masih ada memoryview yang dipakai; dilepas oleh garbage collector
+            pass
+
+
+class LexiconPostingsDict(Mapping):
+    """termID -> (start_position, df, len_postings, len_tf), dibaca dari Lexicon."""
+    def __init__(self, lexicon):
+        self.lexicon = lexicon
+
+    def _ordinal(self, term_id):
+        if type(term_id) is not int or not 0 <= term_id < self.lexicon.term_id_bound:
+            return MISSING
+        return self.lexicon.term_ordinals[term_id]
+
+    def __getitem__(self, term_id):
+        ordinal = self._ordinal(term_id)
+        if ordinal == MISSING:
+            raise KeyError(term_id)
+        lexicon = self.lexicon
+        return (lexicon.positions[ordinal], lexicon.dfs[ordinal],
+                lexicon.postings_lengths[ordinal], lexicon.tf_lengths[ordinal])
+
+    def __contains__(self, term_id):
+        return self._ordinal(term_id) != MISSING
+
+    def __iter__(self):
+        return iter(self.lexicon.term_ids)
+
+    def __len__(self):
+        return self.lexicon.n_terms
+
+
+class LexiconDocLength(Mapping):
+    """docID -> panjang dokumen, dibaca dari Lexicon."""
+    def __init__(self, lexicon):
+        self.lexicon = lexicon
+
+    def __getitem__(self, doc_id):
+        if type(doc_id) is int and 0 <= doc_id < self.lexicon.doc_id_bound:
+            length = self.lexicon.doc_lengths[doc_id]
+            if length != MISSING:
+                return length
+        raise KeyError(doc_id)
+
+    def __iter__(self):
+        doc_lengths = self.lexicon.doc_lengths
+        return (doc_id for doc_id in range(len(doc_lengths)) if doc_lengths[doc_id] != MISSING)
+
+    def __len__(self):
+        return self.lexicon.n_docs
+
+
+class LexiconIdMap:
+    """
+    Pengganti IdMap yang read-only: map[int] -> str dan map[str] -> int,
+    dengan map[str] mengembalikan None untuk string yang tidak dikenal
+    (tidak menambah ID baru seperti IdMap).
+    """
+    def __init__(self, size, get_id, get_str):
+        self.size = size
+        self.get_id = get_id
+        self.get_str = get_str
+
+    def __len__(self):
+        return self.size
+
+    def get(self, key):
+        return self.get_id(key)
+
+    def __getitem__(self, key):
+        if type(key) is int:
+            return self.get_str(key)
+        elif type(key) is str:
+            return self.get_id(key)
+        else:
+            raise TypeError
@@ -0,0 +1,40 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from meedle.compression import CODECS
+from meedle.helpers import DOC_NAME_SEPARATOR, BSBIIndex
+
+
+class Command(BaseCommand):
+    help = ("Menambahkan dokumen baru ke index sebagai segmen delta (tanpa rebuild), "
+            "lalu merge segmen-segmen kecil sesuai tiered merge policy")
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+',
+                            help="file dokumen; nama dokumen adalah path relatif terhadap --base-dir")
+        parser.add_argument('--base-dir', default='.')
+        parser.add_argument('--output-dir', default='index')
+        parser.add_argument('--index-name', default='main_index')
+        parser.add_argument('--codec', choices=sorted(CODECS), default='vbe',
+                            help="codec postings (lihat meedle.compression)")
+        parser.add_argument('--merge-factor', type=int, default=4)
+
+    def handle(self, *args, **options):
+        BSBI_instance = BSBIIndex(data_dir = 'collection', \
+            postings_encoding = CODECS[options['codec']], \
+            output_dir = options['output_dir'], \
+            index_name = options['index_name'], \
+            merge_factor = options['merge_factor'])
+        docs = []
+        for path in options['paths']:
+            # pemisah nama dokumen sama dengan dokumen hasil build_index
+            name = DOC_NAME_SEPARATOR.join(os.path.relpath(path, options['base_dir']).split(os.sep))
+            with open(path, 'r') as f:
+                docs.append((name, f.read()))
+        name = BSBI_instance.add_documents(docs, merge = False)
+        BSBI_instance.maybe_merge()
+        if name is None:
+            self.stdout.write("tidak ada dokumen yang memiliki term, index tidak berubah")
+        else:
+            self.stdout.write(f"{len(docs)} dokumen ditambahkan sebagai segmen {name}")
@@ -0,0 +1,162 @@
+from datetime import datetime, timezone
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from meedle.benchmark import PROFILES, compare, generate_workload
+from meedle.benchmark.endpoints import bench_endpoints
+from meedle.benchmark.runner import ENGINES, make_configs, run_configs, transcode_index
+from meedle.compression import CODECS, get_codec
+from meedle.helpers import BSBIIndex, VBEPostings, np
+
+# direktori static sementara untuk index yang di-transcode ke codec lain
+TRANSCODE_DIR = 'benchmark_indexes'
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = ("Benchmark retrieval yang reproducible (lihat meedle.benchmark): latency per stage, "
+            "throughput dan peak RSS setiap konfigurasi engine/codec/cache, dan latency "
+            "end-to-end endpoint; hasilnya ditulis sebagai JSON")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', default='index')
+        parser.add_argument('--index-name', default='main_index')
+        parser.add_argument('--k', type=int, default=10)
+        parser.add_argument('--profile', choices=sorted(PROFILES), default='mixed')
+        parser.add_argument('--queries', type=int, default=200, help="banyaknya query di workload")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--zipf', type=float, default=None,
+                            help="eksponen Zipf untuk query yang berulang; default: tanpa pengulangan")
+        parser.add_argument('--workload-file', default=None,
+                            help="file berisi satu query per baris, menggantikan workload sintetis")
+        parser.add_argument('--repeat', type=int, default=1, help="banyaknya putaran yang diukur")
+        parser.add_argument('--engines', nargs='+', choices=ENGINES, default=['taat', 'wand', 'bmw'])
+        parser.add_argument('--codecs', nargs='+', choices=sorted(CODECS), default=None,
+                            help="default: codec index yang ada")
+        parser.add_argument('--postings-cache', type=int, nargs='+', default=[0],
+                            help="budget PostingsCache dalam MB")
+        parser.add_argument('--result-cache', nargs='+', choices=['off', 'on'], default=['off'])
+        parser.add_argument('--no-endpoints', action='store_true')
+        parser.add_argument('--output', default=None, help="file JSON hasil; default: stdout saja")
+        parser.add_argument('--baseline', default=None,
+                            help="file JSON hasil sebelumnya untuk dibandingkan")
+
+    def handle(self, *args, **options):
+        BSBI_instance = BSBIIndex(data_dir = 'collection', \
+            postings_encoding = VBEPostings, \
+            output_dir = options['output_dir'], \
+            index_name = options['index_name']).open()
+        try:
+            state = BSBI_instance.state
+            if state.segments is not None or state.shards is not None:
+                raise CommandError("benchmark membutuhkan index satu segmen tanpa shard")
+            if 'saat' in options['engines'] and state.impacts is None:
+                raise CommandError("engine saat membutuhkan impact-ordered index (jalankan build_impacts)")
+            index_codec = state.reader.postings_encoding.name
+            if options['workload_file'] is not None:
+                with open(options['workload_file']) as f:
+                    queries = [line.strip() for line in f if line.strip()]
+            else:
+                queries = generate_workload(state, BSBI_instance.analyzer, options['profile'],
+                                            options['queries'], options['seed'], options['zipf'])
+        finally:
+            BSBI_instance.close()
+        if not queries:
+            raise CommandError("workload kosong")
+
+        codecs = options['codecs'] or [index_codec]
+        report = {
+            "meta": {
+                "commit": _git_commit(),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "numpy": np.__version__ if np is not None else None,
+                "cpu_count": os.cpu_count(),
+            },
+            "workload": {
+                "profile": options['profile'] if options['workload_file'] is None else None,
+                "file": options['workload_file'],
+                "queries": len(queries),
+                "unique": len(set(queries)),
+                "seed": options['seed'],
+                "zipf": options['zipf'],
+                "k": options['k'],
+                "repeat": options['repeat'],
+                "sha1": hashlib.sha1('\n'.join(queries).encode('utf-8')).hexdigest(),
+            },
+        }
+
+        output_dirs = {}
+        transcode_root = staticfiles_storage.url(TRANSCODE_DIR)[1:]
+        try:
+            for name in codecs:
+                if name == index_codec:
+                    output_dirs[name] = options['output_dir']
+                    continue
+                output_dirs[name] = f'{TRANSCODE_DIR}/{name}'
+                os.makedirs(f'{transcode_root}/{name}', exist_ok=True)
+                transcode_index(BSBI_instance, get_codec(name), output_dirs[name])
+
+            configs = make_configs(options['engines'], codecs, options['postings_cache'],
+                                   [mode == 'on' for mode in options['result_cache']],
+                                   output_dirs, options['index_name'])
+            self.stdout.write(f"{len(queries)} query ({report['workload']['unique']} unik), "
+                              f"k={options['k']}; latency dalam mikrodetik")
+            self.stdout.write(f"{'':58s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'qps':>8s} {'RSS MB':>7s}")
+            report["configs"] = run_configs(configs, queries, options['k'], options['repeat'],
+                                            progress=self._write_config)
+        finally:
+            shutil.rmtree(transcode_root, ignore_errors=True)
+
+        for result in report["configs"]:
+            if "stages" in result:
+                self.stdout.write(f"\nstage TaaT ({result['name']}):")
+                for stage, latency in result["stages"].items():
+                    self.stdout.write(f"  {stage:10s} p50 {latency['p50']:8.1f} p95 {latency['p95']:8.1f} "
+                                      f"p99 {latency['p99']:8.1f}")
+
+        if not options['no_endpoints']:
+            report["endpoints"] = bench_endpoints(queries, options['k'], options['repeat'])
+            self.stdout.write("\nendpoint (end-to-end lewat test client):")
+            for name, result in report["endpoints"].items():
+                latency = result["latency"]
+                self.stdout.write(f"  {name:22s} p50 {latency['p50']:8.0f} p95 {latency['p95']:8.0f} "
+                                  f"p99 {latency['p99']:8.0f} qps {result['throughput_qps']:8.0f}")
+
+        if options['output'] is not None:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+        else:
+            self.stdout.write("\n" + json.dumps(report))
+
+        if options['baseline'] is not None:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            if baseline.get("workload", {}).get("sha1") != report["workload"]["sha1"]:
+                self.stderr.write("workload baseline berbeda (sha1 query tidak sama); perbandingan tidak apple-to-apple")
+            self.stdout.write(f"\nterhadap baseline {baseline.get('meta', {}).get('commit')} (sekarang / baseline):")
+            for name, metric, old, new, ratio in compare(report, baseline):
+                self.stdout.write(f"  {name:58s} {metric:>4s} {old:10.1f} -> {new:10.1f} {ratio:6.2f}x")
+
+    def _write_config(self, result):
+        latency = result["latency"]
+        rss = result["peak_rss_bytes"]
+        rss = f"{rss / 2 ** 20:7.1f}" if rss is not None else f"{'-':>7s}"
+        self.stdout.write(f"{result['name']:58s} {latency['p50']:8.0f} {latency['p95']:8.0f} "
+                          f"{latency['p99']:8.0f} {result['throughput_qps']:8.0f} {rss}")
@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from meedle.compression import CODECS
+from meedle.helpers import InvertedIndexReader, VBEPostings, np
+
+
+class Command(BaseCommand):
+    help = ("Membandingkan codec postings (lihat meedle.compression): ukuran hasil "
+            "encoding seluruh postings di index dan kecepatan decoding-nya")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--index-name', default='main_index')
+        parser.add_argument('--output-dir', default='index')
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--codecs', nargs='+', choices=sorted(CODECS), default=sorted(CODECS))
+
+    def handle(self, *args, **options):
+        with InvertedIndexReader(options['index_name'], VBEPostings,
+                                 directory=options['output_dir']) as reader:
+            lists = [reader.get_postings_list(term) for term in reader.postings_dict]
+        n_postings = sum(len(postings_list) for postings_list, _ in lists)
+        # pembanding: docID dan TF masing-masing sebagai integer 32 bit
+        raw_bytes = 2 * 4 * n_postings
+        self.stdout.write(f"{len(lists)} terms, {n_postings} postings, "
+                          f"{raw_bytes} bytes tanpa kompresi (2 x int32 per posting)")
+
+        decoders = [('python', 'decode', 'decode_tf')]
+        if np is not None:
+            decoders.append(('numpy', 'decode_array', 'decode_tf_array'))
+        self.stdout.write(f"\n{'codec':>10s} {'bytes':>10s} {'docID':>8s} {'TF':>8s} {'rasio':>7s}" +
+                          "".join(f"{name:>10s}" for name, _, _ in decoders) +
+                          "  (bit/posting, juta posting/detik)")
+
+        for name in options['codecs']:
+            codec = CODECS[name]
+            encoded = [(codec.encode(postings_list), codec.encode_tf(tf_list))
+                       for postings_list, tf_list in lists]
+            for (postings_list, tf_list), (encoded_postings, encoded_tf) in zip(lists, encoded):
+                if (codec.decode(encoded_postings) != list(postings_list)
+                        or codec.decode_tf(encoded_tf) != list(tf_list)):
+                    raise CommandError(f"hasil decoding {name} berbeda")
+            postings_bytes = sum(len(encoded_postings) for encoded_postings, _ in encoded)
+            tf_bytes = sum(len(encoded_tf) for _, encoded_tf in encoded)
+            row = (f"{name:>10s} {postings_bytes + tf_bytes:10d} "
+                   f"{8 * postings_bytes / n_postings:8.2f} {8 * tf_bytes / n_postings:8.2f} "
+                   f"{raw_bytes / (postings_bytes + tf_bytes):7.2f}")
+
+            for _, decode, decode_tf in decoders:
+                decode, decode_tf = getattr(codec, decode), getattr(codec, decode_tf)
+                best = float('inf')
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    for encoded_postings, encoded_tf in encoded:
+                        decode(encoded_postings)
+                        decode_tf(encoded_tf)
+                    best = min(best, time.perf_counter() - start)
+                row += f"{n_postings / best / 1e6:10.2f}"
+            self.stdout.write(row)
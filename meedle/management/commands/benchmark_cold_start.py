@@ -0,0 +1,58 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from meedle.benchmark.cold_start import run_cold_start
+
+
+def _default_host():
+    """Host pertama di ALLOWED_HOSTS (misal .vercel.app -> meedle.vercel.app)."""
+    for host in settings.ALLOWED_HOSTS:
+        if host == '*':
+            return 'localhost'
+        return f'meedle{host}' if host.startswith('.') else host
+    return 'localhost'
+
+
+class Command(BaseCommand):
+    help = ("Mengukur cold start seperti lambda di Vercel: waktu import poll.wsgi dan "
+            "time-to-first-result /search_query di interpreter baru, dengan startup snapshot "
+            "aktif dan mati (lihat meedle.benchmark.cold_start)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help="banyaknya cold start per mode")
+        parser.add_argument('--queries', nargs='+', default=['kidney disease in children'],
+                            help="query pertama diukur sebagai time-to-first-result, "
+                                 "sisanya sebagai request berikutnya")
+        parser.add_argument('--k', type=int, default=10)
+        parser.add_argument('--mode', choices=['both', 'on', 'off'], default='both',
+                            help="startup snapshot aktif (on), mati (off) atau keduanya")
+        parser.add_argument('--host', default=None, help="HTTP_HOST request; default dari ALLOWED_HOSTS")
+        parser.add_argument('--output', default=None, help="file JSON hasil; default: stdout saja")
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError("--runs minimal 1")
+        modes = {'both': (True, False), 'on': (True,), 'off': (False,)}[options['mode']]
+        try:
+            report = run_cold_start(settings.BASE_DIR, options['queries'], options['runs'],
+                                    options['k'], modes, options['host'] or _default_host())
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        for name, summary in report.items():
+            median = summary["median"]
+            rss = median.get("peak_rss_bytes")
+            self.stdout.write(
+                f"{name:<13} proses {median['process_ms']:7.1f} ms  "
+                f"import {median['import_ms']:6.1f} ms  "
+                f"request pertama {median['first_request_ms']:6.1f} ms  "
+                f"time-to-first-result {median['time_to_first_result_ms']:6.1f} ms  "
+                f"berikutnya {median['next_requests_ms']:5.1f} ms  "
+                + (f"peak RSS {rss / 2 ** 20:.1f} MB  " if rss is not None else "")
+                + f"NLTK {'ter-import' if summary['nltk_imported'] else 'tidak ter-import'}")
+        if options['output'] is not None:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"hasil ditulis ke {options['output']}")
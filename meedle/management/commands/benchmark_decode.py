@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from meedle.helpers import InvertedIndexReader, VBEPostings, np
+
+
+class Command(BaseCommand):
+    help = ("Membandingkan decoder variable-byte python (vb_decode) dengan "
+            "decoder NumPy (vb_decode_array) pada seluruh postings di index")
+
+    # batas atas ukuran stream (bytes) untuk setiap kelompok
+    BUCKETS = [16, 64, 128, 256, 512, 1024, float('inf')]
+
+    def add_arguments(self, parser):
+        parser.add_argument('--index-name', default='main_index')
+        parser.add_argument('--output-dir', default='index')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        if np is None:
+            raise CommandError("benchmark ini membutuhkan numpy")
+
+        with InvertedIndexReader(options['index_name'], VBEPostings,
+                                 directory=options['output_dir']) as reader:
+            streams = []
+            for term in reader.postings_dict:
+                encoded_postings, encoded_tf = reader.read_encoded(term)
+                streams.append(memoryview(encoded_postings))
+                streams.append(memoryview(encoded_tf))
+
+        # hasil kedua decoder harus identik
+        for stream in streams:
+            if VBEPostings.vb_decode(stream) != VBEPostings.vb_decode_array(stream).tolist():
+                raise CommandError("hasil decoding berbeda")
+        self.stdout.write(f"{len(streams)} streams, {sum(map(len, streams))} bytes, "
+                          "hasil decoding identik")
+
+        decoders = [
+            ('python', VBEPostings.vb_decode),
+            ('numpy', lambda stream: VBEPostings.vb_decode_array(stream).tolist()),
+            ('adaptif', VBEPostings.decode_tf),
+        ]
+        self.stdout.write(f"\n{'ukuran':>14s} {'streams':>8s}" +
+                          "".join(f"{name:>14s}" for name, _ in decoders) + "  (MB/s)")
+        lower = 0
+        groups = []
+        for upper in self.BUCKETS:
+            groups.append((f"{lower}-{upper}", [s for s in streams if lower <= len(s) < upper]))
+            lower = upper
+        groups.append(("semua", streams))
+        for label, group in groups:
+            if not group:
+                continue
+            group_bytes = sum(map(len, group))
+            row = f"{label:>14s} {len(group):8d}"
+            for _, decoder in decoders:
+                best = float('inf')
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    for stream in group:
+                        decoder(stream)
+                    best = min(best, time.perf_counter() - start)
+                row += f"{group_bytes / best / 1e6:14.2f}"
+            self.stdout.write(row)
@@ -0,0 +1,72 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from meedle.benchmark import percentile
+from meedle.helpers import BSBIIndex, VBEPostings
+from meedle.impacts import recall, sample_queries
+
+
+class Command(BaseCommand):
+    help = ("Membandingkan latency dan recall@k score-at-a-time (impact-ordered index, dengan "
+            "berbagai budget dan index yang di-prune) terhadap TaaT lengkap")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', default='index')
+        parser.add_argument('--index-name', default='main_index')
+        parser.add_argument('--k', type=int, default=10)
+        parser.add_argument('--queries', default=None,
+                            help="file berisi satu query per baris; default: workload sintetis")
+        parser.add_argument('--sample', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--max-postings', type=int, nargs='*', default=[100, 300, 1000, 3000])
+        parser.add_argument('--max-micros', type=float, nargs='*', default=[20, 100, 500])
+
+    def handle(self, *args, **options):
+        BSBI_instance = BSBIIndex(data_dir = 'collection', \
+            postings_encoding = VBEPostings, \
+            output_dir = options['output_dir'], \
+            index_name = options['index_name']).open()
+        state = BSBI_instance.state
+        if state.segments is not None or state.impacts is None:
+            raise CommandError("butuh index satu segmen dengan impact-ordered index (jalankan build_impacts)")
+        impacts = state.impacts
+        k, k1, b = options['k'], impacts.k1, impacts.b
+        if options['queries'] is not None:
+            with open(options['queries']) as f:
+                queries = [BSBI_instance.preprocess_query(line) for line in f if line.strip()]
+        else:
+            queries = sample_queries(state, options['sample'], options['seed'])
+
+        runs = [('taat', lambda terms: (BSBI_instance._score(state, terms, k, k1, b, 'taat'), None)),
+                ('saat', lambda terms: BSBI_instance._retrieve_impact(state, terms, k))]
+        for max_postings in options['max_postings']:
+            runs.append((f'saat postings<={max_postings}', lambda terms, n=max_postings:
+                         BSBI_instance._retrieve_impact(state, terms, k, max_postings = n)))
+        for max_micros in options['max_micros']:
+            runs.append((f'saat <={max_micros:g}us', lambda terms, us=max_micros:
+                         BSBI_instance._retrieve_impact(state, terms, k, max_micros = us)))
+        if state.pruned_impacts is not None:
+            runs.append((f'saat pruned (min_level {state.pruned_impacts.min_level})',
+                         lambda terms: BSBI_instance._retrieve_impact(state, terms, k, pruned = True)))
+
+        reference = [runs[0][1](terms)[0] for terms in queries]
+        self.stdout.write(f"{len(queries)} query, k={k}, k1={k1:g}, b={b:g}; latency dalam mikrodetik, "
+                          "recall terhadap TaaT lengkap")
+        self.stdout.write(f"{'':34s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'recall':>7s} {'postings':>9s}")
+        for name, run in runs:
+            # putaran pertama untuk pemanasan (page cache, memo stemmer, norms)
+            for terms in queries:
+                run(terms)
+            latencies, recalls, processed = [], [], []
+            for terms, expected in zip(queries, reference):
+                start = time.perf_counter()
+                result, n = run(terms)
+                latencies.append((time.perf_counter() - start) * 1e6)
+                recalls.append(recall(result, expected))
+                if n is not None:
+                    processed.append(n)
+            postings = f"{sum(processed) / len(processed):9.0f}" if processed else f"{'-':>9s}"
+            self.stdout.write(f"{name:34s} {percentile(latencies, 0.5):8.0f} {percentile(latencies, 0.95):8.0f} "
+                              f"{percentile(latencies, 0.99):8.0f} {sum(recalls) / len(recalls):7.4f} {postings}")
+        BSBI_instance.close()
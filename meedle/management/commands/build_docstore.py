@@ -0,0 +1,49 @@
+import os
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand
+
+from meedle.analysis import Analyzer
+from meedle.docstore import DocStore, make_snippet, preprocess_content, write_docstore
+from meedle.helpers import _natural_key
+from meedle.searcher import docstore_path
+
+
+class Command(BaseCommand):
+    help = ("Menggabungkan semua dokumen collection ke satu document store "
+            "(dikompresi per blok, beserta snippet dan index posisi term) untuk "
+            "endpoint get_docs dan snippet di search_query")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--data-dir', default='collection')
+        parser.add_argument('--no-compression', action='store_true')
+        parser.add_argument('--block-bytes', type=int, default=65536)
+
+    def handle(self, *args, **options):
+        data_path = staticfiles_storage.url(options['data_dir'])[1:]
+        names = []
+        for block in sorted(next(os.walk(data_path))[1], key=_natural_key):
+            for file_name in sorted(os.listdir(os.path.join(data_path, block)), key=_natural_key):
+                names.append(f'{block}/{file_name}')
+
+        def docs():
+            for name in names:
+                with open(os.path.join(data_path, name), 'r') as f:
+                    yield name, f.read()
+
+        path = docstore_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        analyzer = Analyzer.from_files(staticfiles_storage.url('stopwords/english')[1:])
+        n_docs = write_docstore(path, docs(), compression=None if options['no_compression'] else 'zlib',
+                                block_bytes=options['block_bytes'], analyzer=analyzer)
+
+        # pastikan isi document store sama dengan file-file collection
+        store = DocStore(path)
+        for name, content in docs():
+            content = preprocess_content(content)
+            assert store.get(name) == content
+            assert store.get(name, truncate=True) == make_snippet(content, store.snippet_chars)
+        store.close()
+
+        self.stdout.write(f"{path}: {n_docs} dokumen, {store.n_blocks} blok, "
+                          f"{os.path.getsize(path)} bytes")
@@ -0,0 +1,93 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from meedle.helpers import BSBIIndex, VBEPostings
+from meedle.impacts import B, K1, LEVELS, ImpactsReader, compute_impacts, recall, sample_queries, write_impacts
+
+
+class Command(BaseCommand):
+    help = ("Membuat impact-ordered index {index_name}.imp (lihat meedle.impacts) untuk index "
+            "yang sudah ada, dan jika --prune-recall diberikan, index yang di-prune "
+            "{index_name}.pruned.imp dengan min_level terbesar yang recall@k-nya terhadap "
+            "TaaT lengkap masih memenuhi target")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', default='index')
+        parser.add_argument('--index-name', default='main_index')
+        parser.add_argument('--k1', type=float, default=K1)
+        parser.add_argument('--b', type=float, default=B)
+        parser.add_argument('--prune-recall', type=float, default=None,
+                            help="target rata-rata recall@k index yang di-prune, misal 0.95")
+        parser.add_argument('--k', type=int, default=10)
+        parser.add_argument('--queries', default=None,
+                            help="file berisi satu query per baris; default: workload sintetis")
+        parser.add_argument('--sample', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        target = options['prune_recall']
+        if target is not None and not 0 < target <= 1:
+            raise CommandError("--prune-recall harus di antara 0 dan 1")
+        BSBI_instance = BSBIIndex(data_dir = 'collection', \
+            postings_encoding = VBEPostings, \
+            output_dir = options['output_dir'], \
+            index_name = options['index_name'])
+        index_name = options['index_name']
+        if BSBI_instance.segment_names() != [index_name]:
+            raise CommandError("index bersegmen tidak didukung; merge atau build ulang dengan build_index")
+        k1, b, k = options['k1'], options['b'], options['k']
+
+        state = BSBI_instance._load_segment_state(index_name, None)
+        try:
+            scale, impacts = compute_impacts(state, k1, b)
+            path = BSBI_instance.impacts_file(index_name)
+            write_impacts(path, impacts, scale, k1, b)
+            n_postings = sum(len(docs) for groups in impacts.values() for _, docs in groups)
+            self.stdout.write(f"{path}: {os.path.getsize(path)} bytes, {n_postings} postings, "
+                              f"skala {scale:.4f}")
+            if target is None:
+                return
+
+            if options['queries'] is not None:
+                with open(options['queries']) as f:
+                    queries = [BSBI_instance.preprocess_query(line) for line in f if line.strip()]
+            else:
+                queries = sample_queries(state, options['sample'], options['seed'])
+            reference = [BSBI_instance._score(state, terms, k, k1, b, 'taat') for terms in queries]
+            if state.impacts is not None:
+                state.impacts.close()
+            state.impacts = ImpactsReader(path)
+
+            recalls = {}
+
+            def mean_recall(min_level):
+                if min_level not in recalls:
+                    recalls[min_level] = sum(
+                        recall(BSBI_instance._retrieve_impact(state, terms, k, min_level = min_level)[0],
+                               expected)
+                        for terms, expected in zip(queries, reference)) / len(queries)
+                return recalls[min_level]
+
+            # recall turun seiring min_level naik: cari min_level terbesar yang memenuhi target
+            lo, hi = 1, LEVELS
+            pruned_path = BSBI_instance.impacts_file(index_name, pruned = True)
+            if mean_recall(lo) < target:
+                self.stdout.write(f"recall tanpa pruning {mean_recall(lo):.4f} < target; index tidak di-prune")
+                if os.path.exists(pruned_path):
+                    # index yang di-prune dari kalibrasi sebelumnya tidak sesuai lagi
+                    os.remove(pruned_path)
+                return
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                if mean_recall(mid) >= target:
+                    lo = mid
+                else:
+                    hi = mid - 1
+            write_impacts(pruned_path, impacts, scale, k1, b, min_level = lo)
+            kept = sum(len(docs) for groups in impacts.values() for level, docs in groups if level >= lo)
+            self.stdout.write(f"{pruned_path}: min_level {lo}, recall@{k} {mean_recall(lo):.4f} "
+                              f"pada {len(queries)} query, {kept} postings ({kept / n_postings:.1%}), "
+                              f"{os.path.getsize(pruned_path)} bytes")
+        finally:
+            state.close()
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from meedle.compression import CODECS
+from meedle.helpers import BSBIIndex
+
+
+class Command(BaseCommand):
+    help = ("Membangun inverted index dari collection dengan BSBI: parse block "
+            "secara paralel, tulis intermediate index, lalu k-way merge")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--data-dir', default='collection')
+        parser.add_argument('--output-dir', default='index')
+        parser.add_argument('--index-name', default='main_index')
+        parser.add_argument('--codec', choices=sorted(CODECS), default='vbe',
+                            help="codec postings (lihat meedle.compression)")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="banyaknya worker process (default: jumlah CPU)")
+
+    def handle(self, *args, **options):
+        BSBI_instance = BSBIIndex(data_dir = options['data_dir'], \
+            postings_encoding = CODECS[options['codec']], \
+            output_dir = options['output_dir'], \
+            index_name = options['index_name'])
+        start = time.perf_counter()
+        BSBI_instance.index(max_workers = options['workers'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"{len(BSBI_instance.doc_id_map)} dokumen, "
+                          f"{len(BSBI_instance.intermediate_indices)} block, "
+                          f"selesai dalam {elapsed:.2f} detik")
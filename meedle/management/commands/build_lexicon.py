@@ -0,0 +1,54 @@
+import pickle
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand
+
+from meedle.analysis import write_stem_table
+from meedle.lexicon import Lexicon, write_lexicon
+
+
+class Command(BaseCommand):
+    help = ("Mengubah metadata index berformat pickle ({index_name}.dict dan "
+            "IdMap terms/docs) menjadi lexicon biner {index_name}.lex, beserta "
+            "stem table dari vocabulary-nya")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--index-name', default='main_index')
+        parser.add_argument('--output-dir', default='index')
+
+    def handle(self, *args, **options):
+        index_name = options['index_name']
+        output_dir = options['output_dir']
+
+        def load(name):
+            with open(staticfiles_storage.url(f'{output_dir}/{name}')[1:], 'rb') as f:
+                return pickle.load(f)
+
+        metadata = load(f'{index_name}.dict')
+        postings_dict, terms, doc_length = metadata[:3]
+        # metadata lama tanpa nama codec ditulis dengan VBEPostings
+        codec = metadata[3] if len(metadata) > 3 else 'vbe'
+        term_id_to_str = load('terms_id_to_str.dict')
+        doc_id_to_str = load('docs_id_to_str.dict')
+
+        path = staticfiles_storage.url(f'{output_dir}/{index_name}.lex')[1:]
+        write_lexicon(path, postings_dict, terms, doc_length, term_id_to_str, doc_id_to_str, codec)
+
+        # pastikan isi lexicon sama dengan pickle-nya
+        lexicon = Lexicon(path)
+        assert dict(lexicon.postings_dict.items()) == postings_dict
+        assert list(lexicon.terms) == list(terms)
+        assert dict(lexicon.doc_length.items()) == doc_length
+        assert lexicon.codec == codec
+        for term_id in postings_dict:
+            assert lexicon.term_id_map[term_id_to_str[term_id]] == term_id
+            assert lexicon.term_id_map[term_id] == term_id_to_str[term_id]
+        for doc_id in doc_length:
+            assert lexicon.doc_id_map[doc_id] == doc_id_to_str[doc_id]
+        lexicon.close()
+
+        self.stdout.write(f"{path}: {len(postings_dict)} terms, {len(doc_length)} dokumen, codec {codec}")
+
+        stem_table_path = staticfiles_storage.url(f'{output_dir}/stem_table.dict')[1:]
+        write_stem_table(stem_table_path, term_id_to_str)
+        self.stdout.write(f"{stem_table_path}: stem table dari {len(term_id_to_str)} terms")
@@ -0,0 +1,58 @@
+import contextlib
+import os
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from meedle.helpers import BSBIIndex, VBEPostings, term_positions
+from meedle.positions import PositionsWriter
+
+
+class Command(BaseCommand):
+    help = ("Membuat positional index {index_name}.pos untuk index yang sudah ada "
+            "(tanpa rebuild) dengan meng-analyze ulang dokumen-dokumen collection")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--data-dir', default='collection')
+        parser.add_argument('--output-dir', default='index')
+        parser.add_argument('--index-name', default='main_index')
+
+    def handle(self, *args, **options):
+        BSBI_instance = BSBIIndex(data_dir = options['data_dir'], \
+            postings_encoding = VBEPostings, \
+            output_dir = options['output_dir'], \
+            index_name = options['index_name'])
+        if BSBI_instance.positions_path() is not None:
+            os.remove(BSBI_instance.positions_path())
+        path = staticfiles_storage.url(f"{options['output_dir']}/{options['index_name']}.pos")[1:]
+        with contextlib.ExitStack() as stack:
+            BSBI_instance.open()
+            stack.callback(BSBI_instance.close)
+            state = BSBI_instance.state
+            if state.segments is not None:
+                raise CommandError("index bersegmen tidak didukung; build ulang dengan build_index")
+            reader = state.reader
+            data_path = staticfiles_storage.url(options['data_dir'])[1:]
+
+            # termID -> {docID: posisi}; cukup kecil untuk collection ini
+            term_dict = {}
+            for doc_id in reader.doc_length:
+                name = state.doc_id_map[doc_id].replace('\\', '/')
+                with open(os.path.join(data_path, name), 'r') as f:
+                    terms = BSBI_instance.analyzer.analyze(f.read())
+                for term, positions in term_positions(terms).items():
+                    term_dict.setdefault(state.term_id_map.get(term), {})[doc_id] = positions
+
+            # PositionsWriter menulis ke file .tmp yang dihapus jika terjadi error
+            writer = stack.enter_context(PositionsWriter(path))
+            for term_id in reader.postings_dict:
+                postings_list, tf_list = reader.get_postings_list(term_id)
+                doc_positions = term_dict[term_id]
+                positions_lists = [doc_positions[doc_id] for doc_id in postings_list]
+                # posisi harus konsisten dengan TF di index
+                if [len(positions) for positions in positions_lists] != list(tf_list):
+                    raise CommandError(f"posisi term {state.term_id_map[term_id]} tidak sesuai "
+                                       "dengan index; build ulang dengan build_index")
+                writer.append(term_id, positions_lists)
+            n_terms = len(reader.postings_dict)
+        self.stdout.write(f"{path}: {n_terms} terms, {os.path.getsize(path)} bytes")
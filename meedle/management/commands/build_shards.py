@@ -0,0 +1,28 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from meedle import shards
+from meedle.helpers import BSBIIndex, VBEPostings
+
+
+class Command(BaseCommand):
+    help = ("Membagi index yang sudah ada menjadi beberapa shard (lihat meedle.shards) "
+            "untuk scatter-gather di beberapa worker process (MEEDLE_SHARDED)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', default='index')
+        parser.add_argument('--index-name', default='main_index')
+        parser.add_argument('--shards', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--partition', choices=shards.PARTITIONS, default='block',
+                            help="block: block collection berurutan per shard; hash: CRC32 nama dokumen")
+
+    def handle(self, *args, **options):
+        BSBI_instance = BSBIIndex(data_dir = 'collection', \
+            postings_encoding = VBEPostings, \
+            output_dir = options['output_dir'], \
+            index_name = options['index_name'])
+        manifest = shards.build_shards(options['output_dir'], BSBI_instance.segment_names(),
+                                       max(1, options['shards']), options['partition'])
+        for shard in manifest["shards"]:
+            self.stdout.write(f"{shard['name']}: {shard['docs']} dokumen")
@@ -0,0 +1,37 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from meedle.helpers import BSBIIndex, VBEPostings
+from meedle.skips import write_skips
+
+
+class Command(BaseCommand):
+    help = ("Membuat skip table {index_name}.skip untuk setiap segmen index "
+            "yang sudah ada (tanpa rebuild)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', default='index')
+        parser.add_argument('--index-name', default='main_index')
+
+    def handle(self, *args, **options):
+        BSBI_instance = BSBIIndex(data_dir = 'collection', \
+            postings_encoding = VBEPostings, \
+            output_dir = options['output_dir'], \
+            index_name = options['index_name'])
+        for index_name in BSBI_instance.segment_names():
+            path = BSBI_instance._output_path(f'{index_name}.skip')
+            if os.path.exists(path):
+                # file lama mungkin versi format lain yang tidak bisa dibuka; ditulis ulang di bawah
+                os.remove(path)
+            state = BSBI_instance._load_segment_state(index_name, None)
+            try:
+                written = write_skips(path, state.reader.index_file_path, state.reader.postings_dict,
+                                      state.reader.doc_length, state.reader.postings_encoding.name)
+            finally:
+                state.close()
+            if written:
+                self.stdout.write(f"{path}: {os.path.getsize(path)} bytes")
+            else:
+                self.stdout.write(f"{index_name}: codec {state.reader.postings_encoding.name} "
+                                  "tidak memakai skip table")
@@ -0,0 +1,38 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from meedle.helpers import BSBIIndex, VBEPostings
+
+
+class Command(BaseCommand):
+    help = ("Membuat startup snapshot {index_name}.snap (lihat meedle.snapshot) untuk index "
+            "yang sudah ada, agar cold start cukup membaca satu file tanpa unpickle stem "
+            "table, menghitung statistik koleksi, maupun decoding postings untuk pre-warming")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', default='index')
+        parser.add_argument('--index-name', default='main_index')
+        parser.add_argument('--prewarm-terms', type=int, default=None,
+                            help="banyaknya term ber-DF terbesar yang disimpan sudah di-decode; "
+                                 "default: MEEDLE_POSTINGS_CACHE['PREWARM_TERMS']")
+
+    def handle(self, *args, **options):
+        prewarm_terms = options['prewarm_terms']
+        if prewarm_terms is None:
+            postings_cache = getattr(settings, 'MEEDLE_POSTINGS_CACHE', None) or {}
+            prewarm_terms = postings_cache.get('PREWARM_TERMS', 0)
+        BSBI_instance = BSBIIndex(data_dir = 'collection', \
+            postings_encoding = VBEPostings, \
+            output_dir = options['output_dir'], \
+            index_name = options['index_name'])
+        if BSBI_instance.segment_names() != [options['index_name']]:
+            raise CommandError("index bersegmen tidak didukung; merge atau build ulang dengan build_index")
+        try:
+            n_tokens = BSBI_instance.write_snapshot(prewarm_terms)
+        except FileNotFoundError as e:
+            raise CommandError(f"{e}; jalankan build_lexicon terlebih dahulu")
+        path = BSBI_instance.snapshot_file()
+        self.stdout.write(f"{path}: {n_tokens} token di stem table, {prewarm_terms} term prewarm, "
+                          f"{os.path.getsize(path)} bytes")
@@ -0,0 +1,222 @@
+"""
+Instrumentasi query: timer per stage dan counter per query, diagregasi
+menjadi histogram yang diekspos dalam format teks Prometheus (view /metrics).
+
+Instrumentasi hanya berjalan di dalam query_trace(). Di luar trace (metrics
+mati dan request tanpa "debug": true), setiap titik instrumentasi di hot
+path hanya membaca satu ContextVar dan membandingkannya dengan None.
+
+Stage:
+    analysis  : parse query (tokenisasi, stopwords, stemming)
+    fetch     : membaca bytes postings dari file index
+    decode    : decoding postings list (postings yang diambil dari
+                PostingsCache tidak di-decode)
+    scoring   : sisa waktu retrieval, terutama akumulasi skor BM25 (untuk
+                WAND/BMW dan boolean termasuk decoding blok oleh cursor)
+    merge     : menggabungkan top-K dari beberapa segmen atau shard
+    selection : memilih top-K dan me-resolve nama dokumen (TaaT dan boolean)
+
+Counter: postings (banyaknya posting yang diambil), bytes_read, hit/miss
+PostingsCache dan hit result cache. Query yang di-scoring di worker shard
+(lihat meedle.shards) hanya tercatat waktu total dan merge-nya.
+"""
+import bisect
+import contextvars
+import threading
+import time
+
+STAGES = ('analysis', 'fetch', 'decode', 'scoring', 'merge', 'selection')
+COUNTERS = ('postings', 'bytes_read', 'postings_cache_hits', 'postings_cache_misses', 'result_cache_hits')
+# counter yang juga dicatat distribusinya per query
+HISTOGRAM_COUNTERS = ('postings', 'bytes_read')
+
+# batas atas bucket histogram (detik untuk latency)
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+COUNT_BUCKETS = (10, 100, 1000, 10000, 100000, 1000000, 10000000)
+
+# diisi dari settings.MEEDLE_METRICS saat app ready (lihat MeedleConfig)
+enabled = False
+
+_current = contextvars.ContextVar('meedle_query_trace', default=None)
+
+
+def current():
+    """QueryTrace yang sedang aktif di context ini, atau None."""
+    return _current.get()
+
+
+class QueryTrace:
+    """Timer (detik) per stage dan counter untuk satu query."""
+    __slots__ = ('kind', 'timings', 'counters', 'start', 'total')
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.timings = dict.fromkeys(STAGES, 0.0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.start = time.perf_counter()
+        self.total = None
+
+    def add_time(self, stage, seconds):
+        self.timings[stage] += seconds
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def mark(self):
+        """Titik awal untuk add_remainder: (waktu sekarang, total stage yang sudah tercatat)."""
+        return time.perf_counter(), sum(self.timings.values())
+
+    def add_remainder(self, stage, mark):
+        """Mencatat waktu sejak mark yang belum tercatat di stage lain sebagai stage."""
+        start, recorded = mark
+        elapsed = time.perf_counter() - start
+        self.timings[stage] += max(0.0, elapsed - (sum(self.timings.values()) - recorded))
+
+    def as_dict(self):
+        """Isi blok "debug" response /search_query (waktu dalam milidetik)."""
+        total = self.total if self.total is not None else time.perf_counter() - self.start
+        return {
+            "kind": self.kind,
+            "total_ms": total * 1e3,
+            "stages_ms": {stage: seconds * 1e3 for stage, seconds in self.timings.items()},
+            "counters": dict(self.counters),
+        }
+
+
+class _Tracing:
+    """Context trace terluar: memasang QueryTrace baru lalu mencatatnya ke REGISTRY."""
+    __slots__ = ('trace', 'token')
+
+    def __init__(self, kind):
+        self.trace = QueryTrace(kind)
+        self.token = None
+
+    def __enter__(self):
+        self.token = _current.set(self.trace)
+        return self.trace
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        _current.reset(self.token)
+        self.trace.total = time.perf_counter() - self.trace.start
+        if enabled:
+            REGISTRY.observe(self.trace)
+        return False
+
+
+class _Passthrough:
+    """Context tanpa efek: menghasilkan trace yang sedang aktif (atau None)."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return _current.get()
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        return False
+
+
+_PASSTHROUGH = _Passthrough()
+
+
+def query_trace(kind, force=False):
+    """
+    Context untuk menginstrumentasi satu query. Menghasilkan QueryTrace, atau
+    None jika metrics mati dan force False. Trace yang bersarang memakai
+    trace terluar, sehingga view bisa membungkus retrieve_bm25 dengan trace
+    miliknya. Trace terluar dicatat ke REGISTRY jika metrics aktif.
+    """
+    if (enabled or force) and _current.get() is None:
+        return _Tracing(kind)
+    return _PASSTHROUGH
+
+
+class Histogram:
+    """Histogram kumulatif ala Prometheus (bucket le, _sum dan _count)."""
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels=''):
+        separator = ',' if labels else ''
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels}{separator}le="{bound:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels}{separator}le="+Inf"}} {self.count}')
+        suffix = f'{{{labels}}}' if labels else ''
+        lines.append(f'{name}_sum{suffix} {self.sum:g}')
+        lines.append(f'{name}_count{suffix} {self.count}')
+        return lines
+
+
+class MetricsRegistry:
+    """Agregat semua QueryTrace di proses ini (thread-safe)."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.queries = {}
+        self.duration = Histogram(LATENCY_BUCKETS)
+        self.stages = {stage: Histogram(LATENCY_BUCKETS) for stage in STAGES}
+        self.totals = dict.fromkeys(COUNTERS, 0)
+        self.per_query = {name: Histogram(COUNT_BUCKETS) for name in HISTOGRAM_COUNTERS}
+
+    def observe(self, trace):
+        with self.lock:
+            self.queries[trace.kind] = self.queries.get(trace.kind, 0) + 1
+            self.duration.observe(trace.total)
+            for stage, seconds in trace.timings.items():
+                self.stages[stage].observe(seconds)
+            for name, value in trace.counters.items():
+                self.totals[name] += value
+            for name, histogram in self.per_query.items():
+                histogram.observe(trace.counters[name])
+
+    def render(self, caches=None):
+        """
+        Semua metric dalam format teks Prometheus 0.0.4. caches adalah dict
+        nama cache -> hasil stats() (lihat meedle.cache) yang ikut diekspos
+        sebagai gauge.
+        """
+        with self.lock:
+            lines = ['# HELP meedle_queries_total Banyaknya query yang diinstrumentasi.',
+                     '# TYPE meedle_queries_total counter']
+            lines += [f'meedle_queries_total{{kind="{kind}"}} {count}'
+                      for kind, count in sorted(self.queries.items())]
+            lines += ['# HELP meedle_query_duration_seconds Latency retrieval per query.',
+                      '# TYPE meedle_query_duration_seconds histogram']
+            lines += self.duration.render('meedle_query_duration_seconds')
+            lines += ['# HELP meedle_query_stage_seconds Latency per stage retrieval per query.',
+                      '# TYPE meedle_query_stage_seconds histogram']
+            for stage, histogram in self.stages.items():
+                lines += histogram.render('meedle_query_stage_seconds', f'stage="{stage}"')
+            for name, value in self.totals.items():
+                lines += [f'# TYPE meedle_{name}_total counter', f'meedle_{name}_total {value}']
+            for name, histogram in self.per_query.items():
+                lines += [f'# HELP meedle_query_{name} Distribusi {name} per query.',
+                          f'# TYPE meedle_query_{name} histogram']
+                lines += histogram.render(f'meedle_query_{name}')
+        gauges = {}
+        for cache, stats in (caches or {}).items():
+            for key, value in stats.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    gauges.setdefault(key, []).append(f'meedle_cache_{key}{{cache="{cache}"}} {value}')
+        for key, samples in gauges.items():
+            lines += [f'# TYPE meedle_cache_{key} gauge'] + samples
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self.lock:
+            self._reset()
+
+
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,213 @@
+"""
+Positional index opsional untuk phrase query dan proximity scoring.
+
+Posisi setiap kemunculan term di setiap dokumen (urutan term di keluaran
+Analyzer, jadi stopwords tidak dihitung) disimpan di file terpisah
+{index_name}.pos, sehingga query biasa tidak pernah membaca file ini.
+
+Layout file:
+
+    header    : MAGIC, VERSION, SKIP, term_id_bound, offset directory
+    entry     : satu per term, lihat di bawah
+    directory : array('Q') (start, end) entry untuk setiap termID; (0, 0)
+                jika term tidak memiliki posisi
+
+Entry sebuah term dengan df postings terdiri dari (df - 1) // SKIP skip
+pointer lalu data posisi. Data posisi berisi, untuk setiap posting sesuai
+urutan postings list, TF buah posisi yang di-gap encode dengan variable-byte
+encoding. Skip pointer ke-j adalah offset (di data posisi, di-gap encode)
+posting ke-(j * SKIP), sehingga posisi untuk satu posting cukup dicari dengan
+melompat ke skip pointer terdekat lalu melewati paling banyak SKIP - 1 posting.
+"""
+from array import array
+import mmap
+import os
+import struct
+import sys
+
+from .lexicon import _decode_varint, _encode_varint
+
+MAGIC = b'MDLP'
+VERSION = 1
+SKIP = 16
+
+HEADER = struct.Struct('<4sIIIQ')
+
+
+def encode_positions(positions, out):
+    previous = 0
+    for position in positions:
+        _encode_varint(position - previous, out)
+        previous = position
+
+
+def _skip_varints(data, pos, count):
+    """Posisi byte setelah melewati count varint mulai dari pos."""
+    while count > 0:
+        if data[pos] < 128:
+            count -= 1
+        pos += 1
+    return pos
+
+
+class PositionsWriter:
+    """
+    Menulis file .pos. Term di-append dengan urutan bebas; posting untuk
+    setiap term harus sesuai urutan postings list-nya di file .index.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.directory = {}
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.tmp_path = f'{self.path}.tmp'
+        self.file = open(self.tmp_path, 'wb')
+        self.file.write(b'\0' * HEADER.size)
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        if exception_type is not None:
+            self.file.close()
+            os.remove(self.tmp_path)
+            return
+        term_id_bound = max(self.directory) + 1 if self.directory else 0
+        directory = array('Q', [0]) * (2 * term_id_bound)
+        for term_id, (start, end) in self.directory.items():
+            directory[2 * term_id] = start
+            directory[2 * term_id + 1] = end
+        if sys.byteorder != 'little':
+            directory.byteswap()
+        self.file.write(b'\0' * (-self.file.tell() % 8))
+        directory_offset = self.file.tell()
+        self.file.write(directory.tobytes())
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, SKIP, term_id_bound, directory_offset))
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def append(self, term_id, positions_lists):
+        """
+        Parameters
+        ----------
+        positions_lists: List[List[int]]
+            Posisi (terurut) term di setiap dokumen pada postings list-nya
+        """
+        data = bytearray()
+        skips = []
+        for i, positions in enumerate(positions_lists):
+            if i and i % SKIP == 0:
+                skips.append(len(data))
+            encode_positions(positions, data)
+        self._write(term_id, skips, data)
+
+    def append_encoded(self, term_id, chunks):
+        """
+        Menulis posisi sebuah term dari gabungan beberapa data posisi yang
+        sudah di-encode (misal dari beberapa intermediate index atau segmen)
+        tanpa decode ulang.
+
+        Parameters
+        ----------
+        chunks: List[(List[int], bytes)]
+            (tf_list, data posisi) sesuai urutan postings di index hasil merge
+        """
+        data = bytearray()
+        skips = []
+        i = 0
+        for tf_list, chunk in chunks:
+            pos = 0
+            for tf in tf_list:
+                if i and i % SKIP == 0:
+                    skips.append(len(data) + pos)
+                pos = _skip_varints(chunk, pos, tf)
+                i += 1
+            data += chunk
+        self._write(term_id, skips, data)
+
+    def _write(self, term_id, skips, data):
+        start = self.file.tell()
+        header = bytearray()
+        encode_positions(skips, header)
+        self.file.write(header)
+        self.file.write(data)
+        self.directory[term_id] = (start, self.file.tell())
+
+
+class PositionsReader:
+    """File .pos yang di-mmap (read-only dan aman dipakai banyak thread)."""
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = memoryview(self.mmap)
+        magic, version, self.skip, self.term_id_bound, directory_offset = \
+            HEADER.unpack_from(self.buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} bukan positional index Meedle versi {VERSION}")
+        directory = self.buffer[directory_offset:directory_offset + 16 * self.term_id_bound]
+        if sys.byteorder == 'little':
+            self.directory = directory.cast('Q')
+        else:
+            self.directory = array('Q', directory)
+            self.directory.byteswap()
+
+    def __contains__(self, term_id):
+        return (term_id is not None and 0 <= term_id < self.term_id_bound
+                and self.directory[2 * term_id + 1] > 0)
+
+    def _entry(self, term_id, df):
+        """(list skip pointer, data posisi) untuk term dengan df postings."""
+        start = self.directory[2 * term_id]
+        end = self.directory[2 * term_id + 1]
+        pos = start
+        skips = []
+        previous = 0
+        for _ in range((df - 1) // self.skip):
+            gap, pos = _decode_varint(self.buffer, pos)
+            previous += gap
+            skips.append(previous)
+        return skips, self.buffer[pos:end]
+
+    def encoded(self, term_id, df):
+        """Data posisi yang masih di-encode (untuk merge)."""
+        return bytes(self._entry(term_id, df)[1])
+
+    def term(self, term_id, postings_list, tf_list):
+        """TermPositions untuk mengambil posisi per posting sebuah term."""
+        skips, data = self._entry(term_id, len(postings_list))
+        return TermPositions(self.skip, skips, data, postings_list, tf_list)
+
+    def close(self):
+        self.directory = None
+        self.buffer.release()
+        try:
+            self.mmap.close()
+        except BufferError:
+            # masih ada memoryview yang dipakai; dilepas oleh garbage collector
+            pass
+
+
+class TermPositions:
+    """Akses posisi sebuah term untuk posting ke-i (atau docID) tertentu."""
+    def __init__(self, skip, skips, data, postings_list, tf_list):
+        self.skip = skip
+        self.skips = skips
+        self.data = data
+        self.postings_list = postings_list
+        self.tf_list = tf_list
+
+    def get(self, i):
+        """Posisi (terurut) term di dokumen pada posting ke-i."""
+        block = i // self.skip
+        first = block * self.skip
+        pos = self.skips[block - 1] if block else 0
+        tf_list = self.tf_list
+        pos = _skip_varints(self.data, pos, sum(tf_list[first:i]))
+        positions = []
+        position = 0
+        for _ in range(tf_list[i]):
+            gap, pos = _decode_varint(self.data, pos)
+            position += gap
+            positions.append(position)
+        return positions
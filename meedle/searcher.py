@@ -0,0 +1,120 @@
+"""
+Searcher yang hidup selama proses worker berjalan.
+
+Membuat BSBIIndex baru untuk setiap request berarti unpickle IdMap, membaca
+stopwords dan membuka file index berulang kali. Modul ini menyimpan satu
+instance BSBIIndex yang sudah di-open() per proses, dibuat secara lazy saat
+pertama kali dibutuhkan (atau saat app ready jika MEEDLE_PRELOAD_INDEX aktif).
+"""
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+
+from .cache import create_cache
+from .docstore import DocStore
+from .helpers import BSBIIndex, VBEPostings
+from .snippets import SnippetGenerator
+
+_searcher = None
+_searcher_lock = threading.Lock()
+_last_check = 0.0
+
+_docstore = None
+_docstore_loaded = False
+_snippet_generator = None
+
+_executor = None
+
+
+def _create_searcher():
+    postings_cache = getattr(settings, 'MEEDLE_POSTINGS_CACHE', None) or {}
+    return BSBIIndex(data_dir = 'collection', \
+        postings_encoding = VBEPostings, \
+        output_dir = 'index', \
+        result_cache = create_cache(getattr(settings, 'MEEDLE_RESULT_CACHE', None)), \
+        postings_cache_bytes = postings_cache.get('MAX_BYTES', 0), \
+        postings_cache_prewarm = postings_cache.get('PREWARM_TERMS', 0), \
+        sharded = getattr(settings, 'MEEDLE_SHARDED', False), \
+        use_snapshot = getattr(settings, 'MEEDLE_STARTUP_SNAPSHOT', True)).open()
+
+
+def get_searcher():
+    """
+    Mengembalikan BSBIIndex milik proses ini yang sudah warm.
+
+    Setiap MEEDLE_INDEX_CHECK_INTERVAL detik, searcher akan mengecek apakah
+    file index di disk berubah dan memuat ulang jika perlu. Nilai 0 atau None
+    mematikan pengecekan ini (reload hanya lewat reload_searcher()).
+    """
+    global _searcher, _last_check
+    searcher = _searcher
+    if searcher is None:
+        with _searcher_lock:
+            if _searcher is None:
+                _searcher = _create_searcher()
+                _last_check = time.monotonic()
+            searcher = _searcher
+
+    interval = getattr(settings, 'MEEDLE_INDEX_CHECK_INTERVAL', None)
+    if interval and time.monotonic() - _last_check >= interval:
+        _last_check = time.monotonic()
+        searcher.reload_if_changed()
+    return searcher
+
+
+def reload_searcher():
+    """Memaksa searcher memuat ulang index dari disk."""
+    return get_searcher().reload()
+
+
+def docstore_path():
+    return staticfiles_storage.url(getattr(settings, 'MEEDLE_DOCSTORE', 'index/collection.docs'))[1:]
+
+
+def get_docstore():
+    """
+    Mengembalikan DocStore milik proses ini (dibuka sekali), atau None jika
+    file document store belum di-build (lihat build_docstore).
+    """
+    global _docstore, _docstore_loaded
+    if not _docstore_loaded:
+        with _searcher_lock:
+            if not _docstore_loaded:
+                path = docstore_path()
+                _docstore = DocStore(path) if os.path.exists(path) else None
+                _docstore_loaded = True
+    return _docstore
+
+
+def get_snippet_generator():
+    """
+    SnippetGenerator di atas document store proses ini, atau None jika
+    document store belum di-build.
+    """
+    global _snippet_generator
+    if _snippet_generator is None:
+        store = get_docstore()
+        if store is None:
+            return None
+        _snippet_generator = SnippetGenerator(store, snippet_chars=getattr(settings, 'MEEDLE_SNIPPET_CHARS', 300))
+    return _snippet_generator
+
+
+def get_executor():
+    """
+    Thread pool milik proses ini untuk view async (lihat meedle.views):
+    decoding, scoring dan pembacaan dokumen dijalankan di sini agar event
+    loop tidak pernah terblokir. Banyaknya thread dibatasi
+    MEEDLE_ASYNC_WORKERS.
+    """
+    global _executor
+    if _executor is None:
+        with _searcher_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=getattr(settings, 'MEEDLE_ASYNC_WORKERS', 4),
+                                               thread_name_prefix='meedle')
+    return _executor
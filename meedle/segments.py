@@ -0,0 +1,223 @@
+"""
+Index bersegmen untuk update inkremental.
+
+Dokumen baru tidak memerlukan rebuild seluruh index: dokumen-dokumen
+tersebut di-index menjadi segmen delta kecil yang berdiri sendiri (file
+.index, .dict dan lexicon .lex dengan termID/docID lokal). Daftar segmen yang
+aktif disimpan di manifest segments.json pada output directory, dan manifest
+selalu diganti secara atomik sehingga reader hanya pernah melihat kumpulan
+segmen yang konsisten.
+
+Saat query, setiap segmen di-scoring dengan statistik koleksi global (N,
+avdl dan DF yang dijumlahkan dari semua segmen), lalu top-K tiap segmen
+digabung. Karena sebuah dokumen hanya ada di satu segmen, hasilnya sama
+dengan index tunggal yang memuat semua dokumen.
+
+Segmen-segmen kecil digabung oleh TieredMergePolicy (logaritmik, seperti
+Lucene): segmen dikelompokkan ke tier berdasarkan log(jumlah dokumen), dan
+begitu satu tier berisi merge_factor segmen, segmen-segmen tersebut di-merge
+menjadi satu segmen di tier berikutnya.
+
+ASUMSI: nama dokumen unik (dokumen yang sudah ada tidak di-update/dihapus)
+dan hanya satu proses yang menulis ke output directory.
+"""
+import contextlib
+import heapq
+import json
+import math
+import os
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+
+from .lexicon import Lexicon, write_lexicon
+from .positions import PositionsReader, PositionsWriter
+from .skips import write_skips
+
+MANIFEST_NAME = 'segments.json'
+
+
+def _path(output_dir, name):
+    return staticfiles_storage.url(f'{output_dir}/{name}')[1:]
+
+
+def manifest_path(output_dir):
+    return _path(output_dir, MANIFEST_NAME)
+
+
+def read_manifest(output_dir):
+    """
+    Membaca manifest segmen. Mengembalikan None jika belum ada (index
+    hanya terdiri dari satu segmen, yaitu index utama).
+    """
+    path = manifest_path(output_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_manifest(output_dir, manifest):
+    """Menulis manifest secara atomik (tulis ke file sementara lalu rename)."""
+    path = manifest_path(output_dir)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def segment_files(output_dir, name):
+    return [_path(output_dir, f'{name}.{ext}') for ext in ('index', 'dict', 'lex', 'pos', 'skip')]
+
+
+def write_segment(output_dir, name, docs, postings_encoding):
+    """
+    Menulis segmen baru dari dokumen yang sudah di-analyze.
+
+    Parameters
+    ----------
+    docs: List[(str, Counter, dict)]
+        List of (nama dokumen, Counter term -> TF, term -> list posisi),
+        sama seperti keluaran parse_block. Positional index {name}.pos
+        hanya ditulis jika semua dokumen memiliki posisi.
+
+    Returns
+    -------
+    int
+        Banyaknya dokumen (yang memiliki minimal satu term) di segmen.
+    """
+    from .helpers import InvertedIndexWriter
+
+    positional = all(doc_positions is not None for _, _, doc_positions in docs)
+    doc_names = []
+    term_ids = {}
+    term_dict = {}
+    for doc_name, term_tfs, doc_positions in docs:
+        doc_id = len(doc_names)
+        doc_names.append(doc_name)
+        for term, tf in term_tfs.items():
+            term_id = term_ids.setdefault(term, len(term_ids))
+            term_positions = doc_positions[term] if positional else None
+            term_dict.setdefault(term_id, []).append((doc_id, tf, term_positions))
+    term_strs = sorted(term_ids, key=term_ids.get)
+
+    with contextlib.ExitStack() as stack:
+        index = stack.enter_context(InvertedIndexWriter(name, postings_encoding, directory=output_dir))
+        positions = None
+        if positional:
+            positions = stack.enter_context(PositionsWriter(_path(output_dir, f'{name}.pos')))
+        for term_id in sorted(term_dict):
+            postings = term_dict[term_id]
+            index.append(term_id, [doc_id for doc_id, _, _ in postings], [tf for _, tf, _ in postings])
+            if positions is not None:
+                positions.append(term_id, [term_positions for _, _, term_positions in postings])
+    write_lexicon(_path(output_dir, f'{name}.lex'), index.postings_dict, index.terms,
+                  index.doc_length, term_strs, doc_names, postings_encoding.name)
+    write_skips(_path(output_dir, f'{name}.skip'), index.index_file_path, index.postings_dict,
+                index.doc_length, postings_encoding.name)
+    return len(index.doc_length)
+
+
+def merge_segments(output_dir, names, new_name, postings_encoding):
+    """
+    Menggabungkan beberapa segmen menjadi satu segmen baru dengan k-way merge
+    atas term (terurut) dari lexicon masing-masing segmen. docID lokal
+    setiap segmen diberi nomor ulang secara berurutan sesuai urutan names,
+    jadi data posisi (jika semua segmen positional) cukup disambung.
+
+    Returns
+    -------
+    int
+        Banyaknya dokumen di segmen baru.
+    """
+    from .helpers import InvertedIndexReader, InvertedIndexWriter
+
+    lexicons = [Lexicon(_path(output_dir, f'{name}.lex')) for name in names]
+    readers = [InvertedIndexReader(name, postings_encoding, directory=output_dir,
+                                   use_mmap=True, lexicon=lexicon).__enter__()
+               for name, lexicon in zip(names, lexicons)]
+    positions_readers = None
+    if all(os.path.exists(_path(output_dir, f'{name}.pos')) for name in names):
+        positions_readers = [PositionsReader(_path(output_dir, f'{name}.pos')) for name in names]
+    try:
+        doc_names = []
+        doc_maps = []
+        for lexicon in lexicons:
+            doc_map = {}
+            for doc_id in sorted(lexicon.doc_length):
+                doc_map[doc_id] = len(doc_names)
+                doc_names.append(lexicon.doc_id_map[doc_id])
+            doc_maps.append(doc_map)
+
+        def terms_of(segment):
+            for term, term_id in lexicons[segment].iter_terms():
+                yield term, segment, term_id
+
+        term_strs = []
+        with contextlib.ExitStack() as stack:
+            index = stack.enter_context(InvertedIndexWriter(new_name, postings_encoding, directory=output_dir))
+            positions = None
+            if positions_readers is not None:
+                positions = stack.enter_context(PositionsWriter(_path(output_dir, f'{new_name}.pos')))
+
+            def append(postings, tf_list, chunks):
+                if positions is not None:
+                    positions.append_encoded(len(term_strs), chunks)
+                index.append(len(term_strs), postings, tf_list)
+                term_strs.append(curr)
+
+            curr = None
+            postings, tf_list, chunks = [], [], []
+            # heapq.merge stabil: term yang sama keluar sesuai urutan segmen,
+            # jadi docID hasil remap tetap terurut
+            for term, segment, term_id in heapq.merge(*(terms_of(i) for i in range(len(names)))):
+                if term != curr:
+                    if curr is not None:
+                        append(postings, tf_list, chunks)
+                    curr, postings, tf_list, chunks = term, [], [], []
+                segment_postings, segment_tfs = readers[segment].get_postings_list(term_id)
+                doc_map = doc_maps[segment]
+                postings.extend(doc_map[doc_id] for doc_id in segment_postings)
+                tf_list.extend(segment_tfs)
+                if positions is not None:
+                    chunks.append((segment_tfs, positions_readers[segment].encoded(term_id, len(segment_tfs))))
+            if curr is not None:
+                append(postings, tf_list, chunks)
+        write_lexicon(_path(output_dir, f'{new_name}.lex'), index.postings_dict, index.terms,
+                      index.doc_length, term_strs, doc_names, postings_encoding.name)
+        write_skips(_path(output_dir, f'{new_name}.skip'), index.index_file_path, index.postings_dict,
+                    index.doc_length, postings_encoding.name)
+        return len(index.doc_length)
+    finally:
+        for reader, lexicon in zip(readers, lexicons):
+            reader.__exit__(None, None, None)
+            lexicon.close()
+        for reader in positions_readers or []:
+            reader.close()
+
+
+class TieredMergePolicy:
+    """
+    Memilih segmen yang perlu di-merge. Segmen dengan d dokumen berada di
+    tier floor(log_{merge_factor}(d)); jika sebuah tier berisi paling
+    sedikit merge_factor segmen, segmen-segmen tersebut di-merge. Dengan
+    begitu banyaknya segmen tetap O(merge_factor * log(N)) dan setiap dokumen
+    hanya di-merge ulang O(log(N)) kali.
+    """
+    def __init__(self, merge_factor=4):
+        self.merge_factor = merge_factor
+
+    def tier(self, docs):
+        return int(math.log(max(docs, 1), self.merge_factor))
+
+    def find_merge(self, segments):
+        """
+        Mengembalikan list nama segmen yang harus di-merge (tier terendah
+        terlebih dahulu), atau None jika tidak ada.
+        """
+        tiers = {}
+        for segment in segments:
+            tiers.setdefault(self.tier(segment['docs']), []).append(segment['name'])
+        for tier in sorted(tiers):
+            if len(tiers[tier]) >= self.merge_factor:
+                return tiers[tier][:self.merge_factor]
+        return None
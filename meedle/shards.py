@@ -0,0 +1,410 @@
+"""
+Index ber-shard dengan scatter-gather top-K di beberapa worker process.
+
+Dokumen index (seluruh segmen aktif) dibagi ke N shard: per block
+collection secara berurutan ('block', block-block yang berdekatan masuk ke
+shard yang sama dengan jumlah dokumen yang seimbang) atau per hash nama
+dokumen ('hash'). Setiap shard adalah index berdiri sendiri (file .index,
+.lex, .pos dan .skip dengan termID/docID lokal, sama seperti segmen delta)
+yang namanya dicatat di manifest shards.json pada output directory.
+
+Saat query, setiap shard dilayani oleh worker process-nya sendiri yang
+membuka (mmap) index shard tersebut. ShardedState (koordinator) mengirim
+query ke semua worker sekaligus, lalu menggabungkan top-K dari setiap shard.
+Seperti pada index bersegmen, setiap shard di-scoring dengan statistik
+koleksi global: N dan avdl dijumlahkan sekali saat worker dimulai, dan DF
+term query dijumlahkan dari semua shard (lalu di-cache di koordinator)
+sebelum query dikirim. Karena itu skor setiap dokumen sama dengan index
+tanpa shard. Dengan partisi 'block', docID lokal setiap shard berurutan
+sesuai docID global, jadi urutan dokumen yang skornya sama pun tetap sama.
+
+ASUMSI: sama seperti meedle.segments. Manifest mencatat segmen sumber
+shard; jika segmen index berubah (add_documents, merge) shard dianggap
+kedaluwarsa dan diabaikan sampai build_shards dijalankan lagi.
+"""
+import contextlib
+import heapq
+import json
+import math
+import multiprocessing
+import os
+import threading
+import time
+import zlib
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+
+from . import metrics
+from .lexicon import Lexicon, write_lexicon
+from .positions import PositionsReader, PositionsWriter
+from .skips import write_skips
+
+MANIFEST_NAME = 'shards.json'
+PARTITIONS = ('block', 'hash')
+# fork dari proses server yang multi-thread tidak aman, jadi worker di-spawn
+START_METHOD = 'spawn'
+# batas waktu (detik) menunggu worker berhenti saat ditutup
+JOIN_TIMEOUT = 5
+
+
+def _path(output_dir, name):
+    return staticfiles_storage.url(f'{output_dir}/{name}')[1:]
+
+
+def manifest_path(output_dir):
+    return _path(output_dir, MANIFEST_NAME)
+
+
+def read_manifest(output_dir):
+    """Membaca manifest shard, atau None jika index tidak di-shard."""
+    path = manifest_path(output_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_manifest(output_dir, manifest):
+    """Menulis manifest secara atomik (tulis ke file sementara lalu rename)."""
+    path = manifest_path(output_dir)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def shard_files(output_dir, name):
+    return [_path(output_dir, f'{name}.{ext}') for ext in ('index', 'dict', 'lex', 'pos', 'skip')]
+
+
+def remove_shards(output_dir):
+    """Menghapus manifest dan file-file shard (misal setelah index di-build ulang)."""
+    manifest = read_manifest(output_dir)
+    if manifest is None:
+        return
+    os.remove(manifest_path(output_dir))
+    for shard in manifest["shards"]:
+        for path in shard_files(output_dir, shard["name"]):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _block_of(doc_name):
+    """Nama block collection sebuah dokumen ("6\\507.txt" atau "6/507.txt" -> "6")."""
+    return doc_name.replace('\\', '/').split('/', 1)[0]
+
+
+def partition_docs(doc_names, n_shards, partition='block'):
+    """
+    Nomor shard untuk setiap dokumen (sesuai urutan doc_names, yaitu urutan
+    docID).
+
+    'block': block-block diambil sesuai urutan kemunculannya dan dibagi
+    berurutan sehingga setiap shard mendapat kurang lebih total / n_shards
+    dokumen. 'hash': CRC32 nama dokumen modulo n_shards (stabil antar proses,
+    tidak seperti hash() python).
+    """
+    if partition not in PARTITIONS:
+        raise ValueError(f"partisi shard tidak dikenal: {partition}")
+    if partition == 'hash':
+        return [zlib.crc32(name.encode('utf-8')) % n_shards for name in doc_names]
+    block_sizes = {}
+    for name in doc_names:
+        block = _block_of(name)
+        block_sizes[block] = block_sizes.get(block, 0) + 1
+    shard_of_block = {}
+    before = 0
+    for block, size in block_sizes.items():
+        shard_of_block[block] = min(n_shards - 1, before * n_shards // len(doc_names))
+        before += size
+    return [shard_of_block[_block_of(name)] for name in doc_names]
+
+
+def build_shards(output_dir, sources, n_shards, partition='block'):
+    """
+    Membagi index (segmen-segmen sources, sesuai urutan manifest segmen)
+    menjadi n_shard shard baru tanpa membaca ulang collection, lalu mengganti
+    manifest shard secara atomik dan menghapus file shard lama. Shard ditulis
+    dengan codec postings yang sama dengan segmen pertama; posisi hanya
+    ditulis jika semua segmen memiliki positional index.
+
+    Returns
+    -------
+    dict
+        Manifest shard yang baru.
+    """
+    from .compression import get_codec
+    from .helpers import InvertedIndexReader, InvertedIndexWriter
+
+    lexicons = [Lexicon(_path(output_dir, f'{name}.lex')) for name in sources]
+    postings_encoding = get_codec(lexicons[0].codec)
+    readers = [InvertedIndexReader(name, postings_encoding, directory=output_dir,
+                                   use_mmap=True, lexicon=lexicon).__enter__()
+               for name, lexicon in zip(sources, lexicons)]
+    positions_readers = None
+    if all(os.path.exists(_path(output_dir, f'{name}.pos')) for name in sources):
+        positions_readers = [PositionsReader(_path(output_dir, f'{name}.pos')) for name in sources]
+    old_manifest = read_manifest(output_dir)
+    generation = old_manifest["generation"] + 1 if old_manifest is not None else 1
+    try:
+        # (segmen, docID) global sesuai urutan segmen dan docID
+        docs = [(segment, doc_id) for segment, lexicon in enumerate(lexicons)
+                for doc_id in sorted(lexicon.doc_length)]
+        doc_names = [lexicons[segment].doc_id_map[doc_id] for segment, doc_id in docs]
+        assignment = partition_docs(doc_names, n_shards, partition)
+        # docID lokal di shard mengikuti urutan global
+        shard_doc_names = [[] for _ in range(n_shards)]
+        local = {}
+        for doc, name, shard in zip(docs, doc_names, assignment):
+            local[doc] = (shard, len(shard_doc_names[shard]))
+            shard_doc_names[shard].append(name)
+        shard_ids = [shard for shard in range(n_shards) if shard_doc_names[shard]]
+        names = {shard: f'shard_{generation}_{shard}' for shard in shard_ids}
+
+        def terms_of(segment):
+            for term, term_id in lexicons[segment].iter_terms():
+                yield term, segment, term_id
+
+        term_strs = {shard: [] for shard in shard_ids}
+        with contextlib.ExitStack() as stack:
+            indices = {shard: stack.enter_context(InvertedIndexWriter(names[shard], postings_encoding,
+                                                                      directory=output_dir))
+                       for shard in shard_ids}
+            positions = None
+            if positions_readers is not None:
+                positions = {shard: stack.enter_context(PositionsWriter(_path(output_dir, f'{names[shard]}.pos')))
+                             for shard in shard_ids}
+
+            def append(term, parts):
+                for shard, (postings, tf_list, positions_lists) in parts.items():
+                    term_id = len(term_strs[shard])
+                    indices[shard].append(term_id, postings, tf_list)
+                    if positions is not None:
+                        positions[shard].append(term_id, positions_lists)
+                    term_strs[shard].append(term)
+
+            curr = None
+            parts = {}
+            # term yang sama keluar sesuai urutan segmen, jadi docID lokal tetap terurut
+            for term, segment, term_id in heapq.merge(*(terms_of(i) for i in range(len(sources)))):
+                if term != curr:
+                    if curr is not None:
+                        append(curr, parts)
+                    curr, parts = term, {}
+                postings_list, tf_list = readers[segment].get_postings_list(term_id)
+                term_positions = None
+                if positions_readers is not None:
+                    term_positions = positions_readers[segment].term(term_id, postings_list, tf_list)
+                for i, (doc_id, tf) in enumerate(zip(postings_list, tf_list)):
+                    shard, local_id = local[(segment, doc_id)]
+                    part = parts.setdefault(shard, ([], [], []))
+                    part[0].append(local_id)
+                    part[1].append(tf)
+                    if term_positions is not None:
+                        part[2].append(term_positions.get(i))
+            if curr is not None:
+                append(curr, parts)
+
+        manifest = {"generation": generation, "partition": partition, "sources": list(sources),
+                    "shards": []}
+        for shard in shard_ids:
+            index, name = indices[shard], names[shard]
+            write_lexicon(_path(output_dir, f'{name}.lex'), index.postings_dict, index.terms,
+                          index.doc_length, term_strs[shard], shard_doc_names[shard],
+                          postings_encoding.name)
+            write_skips(_path(output_dir, f'{name}.skip'), index.index_file_path, index.postings_dict,
+                        index.doc_length, postings_encoding.name)
+            manifest["shards"].append({"name": name, "docs": len(index.doc_length)})
+    finally:
+        for reader, lexicon in zip(readers, lexicons):
+            reader.__exit__(None, None, None)
+            lexicon.close()
+        for reader in positions_readers or []:
+            reader.close()
+
+    write_manifest(output_dir, manifest)
+    # worker yang masih memakai shard lama tetap bisa membaca file yang sudah di-mmap
+    for shard in (old_manifest or {}).get("shards", []):
+        for path in shard_files(output_dir, shard["name"]):
+            if os.path.exists(path):
+                os.remove(path)
+    return manifest
+
+
+def _serve(conn, index_kwargs, name):
+    """
+    Loop worker process untuk satu shard: memuat shard sebagai IndexState
+    lalu menjawab request (op, args) dari koordinator sampai pipe ditutup.
+    Setiap jawaban berupa (True, hasil) atau (False, exception).
+    """
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    from .helpers import BSBIIndex
+
+    index = BSBIIndex(**index_kwargs)
+    try:
+        state = index._load_segment_state(name, None)
+    except Exception as e:
+        conn.send((False, e))
+        conn.close()
+        return
+    # DF global term-term query, dikirim oleh koordinator bersama setiap query
+    global_df = {}
+    conn.send((True, (state.N, state.total_length)))
+    try:
+        while True:
+            try:
+                op, args = conn.recv()
+            except EOFError:
+                # koordinator sudah ditutup (atau di-garbage collect)
+                break
+            try:
+                if op == 'stats':
+                    N, avdl = args
+                    state.set_collection_stats(N, avdl, global_df.__getitem__)
+                    result = None
+                elif op == 'df':
+                    postings_dict = state.reader.postings_dict
+                    result = []
+                    for term in args[0]:
+                        term_id = state.term_id_map.get(term)
+                        result.append(postings_dict[term_id][1] if term_id in postings_dict else 0)
+                elif op == 'search':
+                    filtered, phrases, k, k1, b, method, proximity, dfs = args
+                    global_df.update(dfs)
+                    result = index._score(state, filtered, k, k1, b, method, phrases, proximity)
+                elif op == 'boolean':
+                    node, k, k1, b, dfs = args
+                    global_df.update(dfs)
+                    result = index._score_boolean(state, node, k, k1, b)
+                else:
+                    raise ValueError(f"request shard tidak dikenal: {op}")
+            except Exception as e:
+                conn.send((False, e))
+            else:
+                conn.send((True, result))
+    finally:
+        state.close()
+        conn.close()
+
+
+class ShardWorker:
+    """Worker process yang melayani satu shard lewat sebuah Pipe."""
+    def __init__(self, context, index_kwargs, name):
+        self.name = name
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child_conn, index_kwargs, name),
+                                       name=f'meedle-{name}', daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def send(self, op, *args):
+        self.conn.send((op, args))
+
+    def recv(self):
+        """(True, hasil) atau (False, exception) dari worker."""
+        return self.conn.recv()
+
+    def close(self):
+        self.conn.close()
+        self.process.join(JOIN_TIMEOUT)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+class ShardedState:
+    """
+    State index ber-shard untuk BSBIIndex: koordinator di atas satu
+    ShardWorker per shard. Query dikirim ke semua worker sebelum jawaban
+    pertama ditunggu, jadi semua shard di-scoring paralel. Satu query
+    memakai semua worker sekaligus, sehingga query dari thread lain menunggu
+    di lock.
+
+    Worker berhenti sendiri saat pipe-nya tertutup, jadi state lama yang
+    ditinggalkan oleh reload() tidak perlu ditutup secara eksplisit.
+    """
+    def __init__(self, index_kwargs, names, version):
+        self.version = version
+        self.segments = None
+        # tidak ada IdMap maupun reader di proses koordinator
+        self.term_id_map = None
+        self.doc_id_map = None
+        self.reader = None
+        self.lock = threading.Lock()
+        self.df_cache = {}
+
+        context = multiprocessing.get_context(START_METHOD)
+        self.shards = []
+        try:
+            for name in names:
+                self.shards.append(ShardWorker(context, index_kwargs, name))
+            stats = self._gather()
+        except Exception:
+            self.close()
+            raise
+        self.N = sum(N for N, _ in stats)
+        self.avdl = sum(total_length for _, total_length in stats) / self.N
+        self._broadcast('stats', self.N, self.avdl)
+
+    def _gather(self):
+        """Jawaban semua worker; exception dari worker di-raise setelah semuanya dibaca."""
+        replies = [worker.recv() for worker in self.shards]
+        for ok, result in replies:
+            if not ok:
+                raise result
+        return [result for _, result in replies]
+
+    def _broadcast(self, op, *args):
+        with self.lock:
+            for worker in self.shards:
+                worker.send(op, *args)
+            return self._gather()
+
+    def df(self, term):
+        """DF sebuah term di seluruh shard."""
+        return self.dfs([term])[term]
+
+    def dfs(self, terms):
+        """{term: DF di seluruh shard}; hanya term yang belum di-cache yang ditanyakan ke worker."""
+        missing = [term for term in dict.fromkeys(terms) if term not in self.df_cache]
+        if missing:
+            for term, counts in zip(missing, zip(*self._broadcast('df', missing))):
+                self.df_cache[term] = sum(counts)
+        return {term: self.df_cache[term] for term in terms}
+
+    def term_weight(self, term):
+        """IDF sebuah term di seluruh shard, atau None jika tidak ada."""
+        df = self.df(term)
+        if df == 0:
+            return None
+        return math.log(self.N / df, 10)
+
+    @staticmethod
+    def _merge(per_shard, k):
+        trace = metrics.current()
+        if trace is not None:
+            start = time.perf_counter()
+        # heapq.merge stabil: skor sama diurutkan sesuai urutan shard
+        merged = heapq.merge(*per_shard, key=lambda t: -t[0])
+        result = [result for _, result in zip(range(k), merged)]
+        if trace is not None:
+            trace.add_time('merge', time.perf_counter() - start)
+        return result
+
+    def score(self, filtered, k, k1, b, method, phrases = (), proximity = False):
+        """Top-K retrieve_bm25 dari semua shard."""
+        dfs = {term: df for term, df in self.dfs(filtered).items() if df > 0}
+        per_shard = self._broadcast('search', list(filtered), list(phrases), k, k1, b, method,
+                                    proximity, dfs)
+        return self._merge(per_shard, k)
+
+    def score_boolean(self, node, terms, k, k1, b):
+        """Top-K retrieve_boolean dari semua shard; terms adalah term yang di-scoring."""
+        dfs = {term: df for term, df in self.dfs(terms).items() if df > 0}
+        return self._merge(self._broadcast('boolean', node, k, k1, b, dfs), k)
+
+    def close(self):
+        for worker in self.shards:
+            worker.close()
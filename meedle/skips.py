@@ -0,0 +1,318 @@
+"""
+Skip table per blok postings, agar postings list bisa dilompati tanpa
+di-decode seluruhnya (misal untuk irisan pada boolean query).
+
+Postings list di file .index (VBEPostings) dibagi secara logis menjadi blok
+berisi BLOCK postings. Karena gap di awal blok ke-j dihitung dari docID
+terakhir blok ke-(j - 1), blok cukup di-decode mulai dari offset byte-nya
+dengan docID terakhir blok sebelumnya sebagai basis, jadi format .index
+tidak perlu diubah. Skip table disimpan di file terpisah {index_name}.skip,
+dan hanya dibuat untuk index dengan codec VBEPostings (CODEC).
+
+Selain itu, untuk Block-Max WAND setiap blok menyimpan nilai maksimum
+w(t, D) = ((k1 + 1) * tf) / (k1 * ((1 - b) + b * dl/avdl) + tf) di blok
+tersebut, dengan k1 dan b tertentu (default K1 dan B, sama dengan
+retrieve_bm25) dan avdl index itu sendiri. IDF tidak ikut disimpan karena
+konstan untuk satu term; upper bound skor blok adalah idf(t) kali nilai ini.
+
+Layout file:
+
+    header    : MAGIC, VERSION, BLOCK, term_id_bound, offset directory,
+                k1, b dan avdl untuk skor maksimum blok
+    entry     : satu per term dengan df > BLOCK, lihat di bawah
+    directory : array('Q') (start, end) skip table setiap termID; (0, 0)
+                jika postings list term tersebut hanya satu blok
+
+Entry sebuah term dengan n blok adalah skip table array('I') 3 * n kolom
+demi kolom: docID terakhir setiap blok, offset byte awal setiap blok di
+postings list, lalu offset byte awal setiap blok di list of TF. Setelah itu,
+mulai dari kelipatan 8 byte berikutnya, array('d') n skor maksimum blok.
+"""
+from array import array
+import bisect
+import math
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = b'MDLS'
+VERSION = 3
+BLOCK = 128
+# nama codec postings (lihat meedle.compression) yang layout bytes-nya dipahami modul ini
+CODEC = 'vbe'
+K1 = 2
+B = 0.75
+
+HEADER = struct.Struct('<4sIIIQddd')
+
+
+def _block_starts(encoded, block_size):
+    """Offset byte awal setiap blok (block_size angka VBE) di encoded."""
+    starts = [0]
+    count = 0
+    for pos, byte in enumerate(encoded):
+        if byte >= 128:
+            count += 1
+            if count % block_size == 0 and pos + 1 < len(encoded):
+                starts.append(pos + 1)
+    return starts
+
+
+def _decode(encoded, base=None):
+    """
+    Decode angka-angka VBE; jika base tidak None, angkanya adalah gap
+    dan yang dikembalikan adalah docID (dijumlahkan mulai dari base).
+    """
+    numbers = []
+    n = 0
+    for byte in encoded:
+        if byte < 128:
+            n = 128 * n + byte
+        else:
+            n = 128 * n + byte - 128
+            if base is not None:
+                base += n
+                n = base
+            numbers.append(n)
+            n = 0
+    return numbers
+
+
+def skip_table(encoded_postings, encoded_tf, block_size=BLOCK):
+    """
+    Skip table (array('I') kolom demi kolom, lihat docstring modul) untuk
+    postings list dan list of TF yang sudah di-encode.
+    """
+    postings_starts = _block_starts(encoded_postings, block_size)
+    tf_starts = _block_starts(encoded_tf, block_size)
+    postings_list = _decode(encoded_postings, 0)
+    last = [postings_list[min(start + block_size, len(postings_list)) - 1]
+            for start in range(0, len(postings_list), block_size)]
+    return array('I', last + postings_starts + tf_starts)
+
+
+def block_max_weights(postings_list, tf_list, norms, k1=K1, block_size=BLOCK):
+    """
+    w(t, D) maksimum setiap blok block_size postings, dengan norms docID ->
+    k1 * ((1 - b) + b * dl/avdl). Dihitung dengan ekspresi yang sama persis
+    dengan scoring, sehingga idf(t) kali nilai ini tidak pernah lebih kecil
+    dari skor term tersebut untuk dokumen di blok.
+    """
+    weights = array('d')
+    for start in range(0, len(postings_list), block_size):
+        block_max = 0
+        for i in range(start, min(start + block_size, len(postings_list))):
+            tf = tf_list[i]
+            block_max = max(block_max, ((k1 + 1) * tf) / (norms[postings_list[i]] + tf))
+        weights.append(block_max)
+    return weights
+
+
+def write_skips(path, index_file_path, postings_dict, doc_length, codec=CODEC, block_size=BLOCK,
+                k1=K1, b=B):
+    """
+    Menulis file .skip untuk file index yang sudah ditulis, dengan
+    postings_dict dan doc_length sesuai InvertedIndex (termID -> (start, df,
+    len_post, len_tf) dan docID -> panjang dokumen). Skor maksimum blok
+    dihitung dengan k1, b dan avdl dari doc_length.
+    Untuk codec selain CODEC tidak ada skip table; file .skip lama (jika ada)
+    dihapus karena sudah tidak sesuai dengan index-nya.
+
+    Returns
+    -------
+    bool
+        True jika file .skip ditulis.
+    """
+    if codec != CODEC:
+        if os.path.exists(path):
+            os.remove(path)
+        return False
+    avdl = sum(doc_length.values()) / len(doc_length) if doc_length else 0.0
+    norms = {doc_id: k1 * ((1 - b) + b * dl/avdl) for doc_id, dl in doc_length.items()}
+    tmp_path = f'{path}.tmp'
+    directory = {}
+    with open(index_file_path, 'rb') as index_file, open(tmp_path, 'wb') as f:
+        data = index_file.read()
+        f.write(b'\0' * HEADER.size)
+        for term_id, (start, df, length_post, length_tf) in postings_dict.items():
+            if df <= block_size:
+                continue
+            middle = start + length_post
+            encoded_postings, encoded_tf = data[start:middle], data[middle:middle + length_tf]
+            table = skip_table(encoded_postings, encoded_tf, block_size)
+            weights = block_max_weights(_decode(encoded_postings, 0), _decode(encoded_tf), norms,
+                                        k1, block_size)
+            if sys.byteorder != 'little':
+                table.byteswap()
+                weights.byteswap()
+            f.write(b'\0' * (-f.tell() % 8))
+            entry_start = f.tell()
+            f.write(table.tobytes())
+            directory[term_id] = (entry_start, f.tell())
+            f.write(b'\0' * (-f.tell() % 8))
+            f.write(weights.tobytes())
+
+        term_id_bound = max(directory) + 1 if directory else 0
+        offsets = array('Q', [0]) * (2 * term_id_bound)
+        for term_id, (entry_start, end) in directory.items():
+            offsets[2 * term_id] = entry_start
+            offsets[2 * term_id + 1] = end
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+        f.write(b'\0' * (-f.tell() % 8))
+        directory_offset = f.tell()
+        f.write(offsets.tobytes())
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, block_size, term_id_bound, directory_offset, k1, b, avdl))
+    os.replace(tmp_path, path)
+    return True
+
+
+class SkipsReader:
+    """File .skip yang di-mmap (read-only dan aman dipakai banyak thread)."""
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = memoryview(self.mmap)
+        (magic, version, self.block_size, self.term_id_bound, directory_offset,
+         self.k1, self.b, self.avdl) = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} bukan skip table Meedle versi {VERSION}")
+        directory = self.buffer[directory_offset:directory_offset + 16 * self.term_id_bound]
+        if sys.byteorder == 'little':
+            self.directory = directory.cast('Q')
+        else:
+            self.directory = array('Q', directory)
+            self.directory.byteswap()
+
+    def table(self, term_id):
+        """Skip table sebuah term, atau None jika postings list-nya hanya satu blok."""
+        if not 0 <= term_id < self.term_id_bound:
+            return None
+        start = self.directory[2 * term_id]
+        end = self.directory[2 * term_id + 1]
+        if end == 0:
+            return None
+        if sys.byteorder == 'little':
+            return self.buffer[start:end].cast('I')
+        table = array('I', self.buffer[start:end])
+        table.byteswap()
+        return table
+
+    def has_block_max(self, k1, b, avdl):
+        """True jika skor maksimum blok di file ini dihitung dengan k1, b dan avdl ini."""
+        return (self.k1, self.b, self.avdl) == (k1, b, avdl)
+
+    def block_max(self, term_id):
+        """
+        w(t, D) maksimum setiap blok sebuah term (lihat docstring modul), atau
+        None jika postings list-nya hanya satu blok.
+        """
+        if not 0 <= term_id < self.term_id_bound:
+            return None
+        start = self.directory[2 * term_id]
+        end = self.directory[2 * term_id + 1]
+        if end == 0:
+            return None
+        weights_start = end + (-end % 8)
+        weights_end = weights_start + 8 * ((end - start) // 12)
+        if sys.byteorder == 'little':
+            return self.buffer[weights_start:weights_end].cast('d')
+        weights = array('d', self.buffer[weights_start:weights_end])
+        weights.byteswap()
+        return weights
+
+    def close(self):
+        self.directory = None
+        self.buffer.release()
+        try:
+            self.mmap.close()
+        except BufferError:
+            # masih ada memoryview yang dipakai; dilepas oleh garbage collector
+            pass
+
+
+class BlockPostingsCursor:
+    """
+    Cursor di atas postings list sebuah term yang hanya men-decode blok yang
+    dibutuhkan: advance(target) mencari blok yang mungkin memuat target lewat
+    docID terakhir setiap blok di skip table (binary search), sehingga blok
+    yang dilewati tidak pernah di-decode. Tanpa skip table, seluruh postings
+    list diperlakukan sebagai satu blok. Blok pertama pun baru di-decode saat
+    dibutuhkan.
+
+    Attributes
+    ----------
+    df(int): banyaknya postings (untuk mengurutkan cursor saat irisan)
+    blocks_decoded(int): banyaknya blok yang sudah di-decode
+    """
+    @classmethod
+    def from_lists(cls, postings_list, tf_list):
+        """Cursor (satu blok) di atas postings list yang sudah di-decode."""
+        cursor = cls(None, None, len(postings_list))
+        cursor.docs, cursor.tfs = postings_list, tf_list
+        return cursor
+
+    def __init__(self, encoded_postings, encoded_tf, df, table=None):
+        self.encoded_postings = encoded_postings
+        self.encoded_tf = encoded_tf
+        self.df = df
+        self.table = table
+        self.n_blocks = len(table) // 3 if table is not None else 1
+        self.last = table[:self.n_blocks] if table is not None else None
+        self.blocks_decoded = 0
+        self.block = 0
+        self.pos = 0
+        self.docs = self.tfs = None
+
+    def _load(self, block):
+        """Decode blok ke-block (atau tandai cursor habis)."""
+        self.block = block
+        self.pos = 0
+        if block >= self.n_blocks:
+            self.docs, self.tfs = (), ()
+            return
+        table, n = self.table, self.n_blocks
+        if table is None:
+            self.docs = _decode(self.encoded_postings, 0)
+            self.tfs = _decode(self.encoded_tf)
+        else:
+            post_end = table[n + block + 1] if block + 1 < n else len(self.encoded_postings)
+            tf_end = table[2 * n + block + 1] if block + 1 < n else len(self.encoded_tf)
+            base = table[block - 1] if block > 0 else 0
+            self.docs = _decode(self.encoded_postings[table[n + block]:post_end], base)
+            self.tfs = _decode(self.encoded_tf[table[2 * n + block]:tf_end])
+        self.blocks_decoded += 1
+
+    def doc(self):
+        """docID saat ini, atau math.inf jika cursor sudah habis."""
+        if self.docs is None:
+            self._load(self.block)
+        if self.pos < len(self.docs):
+            return self.docs[self.pos]
+        return math.inf
+
+    def tf(self):
+        return self.tfs[self.pos]
+
+    def next(self):
+        """Maju ke posting berikutnya."""
+        if self.docs is None:
+            self._load(self.block)
+        self.pos += 1
+        if self.pos >= len(self.docs) and self.block < self.n_blocks:
+            self._load(self.block + 1)
+
+    def advance(self, target):
+        """Maju ke posting pertama dengan docID >= target."""
+        if self.docs is not None and self.doc() >= target:
+            return
+        if self.last is not None and self.block < self.n_blocks and self.last[self.block] < target:
+            self._load(bisect.bisect_left(self.last, target, self.block + 1))
+        elif self.docs is None:
+            self._load(self.block)
+        self.pos = bisect.bisect_left(self.docs, target, self.pos)
+        if self.pos >= len(self.docs) and self.block < self.n_blocks:
+            self._load(self.n_blocks)
@@ -0,0 +1,196 @@
+"""
+Startup snapshot untuk cold start (misal serverless di Vercel).
+
+State searcher yang mahal untuk dibuat saat start ditulis sekali saat build
+(manage.py build_snapshot, dijalankan oleh build_files.sh) ke
+{index_name}.snap, sehingga open() cukup membaca satu file:
+
+    analyzer : stopwords dan token -> stem untuk semua token di collection
+               dan term vocabulary yang stem-nya dirinya sendiri, sehingga
+               query dengan kata-kata dari collection tidak perlu meng-import
+               NLTK sama sekali
+    stats    : N, total panjang dokumen, docID terbesar + 1 dan panjang
+               setiap dokumen (untuk IndexState)
+    prewarm  : postings dan TF term-term ber-DF terbesar yang sudah
+               di-decode, untuk mengisi PostingsCache tanpa decoding
+
+Snapshot dicocokkan dengan CRC32 file index, lexicon dan stopwords sumbernya;
+snapshot yang tidak cocok (index sudah di-build ulang) atau ditulis dengan
+format marshal lain diabaikan dan state dimuat seperti biasa.
+
+Layout file:
+
+    header   : MAGIC, VERSION, versi marshal, checksum, N, total panjang,
+               doc_id_bound, banyaknya term prewarm, lalu offset dan panjang
+               bagian analyzer, offset doc_length dan offset prewarm
+    analyzer : marshal (list stopwords, dict token -> stem)
+    doc_length : array('q') sepanjang doc_id_bound (0 untuk bukan dokumen)
+    prewarm  : array('Q') (termID, banyaknya posting) untuk setiap term, lalu
+               postings dan TF setiap term sebagai array('I')
+"""
+from array import array
+import marshal
+import os
+import struct
+import sys
+import zlib
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .cache import postings_size
+
+MAGIC = b'MDLW'
+VERSION = 1
+
+HEADER = struct.Struct('<4sIIIQQQIQQQQ')
+
+
+def checksum(paths):
+    """CRC32 isi semua file di paths (berurutan)."""
+    crc = 0
+    for path in paths:
+        with open(path, 'rb') as f:
+            crc = zlib.crc32(f.read(), crc)
+    return crc
+
+
+def collection_stem_table(data_path, analyzer, stem_table=None):
+    """
+    token (huruf kecil) -> stem untuk semua token yang bukan stopword di
+    collection, ditambah isi stem_table (misal term vocabulary yang stem-nya
+    dirinya sendiri). Hanya berisi fakta tentang stemmer, jadi hasil analyze
+    dengan table ini sama persis dengan tanpa table.
+    """
+    table = dict(stem_table or {})
+    stop_words = analyzer.stop_words
+    for block in os.listdir(data_path):
+        block_path = os.path.join(data_path, block)
+        if not os.path.isdir(block_path):
+            continue
+        for file_name in os.listdir(block_path):
+            with open(os.path.join(block_path, file_name), 'r') as f:
+                for token in analyzer.tokenize(f.read()):
+                    token = token.lower()
+                    if token not in table and token not in stop_words:
+                        table[token] = analyzer.stem(token)
+    return table
+
+
+def _little_endian(values):
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_snapshot(path, source_checksum, state, stop_words, stem_table, prewarm_terms=0):
+    """
+    Menulis startup snapshot untuk IndexState satu segmen (lihat
+    BSBIIndex.write_snapshot). prewarm_terms term ber-DF terbesar disimpan
+    sudah di-decode.
+    """
+    reader = state.reader
+    analyzer = marshal.dumps((sorted(stop_words), stem_table))
+
+    doc_length = array('q', bytes(8 * state.doc_id_bound))
+    for doc_id, dl in reader.doc_length.items():
+        doc_length[doc_id] = dl
+
+    by_df = sorted(reader.postings_dict, key=lambda term: reader.postings_dict[term][1], reverse=True)
+    prewarm = by_df[:max(0, prewarm_terms)]
+    directory = array('Q')
+    lists = []
+    for term_id in prewarm:
+        postings_list, tf_list = reader.get_postings_list(term_id)
+        directory.extend((term_id, len(postings_list)))
+        lists.append((postings_list, tf_list))
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(b'\0' * HEADER.size)
+        analyzer_offset = f.tell()
+        f.write(analyzer)
+        f.write(b'\0' * (-f.tell() % 8))
+        doc_length_offset = f.tell()
+        f.write(_little_endian(doc_length))
+        prewarm_offset = f.tell()
+        f.write(_little_endian(directory))
+        for postings_list, tf_list in lists:
+            f.write(_little_endian(array('I', postings_list)))
+            f.write(_little_endian(array('I', tf_list)))
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, marshal.version, source_checksum, state.N,
+                            state.total_length, state.doc_id_bound, len(prewarm),
+                            analyzer_offset, len(analyzer), doc_length_offset, prewarm_offset))
+    os.replace(tmp_path, path)
+
+
+class StartupSnapshot:
+    """
+    Isi file .snap yang sudah dibaca ke memori (file-nya langsung ditutup).
+
+    Attributes
+    ----------
+    checksum(int): CRC32 file-file sumber saat snapshot ditulis
+    stop_words(list), stem_table(dict): state Analyzer
+    N, total_length, doc_id_bound(int): statistik koleksi untuk IndexState
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.data = f.read()
+        (magic, version, self.marshal_version, self.checksum, self.N, self.total_length,
+         self.doc_id_bound, self.n_prewarm, analyzer_offset, analyzer_length,
+         self.doc_length_offset, self.prewarm_offset) = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} bukan startup snapshot Meedle versi {VERSION}")
+        self.stop_words = self.stem_table = None
+        if self.marshal_version == marshal.version:
+            self.stop_words, self.stem_table = marshal.loads(
+                self.data[analyzer_offset:analyzer_offset + analyzer_length])
+
+    def matches(self, source_checksum):
+        """True jika snapshot dibuat dari file-file sumber dengan checksum ini."""
+        return self.stem_table is not None and self.checksum == source_checksum
+
+    def _array(self, start, count, typecode):
+        values = array(typecode)
+        values.frombytes(self.data[start:start + values.itemsize * count])
+        if sys.byteorder != 'little':
+            values.byteswap()
+        return values
+
+    def doc_length_array(self):
+        """Panjang setiap docID sebagai numpy array int64, atau None tanpa numpy."""
+        if np is None:
+            return None
+        return np.frombuffer(self.data, dtype='<i8', count=self.doc_id_bound,
+                             offset=self.doc_length_offset).astype(np.int64)
+
+    def prewarm(self, cache, n_terms, arrays=False):
+        """
+        Mengisi PostingsCache dengan n_terms term pertama snapshot (term
+        ber-DF terbesar), sama seperti InvertedIndexReader.prewarm_postings_cache.
+        """
+        n_terms = min(n_terms, self.n_prewarm)
+        directory = self._array(self.prewarm_offset, 2 * self.n_prewarm, 'Q')
+        pos = self.prewarm_offset + 16 * self.n_prewarm
+        for i in range(n_terms):
+            term_id, count = directory[2 * i], directory[2 * i + 1]
+            if arrays:
+                key = ('array', term_id)
+                postings = np.frombuffer(self.data, dtype='<u4', count=count, offset=pos).astype(np.int64)
+                tfs = np.frombuffer(self.data, dtype='<u4', count=count, offset=pos + 4 * count).astype(np.int64)
+            else:
+                key = ('list', term_id)
+                postings = self._array(pos, count, 'I').tolist()
+                tfs = self._array(pos + 4 * count, count, 'I').tolist()
+            pos += 8 * count
+            if not cache.put(key, (postings, tfs), postings_size(postings, tfs), force=True):
+                break
+
+    def release(self):
+        """Membuang isi file mentah setelah state selesai dimuat."""
+        self.data = None
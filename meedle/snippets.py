@@ -0,0 +1,109 @@
+"""
+Snippet yang bergantung pada query (query-biased snippet).
+
+Untuk setiap dokumen hasil retrieval, dipilih potongan teks (passage)
+sepanjang kurang lebih snippet_chars karakter yang paling banyak memuat term
+query, dibobot dengan IDF term tersebut. Posisi kemunculan term diambil dari
+index posisi di DocStore (dihitung saat build), jadi isi dokumen tidak perlu
+di-tokenisasi ulang saat request.
+"""
+from .analysis import WORD_RE
+from .docstore import make_snippet
+
+ELLIPSIS = "..."
+
+
+class SnippetGenerator:
+    """
+    Parameters
+    ----------
+    store(DocStore): document store yang memiliki index posisi term
+    snippet_chars(int): panjang maksimum passage (tanpa "...")
+    context_chars(int): banyaknya karakter sebelum kemunculan term pertama
+                    yang ikut ditampilkan (jika passage masih cukup)
+    """
+    def __init__(self, store, snippet_chars=300, context_chars=60):
+        self.store = store
+        self.snippet_chars = snippet_chars
+        self.context_chars = context_chars
+
+    def prepare(self, weights):
+        """
+        Mengubah {term: bobot} (term hasil Analyzer) menjadi list of
+        (nomor term di store, bobot). Cukup sekali per query.
+        """
+        prepared = []
+        for term, weight in weights.items():
+            ordinal = self.store.term_ordinal(term)
+            if ordinal is not None and weight > 0:
+                prepared.append((ordinal, weight))
+        return prepared
+
+    def snippet(self, name, prepared):
+        """
+        Snippet untuk satu dokumen.
+
+        Returns
+        -------
+        dict
+            {"text": str, "highlights": [[start, end], ...]} dengan offset
+            karakter di "text" untuk setiap kemunculan term query; None jika
+            dokumen tidak ada di store.
+        """
+        store = self.store
+        doc = store.lookup(name)
+        if doc is None:
+            return None
+        content = store.content(doc)
+
+        matches = []
+        for ordinal, weight in prepared:
+            for start in store.positions(doc, ordinal):
+                matches.append((start, WORD_RE.match(content, start).end(), ordinal, weight))
+        if not matches:
+            return {"text": make_snippet(content, self.snippet_chars), "highlights": []}
+        matches.sort()
+
+        begin, end = self._best_window(matches)
+        first, last = matches[begin][0], matches[end - 1][1]
+        start = max(0, first - min(self.context_chars, self.snippet_chars - (last - first)))
+        stop = max(last, min(len(content), start + self.snippet_chars))
+        if stop == len(content):
+            # passage di akhir dokumen: sisa panjangnya dipakai untuk konteks sebelumnya
+            start = max(0, min(start, stop - self.snippet_chars))
+        # passage tidak boleh memotong kata di awal maupun di akhir
+        while 0 < start < first and content[start - 1].isalnum():
+            start += 1
+        while last < stop < len(content) and content[stop].isalnum():
+            stop -= 1
+
+        prefix = ELLIPSIS if start > 0 else ""
+        shift = len(prefix) - start
+        highlights = [[m_start + shift, m_end + shift] for (m_start, m_end, _, _) in matches
+                      if m_start >= start and m_end <= stop]
+        text = prefix + content[start:stop] + (ELLIPSIS if stop < len(content) else "")
+        return {"text": text, "highlights": highlights}
+
+    def _best_window(self, matches):
+        """
+        Range [begin, end) di matches dengan rentang karakter paling banyak
+        snippet_chars yang skornya terbesar: jumlah bobot term berbeda, lalu
+        banyaknya kemunculan, lalu posisi paling awal.
+        """
+        weights = {ordinal: weight for (_, _, ordinal, weight) in matches}
+        best, best_range = None, (0, 1)
+        counts = {}
+        end = 0
+        for begin, (start, _, _, _) in enumerate(matches):
+            while end < len(matches) and (end == begin or matches[end][1] - start <= self.snippet_chars):
+                ordinal = matches[end][2]
+                counts[ordinal] = counts.get(ordinal, 0) + 1
+                end += 1
+            score = (sum(weights[ordinal] for ordinal in counts), end - begin)
+            if best is None or score > best:
+                best, best_range = score, (begin, end)
+            ordinal = matches[begin][2]
+            counts[ordinal] -= 1
+            if counts[ordinal] == 0:
+                del counts[ordinal]
+        return best_range
@@ -1,3 +1,286 @@
-from django.test import TestCase
+import json
+import os
+import random
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+from . import metrics, shards
+from .compression import CODECS, VBEPostings
+from .helpers import BSBIIndex, np
+from .skips import block_max_weights
+
+# tidak ada database (lihat poll/settings.py), jadi semua test memakai
+# SimpleTestCase. Test runner Django memaksa DEBUG = False, sedangkan path index
+# di-resolve lewat staticfiles_storage yang tanpa manifest hanya jalan dengan
+# DEBUG = True seperti di poll/settings.py.
+
+QUERIES = [
+    "alkylated with radioactive iodoacetate",
+    "patient cell effect",
+    "psychodrama for disturbed children",
+    "lipid metabolism in toxemia and normal pregnancy",
+    "crossing the blood-brain barrier 1990",
+    "cell cell cell effect",
+    "kidney disease in children",
+    "xyzzy nonexistentword",
+    "the of and",
+    '"radioactive iodoacetate" alkylated',
+    '"growth hormone"',
+    '"blood pressure" children',
+]
+
+
+def open_index(output_dir='index', **kwargs):
+    return BSBIIndex(data_dir = 'collection', \
+        postings_encoding = VBEPostings, \
+        output_dir = output_dir, \
+        **kwargs).open()
+
+
+@override_settings(DEBUG = True)
+class RetrievalMethodTest(SimpleTestCase):
+    """TaaT, WAND dan Block-Max WAND menghasilkan ranking yang sama persis."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.index = open_index()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.index.close()
+        super().tearDownClass()
+
+    def test_same_ranking(self):
+        for k in (1, 10, 100, 1033):
+            for query in QUERIES:
+                expected = self.index.retrieve_bm25(query, k = k, method = 'taat')
+                for method in ('wand', 'bmw'):
+                    with self.subTest(k = k, query = query, method = method):
+                        self.assertEqual(self.index.retrieve_bm25(query, k = k, method = method), expected)
+
+    def test_same_ranking_without_stored_block_max(self):
+        # skor maksimum blok di .skip hanya untuk k1 = 2 dan b = 0.75
+        for query in QUERIES:
+            expected = self.index.retrieve_bm25(query, k = 10, k1 = 1.2, b = 0.5, method = 'taat')
+            for method in ('wand', 'bmw'):
+                with self.subTest(query = query, method = method):
+                    self.assertEqual(self.index.retrieve_bm25(query, k = 10, k1 = 1.2, b = 0.5, method = method),
+                                     expected)
+
+    def test_stored_block_max(self):
+        state = self.index.state
+        self.assertTrue(state.skips.has_block_max(2, 0.75, state.avdl))
+        n_terms = 0
+        for term_id in state.reader.postings_dict:
+            weights = state.skips.block_max(term_id)
+            if weights is None:
+                continue
+            n_terms += 1
+            postings_list, tf_list = state.reader.get_postings_list(term_id)
+            self.assertEqual(list(weights), list(block_max_weights(postings_list, tf_list,
+                                                                   state.length_norm(2, 0.75))))
+        self.assertGreater(n_terms, 0)
+
+    def test_numpy_taat_matches_python_taat(self):
+        if np is None:
+            self.skipTest("numpy tidak ter-install")
+        python_index = open_index(use_numpy = False)
+        try:
+            for query in QUERIES:
+                with self.subTest(query = query):
+                    expected = python_index.retrieve_bm25(query, k = 1033)
+                    result = self.index.retrieve_bm25(query, k = 1033)
+                    self.assertEqual([doc for _, doc in result], [doc for _, doc in expected])
+                    for (score, _), (expected_score, _) in zip(result, expected):
+                        self.assertAlmostEqual(score, expected_score, places = 9)
+        finally:
+            python_index.close()
+
+    def test_non_positive_k(self):
+        for method in ('taat', 'wand', 'bmw'):
+            with self.subTest(method = method):
+                self.assertEqual(self.index.retrieve_bm25("kidney", k = 0, method = method), [])
+        # term diulang agar postings-nya melewati impacts.NUMPY_THRESHOLD
+        query = " ".join(["study patient result case"] * 4)
+        for k in (0, -1):
+            self.assertEqual(self.index.retrieve_impact(query, k = k), [])
+
+    def test_batch_matches_single_queries(self):
+        queries = [(query, k) for query in QUERIES for k in (5, 1033)]
+        expected = [self.index.retrieve_bm25(query, k = k) for query, k in queries]
+        self.assertEqual(self.index.retrieve_bm25_batch(queries), expected)
+        self.assertEqual(self.index.retrieve_bm25_batch(queries, max_workers = 4), expected)
+
+    def test_batch_with_phrase(self):
+        queries = [('"kidney disease"', 3), ('"kidney disease" children', 1033), ("kidney disease", 10)]
+        for method in ('taat', 'wand', 'bmw'):
+            with self.subTest(method = method):
+                expected = [self.index.retrieve_bm25(query, k = k, method = method) for query, k in queries]
+                self.assertEqual(self.index.retrieve_bm25_batch(queries, method = method), expected)
+
+
+@override_settings(DEBUG = True)
+class CodecTest(SimpleTestCase):
+    """Round-trip semua codec postings dan decoder varbyte NumPy."""
+    def setUp(self):
+        rng = random.Random(0)
+        self.postings_lists = [[], [0], [5], [0, 1, 2, 3], list(range(0, 3000, 7)),
+                               sorted(rng.sample(range(1 << 20), 1000))]
+        self.tf_lists = [[1], [1, 1, 1], [rng.randint(1, 300) for _ in range(1000)], [127, 128, 16383, 16384]]
+
+    def test_round_trip(self):
+        for name, codec in CODECS.items():
+            for postings_list in self.postings_lists:
+                with self.subTest(codec = name, df = len(postings_list)):
+                    self.assertEqual(list(codec.decode(codec.encode(postings_list))), postings_list)
+                    if np is not None:
+                        self.assertEqual(codec.decode_array(codec.encode(postings_list)).tolist(),
+                                         postings_list)
+            for tf_list in self.tf_lists:
+                with self.subTest(codec = name, tf_list = tf_list[:4]):
+                    self.assertEqual(list(codec.decode_tf(codec.encode_tf(tf_list))), tf_list)
+                    if np is not None:
+                        self.assertEqual(codec.decode_tf_array(codec.encode_tf(tf_list)).tolist(), tf_list)
+
+    def test_numpy_varbyte_decoder_matches_python(self):
+        if np is None:
+            self.skipTest("numpy tidak ter-install")
+        rng = random.Random(1)
+        streams = [b'', VBEPostings.vb_encode([0]), VBEPostings.vb_encode([2 ** 35, 1, 0, 127, 128]),
+                   VBEPostings.vb_encode([rng.randint(0, 1 << 28) for _ in range(5000)]),
+                   # byte sisa tanpa terminator diabaikan oleh kedua decoder
+                   VBEPostings.vb_encode([300, 5]) + bytes([1, 2])]
+        for stream in streams:
+            with self.subTest(length = len(stream)):
+                decoded = VBEPostings.vb_decode_array(stream)
+                self.assertEqual(decoded.dtype, np.int64)
+                self.assertEqual(decoded.tolist(), VBEPostings.vb_decode(stream))
+
+    def test_index_postings_decode_identically(self):
+        if np is None:
+            self.skipTest("numpy tidak ter-install")
+        index = open_index()
+        try:
+            reader = index.state.reader
+            for term_id in list(reader.postings_dict)[::50]:
+                encoded_postings, encoded_tf = reader.read_encoded(term_id)
+                self.assertEqual(VBEPostings.decode_array(encoded_postings).tolist(),
+                                 VBEPostings.decode(encoded_postings))
+                self.assertEqual(VBEPostings.decode_tf_array(encoded_tf).tolist(),
+                                 VBEPostings.decode_tf(encoded_tf))
+        finally:
+            index.close()
+
+
+@override_settings(DEBUG = True)
+class ShardedIndexTest(SimpleTestCase):
+    """Skor index yang di-shard sama dengan index tanpa shard."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        static_dir = settings.STATICFILES_DIRS[0]
+        cls.path = tempfile.mkdtemp(prefix = 'test_shards_', dir = static_dir)
+        cls.output_dir = os.path.basename(cls.path)
+        source = os.path.join(static_dir, 'index')
+        for name in os.listdir(source):
+            shutil.copy(os.path.join(source, name), cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.path)
+        super().tearDownClass()
+
+    def test_sharded_scores_match(self):
+        unsharded = open_index(self.output_dir)
+        try:
+            for partition in shards.PARTITIONS:
+                shards.build_shards(self.output_dir, unsharded.segment_names(), 3, partition)
+                sharded = open_index(self.output_dir, sharded = True)
+                try:
+                    self.assertIsInstance(sharded.state, shards.ShardedState)
+                    self.assertEqual(sharded.state.N, unsharded.state.N)
+                    for query in QUERIES:
+                        for method in ('taat', 'wand', 'bmw'):
+                            with self.subTest(partition = partition, query = query, method = method):
+                                expected = unsharded.retrieve_bm25(query, k = 1033, method = method)
+                                result = sharded.retrieve_bm25(query, k = 1033, method = method)
+                                # dokumen dengan skor sama bisa berbeda urutan antar shard
+                                self.assertEqual([score for score, _ in result],
+                                                 [score for score, _ in expected])
+                                self.assertEqual(sorted(result), sorted(expected))
+                                if partition == 'block':
+                                    self.assertEqual(result, expected)
+                finally:
+                    sharded.close()
+        finally:
+            unsharded.close()
+
+
+@override_settings(DEBUG = True)
+class EndpointTest(SimpleTestCase):
+    """Status response setiap endpoint untuk request yang valid dan tidak valid."""
+    def post(self, path, body):
+        return self.client.post(path, json.dumps(body), content_type = 'application/json')
+
+    def test_search_query(self):
+        response = self.post('/search_query', {"query": "lung cancer", "k": 10})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["docs_id"]), 10)
+        for body in ({"query": "lung cancer", "method": "bmw", "proximity": True},
+                     {"query": "cancer AND lung", "mode": "and"},
+                     {"query": "lung cancer", "snippets": True, "debug": True}):
+            with self.subTest(body = body):
+                self.assertEqual(self.post('/search_query', body).status_code, 200)
+        for body in ({"k": 10}, {"query": "lung", "k": "10"}, {"query": "kidney", "k": 0},
+                     {"query": "lung", "k": -1}, {"query": "lung", "method": "bm25"},
+                     {"query": "lung", "mode": "xor"}, {"query": "lung", "proximity": 1},
+                     {"query": "lung", "debug": "yes"}):
+            with self.subTest(body = body):
+                self.assertEqual(self.post('/search_query', body).status_code, 400)
+
+    def test_search_query_batch(self):
+        response = self.post('/search_query_batch', {"queries": [{"query": "lung cancer", "k": 5},
+                                                                 {"query": "blood pressure"}]})
+        self.assertEqual(response.status_code, 200)
+        response = self.post('/search_query_batch', {"queries": [{"query": "\"kidney disease\"", "k": 3}]})
+        self.assertEqual(response.status_code, 200)
+        for body in ({"queries": "lung"}, {"queries": [{"k": 5}]}, {"queries": [{"query": "lung", "k": "5"}]},
+                     {"queries": [{"query": "lung", "k": 0}]}, {"queries": [{"query": "lung", "k": -1}]}):
+            with self.subTest(body = body):
+                self.assertEqual(self.post('/search_query_batch', body).status_code, 400)
+
+    def test_get_docs(self):
+        for path in ('/get_docs', '/async/get_docs'):
+            with self.subTest(path = path):
+                response = self.post(path, {"docs_id": ["6\\507.txt", "11\\1003.txt"], "truncate": True})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(self.post(path, {"truncate": True}).status_code, 400)
+
+    def test_async_search_query(self):
+        self.assertEqual(self.post('/async/search_query', {"query": "lung cancer", "k": 10}).status_code, 200)
+        self.assertEqual(self.post('/async/search_query', {"k": 10}).status_code, 400)
+        self.assertEqual(self.post('/async/search_query', {"query": "lung", "k": 0}).status_code, 400)
+
+    def test_csrf_exempt(self):
+        self.client.handler.enforce_csrf_checks = True
+        for path, body in (('/search_query', {"query": "lung"}), ('/async/search_query', {"query": "lung"}),
+                           ('/search_query_batch', {"queries": [{"query": "lung"}]}),
+                           ('/get_docs', {"docs_id": ["6\\507.txt"]}),
+                           ('/async/get_docs', {"docs_id": ["6\\507.txt"]})):
+            with self.subTest(path = path):
+                self.assertEqual(self.post(path, body).status_code, 200)
+
+    def test_cache_stats_and_metrics(self):
+        self.assertEqual(self.client.get('/cache_stats').status_code, 200)
+        # metrics.enabled diisi dari MEEDLE_METRICS saat app ready, jadi diubah langsung
+        enabled = metrics.enabled
+        try:
+            metrics.enabled = False
+            self.assertEqual(self.client.get('/metrics').status_code, 404)
+            metrics.enabled = True
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
+        finally:
+            metrics.enabled = enabled
@@ -1,7 +1,12 @@
 from django.shortcuts import render
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+import asyncio
+import functools
 import json
-from .helpers import BSBIIndex, VBEPostings
+from django.conf import settings
+from . import metrics
+from .docstore import make_snippet, preprocess_content
+from .searcher import get_docstore, get_executor, get_searcher, get_snippet_generator
 from django.core.files import File
 from django.contrib.staticfiles.storage import staticfiles_storage
 from django.views.decorators.csrf import csrf_exempt
@@ -18,25 +23,52 @@ def endpoint_test(request, keyword):
     }
     return JsonResponse(data, safe=False)
 
-@csrf_exempt 
-def search_query(request):
-    body = json.loads(request.body)
-    if request.method != "POST" or "query" not in body:
-        return HttpResponse(status=400)
-
-    query = body["query"]
+def _search_params(body, BSBI_instance):
+    """Parameter /search_query dari body request, atau None jika tidak valid."""
     topk = 1033 # all docs collection
     if "k" in body:
-        if type(body["k"]) != int:
-            return HttpResponse(status=400)
+        if type(body["k"]) != int or body["k"] <= 0:
+            return None
         topk = body["k"]
 
-    BSBI_instance = BSBIIndex(data_dir = 'collection', \
-        postings_encoding = VBEPostings, \
-        output_dir = 'index')
+    method = body.get("method", "taat")
+    if method not in BSBI_instance.RETRIEVAL_METHODS:
+        return None
 
+    proximity = body.get("proximity", False)
+    if type(proximity) != bool:
+        return None
+
+    # "ranked" (BM25 biasa) atau boolean query dengan operator default "and"/"or"
+    mode = body.get("mode", "ranked")
+    if mode != "ranked" and mode not in BSBI_instance.BOOLEAN_MODES:
+        return None
+
+    debug = body.get("debug", False)
+    if type(debug) != bool:
+        return None
+
+    snippets_k = 0
+    if body.get("snippets"):
+        snippets_k = body.get("snippets_k", 10)
+        if type(snippets_k) != int:
+            return None
+
+    return {"query": body["query"], "k": topk, "method": method, "proximity": proximity,
+            "mode": mode, "snippets_k": snippets_k, "debug": debug}
+
+def _search(BSBI_instance, params):
+    """Retrieval (dan snippet) untuk /search_query; mengembalikan isi response."""
+    query, topk, method, proximity, mode, snippets_k = (params["query"], params["k"], params["method"],
+        params["proximity"], params["mode"], params["snippets_k"])
+    # "debug": true menginstrumentasi query ini meskipun MEEDLE_METRICS mati
+    with metrics.query_trace("ranked" if mode == "ranked" else "boolean", force = params["debug"]) as trace:
+        if mode == "ranked":
+            retrieved = BSBI_instance.retrieve_bm25(query, k = topk, method = method, proximity = proximity)
+        else:
+            retrieved = BSBI_instance.retrieve_boolean(query, k = topk, mode = mode)
     docs = []
-    for (_, doc) in BSBI_instance.retrieve_bm25(query, k = topk):
+    for (_, doc) in retrieved:
         docs.append(doc)
     
     response = {
@@ -45,28 +77,204 @@ def search_query(request):
         "retrieved": len(docs),
         "docs_id": docs,
     }
+    if params["debug"]:
+        response["debug"] = trace.as_dict()
+
+    generator = get_snippet_generator() if snippets_k > 0 else None
+    if generator is not None:
+        prepared = generator.prepare(BSBI_instance.term_weights(query, mode))
+        snippets = {}
+        for doc in docs[:snippets_k]:
+            snippet = generator.snippet(doc, prepared)
+            if snippet is not None:
+                snippets[doc] = snippet
+        response["snippets"] = snippets
+    return response
+
+@csrf_exempt 
+def search_query(request):
+    body = json.loads(request.body)
+    if request.method != "POST" or "query" not in body:
+        return HttpResponse(status=400)
+
+    BSBI_instance = get_searcher()
+    params = _search_params(body, BSBI_instance)
+    if params is None:
+        return HttpResponse(status=400)
+
+    return JsonResponse(_search(BSBI_instance, params), safe=False)
+
+def _in_pool(func, *args):
+    """Menjalankan func(*args) di thread pool async (lihat get_executor)."""
+    return asyncio.get_running_loop().run_in_executor(get_executor(), functools.partial(func, *args))
+
+async def _with_timeout(awaitable):
+    """
+    Menunggu awaitable paling lama MEEDLE_ASYNC_TIMEOUT detik. Jika waktu habis
+    (asyncio.TimeoutError) atau request dibatalkan, pekerjaan di thread pool
+    yang belum mulai ikut dibatalkan; pekerjaan yang sedang berjalan tetap
+    diselesaikan oleh thread-nya, tetapi event loop sudah bebas melayani
+    request lain.
+    """
+    return await asyncio.wait_for(awaitable, getattr(settings, "MEEDLE_ASYNC_TIMEOUT", None))
+
+async def search_query_async(request):
+    """
+    Versi async /search_query untuk server ASGI: memuat index, retrieval dan
+    snippet dijalankan di thread pool, dan request yang melewati
+    MEEDLE_ASYNC_TIMEOUT dijawab 504.
+    """
+    body = json.loads(request.body)
+    if request.method != "POST" or "query" not in body:
+        return HttpResponse(status=400)
 
+    try:
+        BSBI_instance = await _with_timeout(_in_pool(get_searcher))
+        params = _search_params(body, BSBI_instance)
+        if params is None:
+            return HttpResponse(status=400)
+        response = await _with_timeout(_in_pool(_search, BSBI_instance, params))
+    except asyncio.TimeoutError:
+        return HttpResponse(status=504)
     return JsonResponse(response, safe=False)
 
+@csrf_exempt 
+def search_query_batch(request):
+    body = json.loads(request.body)
+    if request.method != "POST" or type(body.get("queries")) != list:
+        return HttpResponse(status=400)
+
+    queries = []
+    for item in body["queries"]:
+        if type(item) != dict or "query" not in item:
+            return HttpResponse(status=400)
+        topk = 1033 # all docs collection
+        if "k" in item:
+            if type(item["k"]) != int or item["k"] <= 0:
+                return HttpResponse(status=400)
+            topk = item["k"]
+        queries.append((item["query"], topk))
+
+    BSBI_instance = get_searcher()
+
+    method = body.get("method", "taat")
+    if method not in BSBI_instance.RETRIEVAL_METHODS:
+        return HttpResponse(status=400)
+    max_workers = getattr(settings, "MEEDLE_BATCH_WORKERS", None)
+
+    results = []
+    batch = BSBI_instance.retrieve_bm25_batch(queries, method = method, max_workers = max_workers)
+    for (query, topk), retrieved in zip(queries, batch):
+        docs = [doc for (_, doc) in retrieved]
+        results.append({
+            "query": query,
+            "k": topk,
+            "retrieved": len(docs),
+            "docs_id": docs,
+        })
+
+    return JsonResponse({"results": results}, safe=False)
+
+def _read_doc_file(doc_id, truncate):
+    """Membaca dokumen langsung dari collection (untuk dokumen di luar document store)."""
+    url = staticfiles_storage.url(f'collection/{str(doc_id)}')
+    try:
+        with open(url[1:], 'r') as f:
+            content = preprocess_content(File(f).read())
+    except (OSError, UnicodeDecodeError):
+        return None
+    return make_snippet(content) if truncate else content
+
+def _iter_docs(docs_id, truncate):
+    """Generator (doc_id, isi) untuk setiap doc_id unik yang ditemukan."""
+    store = get_docstore()
+    seen = set()
+    for doc_id in docs_id:
+        if doc_id in seen:
+            continue
+        seen.add(doc_id)
+        content = store.get(doc_id, truncate) if store is not None else None
+        if content is None:
+            content = _read_doc_file(doc_id, truncate)
+        if content is not None:
+            yield doc_id, content
+
+def _stream_docs(docs):
+    yield "{"
+    for i, (doc_id, content) in enumerate(docs):
+        yield ("," if i else "") + json.dumps(str(doc_id)) + ":" + json.dumps(content)
+    yield "}"
+
+def _valid_docs_request(request, body):
+    if request.method != "POST" or "docs_id" not in body:
+        return False
+    return type(body["docs_id"]) == list and all(type(doc_id) in (str, int) for doc_id in body["docs_id"])
+
+def _collect_docs(docs_id, truncate):
+    get_docstore()
+    return dict(_iter_docs(docs_id, truncate))
+
 @csrf_exempt 
 def get_docs(request):
 
     body = json.loads(request.body)
-    if request.method != "POST" or "docs_id" not in body:
+    if not _valid_docs_request(request, body):
         return HttpResponse(status=400)
 
-    result = {}
-    for doc_id in body["docs_id"]:
-        url = staticfiles_storage.url(f'collection/{str(doc_id)}')
-        try:
-            with open(url[1:], 'r') as f:
-                content = File(f).read()
-                content = content.replace("-\n", "")
-                if "truncate" in body and body["truncate"] and len(content) > 300:
-                    content = content[:300]
-                    content += "..."
-                result[doc_id] = content
-        except:
-            pass
-
-    return JsonResponse(result, safe=False)
+    truncate = bool(body.get("truncate"))
+    docs = _iter_docs(body["docs_id"], truncate)
+    threshold = getattr(settings, "MEEDLE_DOCS_STREAM_THRESHOLD", None)
+    if threshold is not None and len(body["docs_id"]) > threshold:
+        return StreamingHttpResponse(_stream_docs(docs), content_type="application/json")
+
+    return JsonResponse(dict(docs), safe=False)
+
+async def get_docs_async(request):
+    """
+    Versi async /get_docs: dokumen dibaca di thread pool (dekompresi zlib
+    melepas GIL, jadi potongan docs_id sebanyak MEEDLE_DOCS_STREAM_THRESHOLD
+    dibaca paralel), dengan batas waktu MEEDLE_ASYNC_TIMEOUT (504).
+    """
+    body = json.loads(request.body)
+    if not _valid_docs_request(request, body):
+        return HttpResponse(status=400)
+
+    truncate = bool(body.get("truncate"))
+    docs_id = list(dict.fromkeys(body["docs_id"]))
+    size = getattr(settings, "MEEDLE_DOCS_STREAM_THRESHOLD", None) or len(docs_id) or 1
+    chunks = [docs_id[i:i + size] for i in range(0, len(docs_id), size)]
+    try:
+        results = await _with_timeout(asyncio.gather(*(_in_pool(_collect_docs, chunk, truncate)
+                                                       for chunk in chunks)))
+    except asyncio.TimeoutError:
+        return HttpResponse(status=504)
+    docs = {}
+    for result in results:
+        docs.update(result)
+    return JsonResponse(docs, safe=False)
+
+search_query_async.csrf_exempt = True
+get_docs_async.csrf_exempt = True
+
+def cache_stats(request):
+    searcher = get_searcher()
+    stats = {}
+    if searcher.result_cache is not None:
+        stats["result_cache"] = searcher.result_cache.stats()
+    state = searcher.state
+    if state is not None and state.reader is not None and state.reader.postings_cache is not None:
+        stats["postings_cache"] = state.reader.postings_cache.stats()
+    return JsonResponse(stats, safe=False)
+
+def metrics_view(request):
+    """Metric instrumentasi query dan statistik cache dalam format teks Prometheus."""
+    if not metrics.enabled:
+        return HttpResponse(status=404)
+    searcher = get_searcher()
+    caches = {}
+    if searcher.result_cache is not None:
+        caches["result"] = searcher.result_cache.stats()
+    state = searcher.state
+    if state is not None and state.reader is not None and state.reader.postings_cache is not None:
+        caches["postings"] = state.reader.postings_cache.stats()
+    return HttpResponse(metrics.REGISTRY.render(caches), content_type="text/plain; version=0.0.4; charset=utf-8")
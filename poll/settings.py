@@ -34,28 +34,22 @@ CORS_ORIGIN_ALLOW_ALL = True
 
 # Application definition
 
+# Hanya app yang dibutuhkan API search. Tidak ada database, jadi admin, auth,
+# contenttypes, sessions dan messages tidak bisa dipakai; memuatnya (beserta
+# middleware-nya) hanya memperlambat cold start di serverless. Django REST
+# framework juga tidak dipakai oleh view mana pun.
 INSTALLED_APPS = [
-    'django.contrib.admin',
-    'django.contrib.auth',
-    'django.contrib.contenttypes',
-    'django.contrib.sessions',
-    'django.contrib.messages',
     'django.contrib.staticfiles',
     'corsheaders',
     'meedle',
-      'rest_framework',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'corsheaders.middleware.CorsMiddleware',
-    'django.middleware.common.CommonMiddleware',
 ]
 
 CORS_ALLOW_ALL_ORIGINS = True # If this is used then `CORS_ALLOWED_ORIGINS` will not have any effect
@@ -75,8 +69,6 @@ TEMPLATES = [
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
-                'django.contrib.auth.context_processors.auth',
-                'django.contrib.messages.context_processors.messages',
             ],
         },
     },
@@ -138,3 +130,48 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles_build', 'static')
 # You can remove this if it causes problems on your setup.
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+
+# Meedle search engine
+# Muat index saat app ready (bukan saat request pertama)
+MEEDLE_PRELOAD_INDEX = False
+# Interval (detik) pengecekan perubahan file index; 0 untuk mematikan
+MEEDLE_INDEX_CHECK_INTERVAL = 5
+# Cache hasil query. BACKEND: 'local' (LRU per proses), 'django' (memakai
+# CACHES[ALIAS], bisa dibagi antar worker), atau None untuk mematikan.
+# TTL dalam detik; None berarti tidak kedaluwarsa.
+MEEDLE_RESULT_CACHE = {
+    'BACKEND': 'local',
+    'MAX_ENTRIES': 1024,
+    'TTL': None,
+    'ALIAS': 'default',
+}
+# Cache postings list yang sudah di-decode (budget dalam bytes), diisi
+# PREWARM_TERMS term ber-DF terbesar saat index dibuka
+MEEDLE_POSTINGS_CACHE = {
+    'MAX_BYTES': 16 * 1024 * 1024,
+    'PREWARM_TERMS': 256,
+}
+# Banyaknya thread untuk scoring di /search_query_batch (None: berurutan)
+MEEDLE_BATCH_WORKERS = 4
+# Document store untuk /get_docs (path relatif terhadap static, dibuat oleh
+# build_docstore) dan batas banyaknya docs_id sebelum response di-stream
+MEEDLE_DOCSTORE = 'index/collection.docs'
+MEEDLE_DOCS_STREAM_THRESHOLD = 200
+# Panjang maksimum snippet per dokumen di /search_query (snippets: true)
+MEEDLE_SNIPPET_CHARS = 300
+# View async (/async/search_query, /async/get_docs): banyaknya thread untuk
+# decoding, scoring dan membaca dokumen, serta batas waktu request (detik,
+# None berarti tanpa batas) sebelum dijawab 504
+MEEDLE_ASYNC_WORKERS = 4
+MEEDLE_ASYNC_TIMEOUT = 10
+# Jika index sudah di-shard (manage.py build_shards), setiap shard dilayani
+# oleh worker process-nya sendiri dan query di-scoring di semua shard paralel
+MEEDLE_SHARDED = False
+# Instrumentasi query (timer per stage dan counter) yang diagregasi menjadi
+# histogram di /metrics (format Prometheus). Jika mati, /metrics 404 dan
+# instrumentasi hanya berjalan untuk request /search_query dengan "debug": true
+MEEDLE_METRICS = False
+# Muat analyzer, statistik koleksi dan pre-warming PostingsCache dari startup
+# snapshot (manage.py build_snapshot, dijalankan oleh build_files.sh) untuk
+# mempercepat cold start; snapshot yang tidak sesuai index diabaikan
+MEEDLE_STARTUP_SNAPSHOT = True
@@ -13,15 +13,19 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
 from django.urls import path
-from meedle.views import (meedle_view, endpoint_test, search_query, get_docs)
+from meedle.views import (meedle_view, endpoint_test, search_query, search_query_batch, get_docs, cache_stats,
+                          search_query_async, get_docs_async, metrics_view)
 
 
 urlpatterns = [
     path('' , meedle_view , name="meedle"),
     path('search/<str:keyword>', endpoint_test, name="endpoint_test"),
     path('search_query', search_query, name="search_query"),
+    path('search_query_batch', search_query_batch, name="search_query_batch"),
     path('get_docs', get_docs, name="get_docs"),
-    path('admin/', admin.site.urls),
+    path('async/search_query', search_query_async, name="search_query_async"),
+    path('async/get_docs', get_docs_async, name="get_docs_async"),
+    path('cache_stats', cache_stats, name="cache_stats"),
+    path('metrics', metrics_view, name="metrics"),
 ]